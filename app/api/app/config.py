@@ -35,3 +35,9 @@ WORKBOOK_BASE_DIR = Path(os.getenv("APP_WORKBOOK_BASE_DIR", (API_ROOT.parents[1]
 ALLOW_CUSTOM_WORKBOOK_PATH = _as_bool(os.getenv("APP_ALLOW_CUSTOM_WORKBOOK_PATH"), default=False)
 MAX_UPLOAD_BYTES = _as_int(os.getenv("APP_MAX_UPLOAD_BYTES"), default=20 * 1024 * 1024)
 API_KEY = (os.getenv("APP_API_KEY") or "").strip()
+# Commit the sync every N source rows per sheet and checkpoint progress; 0 keeps one transaction.
+SYNC_COMMIT_CHUNK_ROWS = max(_as_int(os.getenv("APP_SYNC_COMMIT_CHUNK_ROWS"), default=0), 0)
+# Seconds a dashboard response is served from the in-process cache; 0 disables caching.
+DASHBOARD_CACHE_TTL_SECONDS = max(_as_int(os.getenv("APP_DASHBOARD_CACHE_TTL_SECONDS"), default=30), 0)
+# Seconds the in-memory work item catalog is trusted before reloading; bounds staleness across workers.
+WORK_ITEM_CATALOG_TTL_SECONDS = max(_as_int(os.getenv("APP_WORK_ITEM_CATALOG_TTL_SECONDS"), default=300), 0)
@@ -4,8 +4,8 @@ from __future__ import annotations
 
 from collections.abc import Generator
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 from .config import DATABASE_URL
 
@@ -22,3 +22,43 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+def ensure_columns(bind) -> list[str]:
+    """Add model columns missing from existing tables, as nullable, and return them as ``table.column``.
+
+    Callers backfill the returned columns; ``create_all`` never alters existing tables.
+    """
+    inspector = inspect(bind)
+    added: list[str] = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=bind.dialect)
+            with bind.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def ensure_indexes(bind) -> None:
+    """Create model indexes missing from existing tables (``create_all`` only indexes new tables)."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind, checkfirst=True)
+
+
+def dialect_insert(db: Session, table):
+    """Return an INSERT construct that supports ``ON CONFLICT`` for the bound dialect."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT upsert is not supported for dialect: {dialect}")
+    return insert(table)
@@ -8,17 +8,32 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import CORS_ORIGINS
-from .database import Base, SessionLocal, engine
-from .routers import customers, dashboard, documents, finance, projects, sync, work_items
-from .seed import seed_data
+from .database import Base, SessionLocal, engine, ensure_columns, ensure_indexes
+from .routers import customers, dashboard, documents, export, finance, ids, projects, sync, templates, work_items
+from .seed import backfill_project_status_class, seed_data
+from .services.dashboard_aggregates import rebuild_dashboard_aggregates
+from .services.id_generator import reseed_id_sequences
+from .services.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from .services.project_rollups import rebuild_project_rollups
+from .services.work_item_search import refresh_work_item_search_index
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     Base.metadata.create_all(bind=engine)
+    ensure_columns(engine)
+    ensure_indexes(engine)
     db = SessionLocal()
     try:
         seed_data(db)
+        backfill_project_status_class(db)
+        # Rows may have been written outside the API (seed, manual SQL) since the last run.
+        rebuild_dashboard_aggregates(db)
+        rebuild_project_rollups(db)
+        reseed_id_sequences(db)
+        # Indexes items added by the seed or an older build; unchanged items are skipped.
+        refresh_work_item_search_index(db)
+        db.commit()
     finally:
         db.close()
     yield
@@ -32,6 +47,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[TOTAL_COUNT_HEADER, NEXT_CURSOR_HEADER],
 )
 
 @app.get("/health")
@@ -46,3 +62,6 @@ app.include_router(sync.router, prefix="/api/v1")
 app.include_router(work_items.router, prefix="/api/v1")
 app.include_router(finance.router, prefix="/api/v1")
 app.include_router(dashboard.router, prefix="/api/v1")
+app.include_router(ids.router, prefix="/api/v1")
+app.include_router(export.router, prefix="/api/v1")
+app.include_router(templates.router, prefix="/api/v1")
@@ -5,12 +5,30 @@ from __future__ import annotations
 from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import Date, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Date, DateTime, Float, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .database import Base
 
 
+PROJECT_STATUS_ACTIVE = "active"
+PROJECT_STATUS_COMPLETED = "completed"
+PROJECT_STATUS_LOST = "lost"
+
+
+def classify_project_status(project_status: Optional[str]) -> str:
+    """Map a free-form workbook status (e.g. "⑦完工") to an indexed classification."""
+    if project_status and "完工" in project_status:
+        return PROJECT_STATUS_COMPLETED
+    if project_status and "失注" in project_status:
+        return PROJECT_STATUS_LOST
+    return PROJECT_STATUS_ACTIVE
+
+
+def _default_status_class(context) -> str:
+    return classify_project_status(context.get_current_parameters().get("project_status"))
+
+
 class Customer(Base):
     __tablename__ = "customers"
 
@@ -23,6 +41,7 @@ class Customer(Base):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (Index("ix_projects_status_class_created_at", "status_class", "created_at"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     project_id: Mapped[str] = mapped_column(String(16), unique=True, index=True, nullable=False)
@@ -36,6 +55,8 @@ class Project(Base):
     owner_name: Mapped[str] = mapped_column(String(128), nullable=False, default="吉野博")
     target_margin_rate: Mapped[float] = mapped_column(Float, nullable=False, default=0.25)
     project_status: Mapped[str] = mapped_column(String(64), nullable=False, default="①リード")
+    # Derived from project_status on insert; writers that change the status must set it too.
+    status_class: Mapped[str] = mapped_column(String(16), nullable=False, default=_default_status_class)
     created_at: Mapped[date] = mapped_column(Date, nullable=False, default=date.today)
     created_at_ts: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
 
@@ -55,7 +76,7 @@ class Invoice(Base):
     )
     invoice_amount: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
     invoice_type: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
-    billed_at: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    billed_at: Mapped[Optional[date]] = mapped_column(Date, nullable=True, index=True)
     paid_amount: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
     remaining_amount: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
     status: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
@@ -97,6 +118,57 @@ class WorkItemMaster(Base):
     standard_unit_price: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
     default_vendor_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     margin_rate: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    # Hash of the text last written to work_item_search_grams; NULL means not indexed yet.
+    search_signature: Mapped[Optional[str]] = mapped_column(String(40), nullable=True)
+    # Normalised copies of name / category / specification, ranked in SQL by the search.
+    search_name: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    search_category: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    search_specification: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+
+class WorkItemSearchGram(Base):
+    __tablename__ = "work_item_search_grams"
+    __table_args__ = (UniqueConstraint("gram", "item_id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    gram: Mapped[str] = mapped_column(String(2), nullable=False)
+    item_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("work_item_master.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+
+
+class EstimateTemplate(Base):
+    __tablename__ = "estimate_templates"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String(128), unique=True, nullable=False)
+    category: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    source_sheet: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+    items: Mapped[list["EstimateTemplateItem"]] = relationship(
+        "EstimateTemplateItem",
+        back_populates="template",
+        cascade="all, delete-orphan",
+        order_by="EstimateTemplateItem.position",
+    )
+
+
+class EstimateTemplateItem(Base):
+    __tablename__ = "estimate_template_items"
+    __table_args__ = (UniqueConstraint("template_id", "position"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    template_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("estimate_templates.id", ondelete="CASCADE"), nullable=False
+    )
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    master_item_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("work_item_master.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    quantity: Mapped[float] = mapped_column(Float, nullable=False, default=1.0)
+
+    template: Mapped[EstimateTemplate] = relationship("EstimateTemplate", back_populates="items")
 
 
 class ProjectItem(Base):
@@ -116,3 +188,75 @@ class ProjectItem(Base):
     created_at_ts: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
 
     project: Mapped[Project] = relationship("Project", back_populates="items")
+
+
+class SyncSheetFingerprint(Base):
+    __tablename__ = "sync_sheet_fingerprints"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    sheet_name: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    synced_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class SyncRowFingerprint(Base):
+    __tablename__ = "sync_row_fingerprints"
+    __table_args__ = (UniqueConstraint("sheet_name", "row_key"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    sheet_name: Mapped[str] = mapped_column(String(64), nullable=False)
+    row_key: Mapped[str] = mapped_column(String(255), nullable=False)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+
+
+class WorkbookSyncState(Base):
+    __tablename__ = "workbook_sync_state"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    content_sha256: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    result_json: Mapped[str] = mapped_column(Text, nullable=False)
+    applied_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class SyncCheckpoint(Base):
+    __tablename__ = "sync_checkpoints"
+    __table_args__ = (UniqueConstraint("content_sha256", "sheet_name"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    content_sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    sheet_name: Mapped[str] = mapped_column(String(64), nullable=False)
+    rows_committed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    completed: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class DashboardAggregate(Base):
+    __tablename__ = "dashboard_aggregates"
+    __table_args__ = (UniqueConstraint("metric", "bucket"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    metric: Mapped[str] = mapped_column(String(32), nullable=False)
+    # Empty for plain totals; the project status for per-status counts.
+    bucket: Mapped[str] = mapped_column(String(64), nullable=False, default="")
+    value: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+
+class ProjectRollup(Base):
+    __tablename__ = "project_rollups"
+    __table_args__ = (UniqueConstraint("project_id", "metric", "bucket"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    project_id: Mapped[str] = mapped_column(String(16), nullable=False)
+    metric: Mapped[str] = mapped_column(String(32), nullable=False)
+    # Empty for plain totals; the item category for estimate subtotals.
+    bucket: Mapped[str] = mapped_column(String(128), nullable=False, default="")
+    value: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+
+class IdSequence(Base):
+    __tablename__ = "id_sequences"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    prefix: Mapped[str] = mapped_column(String(8), unique=True, nullable=False)
+    last_value: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
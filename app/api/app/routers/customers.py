@@ -2,20 +2,35 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from ..database import get_db
 from ..models import Customer
 from ..schemas import CustomerRead
+from ..services.pagination import count_rows, keyset_page, set_page_headers
 
 router = APIRouter(prefix="/customers", tags=["customers"])
 
 
 @router.get("", response_model=list[CustomerRead])
-def list_customers(db: Session = Depends(get_db)) -> list[CustomerRead]:
-    rows = db.execute(select(Customer).order_by(Customer.customer_id.asc())).scalars().all()
+def list_customers(
+    response: Response,
+    after: Optional[str] = Query(default=None, description="Return customers after this customer_id"),
+    limit: Optional[int] = Query(default=None, ge=1, le=5000),
+    estimate_total: bool = Query(default=False),
+    db: Session = Depends(get_db),
+) -> list[CustomerRead]:
+    stmt = select(Customer)
+    if after is None and limit is None:
+        # Unpaged callers (e.g. the project form's customer picker) still get every customer.
+        rows, next_cursor = db.execute(stmt.order_by(Customer.customer_id.asc())).scalars().all(), None
+    else:
+        rows, next_cursor = keyset_page(db, stmt, Customer.customer_id, after, limit or 1000)
+    set_page_headers(response, count_rows(db, stmt, estimate=estimate_total), next_cursor)
     return [
         CustomerRead(
             customer_id=row.customer_id,
@@ -2,56 +2,59 @@
 
 from __future__ import annotations
 
+import json
+from collections.abc import Callable
 from datetime import date
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import and_, func, not_, or_, select
+from fastapi import APIRouter, Depends, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import and_, case, extract, func, or_, select
 from sqlalchemy.orm import Session
 
-from ..database import get_db
-from ..models import Invoice, Payment, Project, ProjectItem
+from ..database import SessionLocal, get_db
+from ..models import PROJECT_STATUS_ACTIVE, Invoice, Payment, Project
 from ..schemas import (
     DashboardActiveProject,
     DashboardMonthlySalesPoint,
     DashboardOverviewResponse,
     DashboardSummaryResponse,
 )
+from ..services.dashboard_aggregates import (
+    INVOICE_AMOUNT,
+    INVOICE_REMAINING,
+    ITEM_LINE_TOTAL,
+    PAYMENT_ORDERED,
+    PAYMENT_REMAINING,
+    read_dashboard_aggregates,
+)
+from ..services.dashboard_cache import etag_matches, get_or_build
+from ..services.dashboard_events import dashboard_bus
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
+ACTIVE_PROJECT_LIMIT = 12
 
-@router.get("/summary", response_model=DashboardSummaryResponse)
-def get_dashboard_summary(db: Session = Depends(get_db)) -> DashboardSummaryResponse:
-    project_total = db.execute(select(func.count(Project.id))).scalar_one() or 0
 
-    status_rows = db.execute(
-        select(Project.project_status, func.count(Project.id)).group_by(Project.project_status)
-    ).all()
-    project_status_counts = {
-        (status if status else "未設定"): int(count)
-        for status, count in status_rows
-    }
-
-    invoice_total_amount = db.execute(select(func.coalesce(func.sum(Invoice.invoice_amount), 0.0))).scalar_one() or 0.0
-    invoice_remaining_amount = (
-        db.execute(select(func.coalesce(func.sum(Invoice.remaining_amount), 0.0))).scalar_one() or 0.0
-    )
+def _cached_response(request: Request, key: str, build: Callable[[], BaseModel]) -> Response:
+    cached = get_or_build(key, build)
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
 
-    payment_total_amount = db.execute(select(func.coalesce(func.sum(Payment.ordered_amount), 0.0))).scalar_one() or 0.0
-    payment_remaining_amount = (
-        db.execute(select(func.coalesce(func.sum(Payment.remaining_amount), 0.0))).scalar_one() or 0.0
-    )
 
-    item_total_amount = db.execute(select(func.coalesce(func.sum(ProjectItem.line_total), 0.0))).scalar_one() or 0.0
+def _build_summary(db: Session) -> DashboardSummaryResponse:
+    totals, project_status_counts = read_dashboard_aggregates(db)
 
     return DashboardSummaryResponse(
-        project_total=int(project_total),
+        project_total=sum(project_status_counts.values()),
         project_status_counts=project_status_counts,
-        invoice_total_amount=float(invoice_total_amount),
-        invoice_remaining_amount=float(invoice_remaining_amount),
-        payment_total_amount=float(payment_total_amount),
-        payment_remaining_amount=float(payment_remaining_amount),
-        item_total_amount=float(item_total_amount),
+        invoice_total_amount=totals.get(INVOICE_AMOUNT, 0.0),
+        invoice_remaining_amount=totals.get(INVOICE_REMAINING, 0.0),
+        payment_total_amount=totals.get(PAYMENT_ORDERED, 0.0),
+        payment_remaining_amount=totals.get(PAYMENT_REMAINING, 0.0),
+        item_total_amount=totals.get(ITEM_LINE_TOTAL, 0.0),
     )
 
 
@@ -63,68 +66,91 @@ def _same_day_last_year(value: date) -> date:
         return value.replace(year=value.year - 1, day=28)
 
 
-@router.get("/overview", response_model=DashboardOverviewResponse)
-def get_dashboard_overview(db: Session = Depends(get_db)) -> DashboardOverviewResponse:
-    today = date.today()
+def _build_overview(db: Session, today: date) -> DashboardOverviewResponse:
     month_start = today.replace(day=1)
     last_year_cutoff = _same_day_last_year(today)
 
-    all_time_sales = db.execute(select(func.coalesce(func.sum(Invoice.invoice_amount), 0.0))).scalar_one() or 0.0
-    receivable_balance = (
-        db.execute(select(func.coalesce(func.sum(Invoice.remaining_amount), 0.0))).scalar_one() or 0.0
-    )
-    payable_balance = (
-        db.execute(select(func.coalesce(func.sum(Payment.remaining_amount), 0.0))).scalar_one() or 0.0
+    totals, _ = read_dashboard_aggregates(db)
+    all_time_sales = totals.get(INVOICE_AMOUNT, 0.0)
+    receivable_balance = totals.get(INVOICE_REMAINING, 0.0)
+    payable_balance = totals.get(PAYMENT_REMAINING, 0.0)
+
+    # One grouped pass over the current and previous year; "to_date" only counts
+    # invoices up to today (this year) or the same day last year.
+    billed_year = extract("year", Invoice.billed_at)
+    billed_month = extract("month", Invoice.billed_at)
+    amount = func.coalesce(Invoice.invoice_amount, 0.0)
+    to_date_amount = case(
+        (
+            or_(
+                Invoice.billed_at <= last_year_cutoff,
+                and_(Invoice.billed_at >= date(today.year, 1, 1), Invoice.billed_at <= today),
+            ),
+            amount,
+        ),
+        else_=0.0,
     )
+    monthly_rows = db.execute(
+        select(billed_year, billed_month, func.sum(amount), func.sum(to_date_amount))
+        .where(Invoice.billed_at >= date(today.year - 1, 1, 1), Invoice.billed_at <= date(today.year, 12, 31))
+        .group_by(billed_year, billed_month)
+    ).all()
 
-    dated_invoices = db.execute(select(Invoice).where(Invoice.billed_at.is_not(None))).scalars().all()
     monthly_buckets = [0.0] * 12
     current_month_sales = 0.0
     ytd_sales = 0.0
     last_year_ytd_sales = 0.0
 
-    for invoice in dated_invoices:
-        billed_at = invoice.billed_at
-        if billed_at is None:
-            continue
-        amount = float(invoice.invoice_amount or 0.0)
-
-        if billed_at.year == today.year:
-            monthly_buckets[billed_at.month - 1] += amount
-            if month_start <= billed_at <= today:
-                current_month_sales += amount
-            if billed_at <= today:
-                ytd_sales += amount
-        elif billed_at.year == today.year - 1 and billed_at <= last_year_cutoff:
-            last_year_ytd_sales += amount
+    for year, month, total, to_date in monthly_rows:
+        year, month = int(year), int(month)
+        if year == today.year:
+            monthly_buckets[month - 1] += float(total or 0.0)
+            ytd_sales += float(to_date or 0.0)
+            if month == month_start.month:
+                current_month_sales += float(to_date or 0.0)
+        else:
+            last_year_ytd_sales += float(to_date or 0.0)
 
     yoy_growth_rate = 0.0
     if last_year_ytd_sales > 0:
         yoy_growth_rate = ((ytd_sales - last_year_ytd_sales) / last_year_ytd_sales) * 100.0
 
-    invoice_by_project_rows = db.execute(
-        select(Invoice.project_id, func.coalesce(func.sum(Invoice.invoice_amount), 0.0)).group_by(Invoice.project_id)
-    ).all()
-    invoice_by_project = {project_id: float(total or 0.0) for project_id, total in invoice_by_project_rows}
-
-    payment_by_project_rows = db.execute(
-        select(Payment.project_id, func.coalesce(func.sum(Payment.ordered_amount), 0.0)).group_by(Payment.project_id)
-    ).all()
-    payment_by_project = {project_id: float(total or 0.0) for project_id, total in payment_by_project_rows}
-
-    active_filter = or_(
-        Project.project_status.is_(None),
-        and_(
-            not_(Project.project_status.like("%完工%")),
-            not_(Project.project_status.like("%失注%")),
-        ),
+    is_active = Project.status_class == PROJECT_STATUS_ACTIVE
+    active_project_count = db.execute(select(func.count(Project.id)).where(is_active)).scalar_one()
+
+    # Pick the newest active projects first, then sum invoices and payments for
+    # those ids only, so the ledger scans never depend on how many projects are active.
+    recent = (
+        select(Project.id, Project.project_id)
+        .where(is_active)
+        .order_by(Project.created_at.desc(), Project.id.desc())
+        .limit(ACTIVE_PROJECT_LIMIT)
+        .cte("recent_active_projects")
+    )
+    invoice_totals = (
+        select(Invoice.project_id, func.sum(Invoice.invoice_amount).label("total"))
+        .where(Invoice.project_id.in_(select(recent.c.project_id)))
+        .group_by(Invoice.project_id)
+        .subquery()
     )
-    active_rows = db.execute(select(Project).where(active_filter).order_by(Project.created_at.desc())).scalars().all()
+    payment_totals = (
+        select(Payment.project_id, func.sum(Payment.ordered_amount).label("total"))
+        .where(Payment.project_id.in_(select(recent.c.project_id)))
+        .group_by(Payment.project_id)
+        .subquery()
+    )
+    active_rows = db.execute(
+        select(Project, invoice_totals.c.total, payment_totals.c.total)
+        .join(recent, recent.c.id == Project.id)
+        .outerjoin(invoice_totals, invoice_totals.c.project_id == Project.project_id)
+        .outerjoin(payment_totals, payment_totals.c.project_id == Project.project_id)
+        .order_by(Project.created_at.desc(), Project.id.desc())
+    ).all()
 
     active_projects = []
-    for project in active_rows:
-        invoice_total_amount = invoice_by_project.get(project.project_id, 0.0)
-        payment_total_amount = payment_by_project.get(project.project_id, 0.0)
+    for project, invoice_total_amount, payment_total_amount in active_rows:
+        invoice_total_amount = float(invoice_total_amount or 0.0)
+        payment_total_amount = float(payment_total_amount or 0.0)
         active_projects.append(
             DashboardActiveProject(
                 project_id=project.project_id,
@@ -152,7 +178,48 @@ def get_dashboard_overview(db: Session = Depends(get_db)) -> DashboardOverviewRe
         yoy_growth_rate=float(yoy_growth_rate),
         receivable_balance=float(receivable_balance),
         payable_balance=float(payable_balance),
-        active_project_count=len(active_projects),
+        active_project_count=int(active_project_count),
         monthly_sales_current_year=monthly_sales_current_year,
-        active_projects=active_projects[:12],
+        active_projects=active_projects,
+    )
+
+
+@router.get("/summary", response_model=DashboardSummaryResponse)
+def get_dashboard_summary(request: Request, db: Session = Depends(get_db)) -> Response:
+    return _cached_response(request, "summary", lambda: _build_summary(db))
+
+
+@router.get("/overview", response_model=DashboardOverviewResponse)
+def get_dashboard_overview(request: Request, db: Session = Depends(get_db)) -> Response:
+    today = date.today()
+    return _cached_response(request, f"overview:{today.isoformat()}", lambda: _build_overview(db, today))
+
+
+def _load_dashboard_snapshot() -> dict[str, dict]:
+    # Shares the response cache, so a burst of subscribers costs one build.
+    db = SessionLocal()
+    try:
+        today = date.today()
+        summary = get_or_build("summary", lambda: _build_summary(db))
+        overview = get_or_build(f"overview:{today.isoformat()}", lambda: _build_overview(db, today))
+        return {"summary": json.loads(summary.body), "overview": json.loads(overview.body)}
+    finally:
+        db.close()
+
+
+dashboard_bus.loader = _load_dashboard_snapshot
+
+
+@router.get("/stream")
+async def stream_dashboard() -> StreamingResponse:
+    """Server-sent events: one ``snapshot`` event, then ``delta`` events with changed fields only."""
+
+    async def _events():
+        async for event in dashboard_bus.subscribe():
+            yield ": keepalive\n\n" if event is None else event.encode()
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
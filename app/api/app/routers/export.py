@@ -0,0 +1,112 @@
+"""Streaming ledger export endpoints."""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from collections.abc import Iterator
+from datetime import date, datetime, time
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.sql import Select
+
+from ..database import SessionLocal
+from ..models import Invoice, Payment, Project, ProjectItem
+from ..security import require_api_key
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+EXPORT_BATCH_ROWS = 1000
+
+ExportResource = Literal["invoices", "payments", "projects", "project-items"]
+ExportFormat = Literal["ndjson", "csv"]
+
+# resource -> (model, sort key, column filtered by date_from / date_to)
+EXPORT_SOURCES = {
+    "invoices": (Invoice, Invoice.invoice_id, Invoice.billed_at),
+    "payments": (Payment, Payment.payment_id, Payment.paid_at),
+    "projects": (Project, Project.project_id, Project.created_at),
+    "project-items": (ProjectItem, ProjectItem.id, ProjectItem.created_at_ts),
+}
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    return _json_value(value)
+
+
+def _stream_rows(stmt: Select, columns: list[str], fmt: ExportFormat) -> Iterator[bytes]:
+    # Dependency-managed sessions are closed before a streaming body is sent.
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_ROWS))
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            # BOM so Excel opens the Japanese headers as UTF-8.
+            yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+            for batch in result.partitions():
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows([_csv_value(value) for value in row] for row in batch)
+                yield buffer.getvalue().encode("utf-8")
+        else:
+            for batch in result.partitions():
+                lines = (
+                    json.dumps(dict(zip(columns, map(_json_value, row))), ensure_ascii=False) + "\n"
+                    for row in batch
+                )
+                yield "".join(lines).encode("utf-8")
+    finally:
+        db.close()
+
+
+@router.get("/{resource}")
+def export_rows(
+    resource: ExportResource,
+    fmt: ExportFormat = Query(default="ndjson", alias="format"),
+    date_from: Optional[date] = Query(default=None),
+    date_to: Optional[date] = Query(default=None),
+    project_id: Optional[str] = Query(default=None),
+    _: None = Depends(require_api_key),
+) -> StreamingResponse:
+    """Stream every matching row in id order with constant memory.
+
+    ``date_from`` / ``date_to`` are inclusive and filter ``billed_at`` (invoices),
+    ``paid_at`` (payments) or the creation date (projects, project items).
+    """
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=422, detail="date_from must not be after date_to")
+
+    model, key, date_column = EXPORT_SOURCES[resource]
+    table_columns = list(model.__table__.columns)
+    stmt = select(*table_columns).order_by(key.asc())
+    # created_at_ts is a timestamp, so the bounds cover whole days.
+    is_timestamp = date_column.type.python_type is datetime
+    if date_from:
+        stmt = stmt.where(date_column >= (datetime.combine(date_from, time.min) if is_timestamp else date_from))
+    if date_to:
+        stmt = stmt.where(date_column <= (datetime.combine(date_to, time.max) if is_timestamp else date_to))
+    if project_id:
+        stmt = stmt.where(model.project_id == project_id)
+
+    columns = [column.name for column in table_columns]
+    media_type = "text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson"
+    filename = f"{resource}_{date.today():%Y%m%d}.{'csv' if fmt == 'csv' else 'ndjson'}"
+    return StreamingResponse(
+        _stream_rows(stmt, columns, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
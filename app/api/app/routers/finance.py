@@ -2,25 +2,50 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable
 from datetime import date
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from ..database import get_db
 from ..models import Invoice, Payment, Project
 from ..schemas import (
+    InvoiceBulkCreate,
+    InvoiceBulkResponse,
+    InvoiceBulkResult,
+    InvoiceBulkUpdate,
     InvoiceCreate,
     InvoiceRead,
     InvoiceUpdate,
+    PaymentBulkCreate,
+    PaymentBulkResponse,
+    PaymentBulkResult,
+    PaymentBulkUpdate,
     PaymentCreate,
     PaymentRead,
     PaymentUpdate,
 )
 from ..security import require_api_key
-from ..services.id_generator import get_next_invoice_id, get_next_payment_id
+from ..services.dashboard_aggregates import (
+    INVOICE_AMOUNT,
+    INVOICE_REMAINING,
+    PAYMENT_ORDERED,
+    PAYMENT_REMAINING,
+    adjust_aggregates,
+)
+from ..services.dashboard_events import publish_dashboard_change
+from ..services.id_generator import (
+    advance_id_sequences,
+    allocate_id_numbers,
+    format_id,
+    get_next_invoice_id,
+    get_next_payment_id,
+)
+from ..services.pagination import count_rows, keyset_page, set_page_headers
+from ..services.project_rollups import adjust_project_rollups, merge_rollup_deltas, rollup_deltas
 
 router = APIRouter(tags=["finance"])
 
@@ -77,19 +102,220 @@ def _payment_to_read(row: Payment) -> PaymentRead:
     )
 
 
+def _invoice_create_error(payload: InvoiceCreate) -> Optional[str]:
+    if payload.paid_amount > payload.invoice_amount:
+        return "paid_amount cannot exceed invoice_amount"
+    return None
+
+
+def _payment_create_error(payload: PaymentCreate) -> Optional[str]:
+    if payload.paid_amount > payload.ordered_amount:
+        return "paid_amount cannot exceed ordered_amount"
+    return None
+
+
+def _invoice_values(payload: InvoiceCreate, invoice_id: str) -> dict:
+    return {
+        "invoice_id": invoice_id,
+        "project_id": payload.project_id,
+        "invoice_amount": payload.invoice_amount,
+        "invoice_type": payload.invoice_type,
+        "billed_at": payload.billed_at or date.today(),
+        "paid_amount": payload.paid_amount,
+        "remaining_amount": max(payload.invoice_amount - payload.paid_amount, 0.0),
+        "status": payload.status or _derive_invoice_status(payload.invoice_amount, payload.paid_amount),
+        "note": payload.note,
+    }
+
+
+def _payment_values(payload: PaymentCreate, payment_id: str) -> dict:
+    return {
+        "payment_id": payment_id,
+        "project_id": payload.project_id,
+        "vendor_id": payload.vendor_id,
+        "vendor_name": payload.vendor_name,
+        "work_description": payload.work_description,
+        "ordered_amount": payload.ordered_amount,
+        "paid_amount": payload.paid_amount,
+        "remaining_amount": max(payload.ordered_amount - payload.paid_amount, 0.0),
+        "status": payload.status or _derive_payment_status(payload.ordered_amount, payload.paid_amount),
+        "note": payload.note,
+        "paid_at": payload.paid_at,
+    }
+
+
+def _invoice_amounts(values: dict) -> dict[str, float]:
+    return {INVOICE_AMOUNT: values["invoice_amount"], INVOICE_REMAINING: values["remaining_amount"]}
+
+
+def _payment_amounts(values: dict) -> dict[str, float]:
+    return {PAYMENT_ORDERED: values["ordered_amount"], PAYMENT_REMAINING: values["remaining_amount"]}
+
+
+def _apply_invoice_update(invoice: Invoice, payload: InvoiceUpdate) -> dict[str, float]:
+    """Apply a partial update and return the dashboard deltas; raises ValueError when invalid."""
+    next_invoice_amount = payload.invoice_amount if payload.invoice_amount is not None else invoice.invoice_amount
+    next_paid_amount = payload.paid_amount if payload.paid_amount is not None else invoice.paid_amount
+    if next_paid_amount > next_invoice_amount:
+        raise ValueError("paid_amount cannot exceed invoice_amount")
+
+    previous_amount, previous_remaining = invoice.invoice_amount, invoice.remaining_amount
+    if payload.invoice_amount is not None:
+        invoice.invoice_amount = payload.invoice_amount
+    if payload.paid_amount is not None:
+        invoice.paid_amount = payload.paid_amount
+    if payload.billed_at is not None:
+        invoice.billed_at = payload.billed_at
+    if payload.note is not None:
+        invoice.note = payload.note
+
+    invoice.remaining_amount = max(invoice.invoice_amount - invoice.paid_amount, 0.0)
+    invoice.status = payload.status or _derive_invoice_status(invoice.invoice_amount, invoice.paid_amount)
+    return {
+        INVOICE_AMOUNT: invoice.invoice_amount - previous_amount,
+        INVOICE_REMAINING: invoice.remaining_amount - previous_remaining,
+    }
+
+
+def _apply_payment_update(payment: Payment, payload: PaymentUpdate) -> dict[str, float]:
+    """Apply a partial update and return the dashboard deltas; raises ValueError when invalid."""
+    next_ordered_amount = payload.ordered_amount if payload.ordered_amount is not None else payment.ordered_amount
+    next_paid_amount = payload.paid_amount if payload.paid_amount is not None else payment.paid_amount
+    if next_paid_amount > next_ordered_amount:
+        raise ValueError("paid_amount cannot exceed ordered_amount")
+
+    previous_ordered, previous_remaining = payment.ordered_amount, payment.remaining_amount
+    if payload.ordered_amount is not None:
+        payment.ordered_amount = payload.ordered_amount
+    if payload.paid_amount is not None:
+        payment.paid_amount = payload.paid_amount
+    if payload.paid_at is not None:
+        payment.paid_at = payload.paid_at
+    if payload.note is not None:
+        payment.note = payload.note
+    if payload.vendor_name is not None:
+        payment.vendor_name = payload.vendor_name
+    if payload.work_description is not None:
+        payment.work_description = payload.work_description
+
+    payment.remaining_amount = max(payment.ordered_amount - payment.paid_amount, 0.0)
+    payment.status = payload.status or _derive_payment_status(payment.ordered_amount, payment.paid_amount)
+    return {
+        PAYMENT_ORDERED: payment.ordered_amount - previous_ordered,
+        PAYMENT_REMAINING: payment.remaining_amount - previous_remaining,
+    }
+
+
+def _adjust_totals(db: Session, deltas: list[tuple[str, dict[str, float]]]) -> None:
+    """Add per-row (project_id, metric deltas) to the dashboard totals and the project rollups."""
+    totals: dict[str, float] = {}
+    for _, delta in deltas:
+        for metric, value in delta.items():
+            totals[metric] = totals.get(metric, 0.0) + value
+    adjust_aggregates(db, totals)
+    adjust_project_rollups(db, merge_rollup_deltas(rollup_deltas(project_id, delta) for project_id, delta in deltas))
+
+
+# (status_code, row id, error detail, inserted values)
+BulkCreateOutcome = tuple[int, Optional[str], Optional[str], Optional[dict]]
+
+
+def _bulk_create_rows(
+    db: Session,
+    payloads: list,
+    model: type,
+    id_field: str,
+    prefix: str,
+    label: str,
+    validate: Callable[[object], Optional[str]],
+    build: Callable[[object, str], dict],
+) -> list[BulkCreateOutcome]:
+    """Validate every payload with set-based lookups, then insert the valid rows in one executemany.
+
+    Does not commit; rejected rows are reported with the status code the single-row endpoint would use.
+    """
+    id_column = getattr(model, id_field)
+    project_ids = {payload.project_id for payload in payloads}
+    known_projects = set(db.execute(select(Project.project_id).where(Project.project_id.in_(project_ids))).scalars())
+    explicit_ids = [(getattr(payload, id_field) or "").strip() for payload in payloads]
+    taken = set(db.execute(select(id_column).where(id_column.in_({x for x in explicit_ids if x}))).scalars())
+
+    outcomes: list[Optional[BulkCreateOutcome]] = [None] * len(payloads)
+    accepted: list[int] = []
+    for index, (payload, explicit_id) in enumerate(zip(payloads, explicit_ids)):
+        if payload.project_id not in known_projects:
+            outcomes[index] = (404, explicit_id or None, "Project not found", None)
+        elif (error := validate(payload)) is not None:
+            outcomes[index] = (422, explicit_id or None, error, None)
+        elif explicit_id and explicit_id in taken:
+            outcomes[index] = (409, explicit_id, f"{label} ID already exists", None)
+        else:
+            if explicit_id:
+                taken.add(explicit_id)
+            accepted.append(index)
+
+    # Explicit ids first, so the freshly allocated block starts above them.
+    advance_id_sequences(db, [explicit_ids[index] for index in accepted if explicit_ids[index]])
+    auto_count = sum(1 for index in accepted if not explicit_ids[index])
+    numbers = iter(allocate_id_numbers(db, prefix, auto_count) if auto_count else ())
+
+    rows = []
+    for index in accepted:
+        row_id = explicit_ids[index] or format_id(prefix, next(numbers))
+        values = build(payloads[index], row_id)
+        rows.append(values)
+        outcomes[index] = (status.HTTP_201_CREATED, row_id, None, values)
+    if rows:
+        db.execute(insert(model), rows)
+    return outcomes
+
+
+def _bulk_update_rows(
+    db: Session,
+    items: list,
+    model: type,
+    id_field: str,
+    label: str,
+    apply: Callable[[object, object], dict[str, float]],
+) -> tuple[list[tuple[int, str, Optional[str], Optional[object]]], list[tuple[str, dict[str, float]]]]:
+    """Load every target with one IN query and apply updates in memory; flushed by the caller's commit."""
+    id_column = getattr(model, id_field)
+    ids = {getattr(item, id_field) for item in items}
+    current = {getattr(row, id_field): row for row in db.execute(select(model).where(id_column.in_(ids))).scalars()}
+
+    outcomes = []
+    deltas = []
+    for item in items:
+        row_id = getattr(item, id_field)
+        row = current.get(row_id)
+        if row is None:
+            outcomes.append((404, row_id, f"{label} not found", None))
+            continue
+        try:
+            deltas.append((row.project_id, apply(row, item)))
+        except ValueError as exc:
+            outcomes.append((422, row_id, str(exc), None))
+            continue
+        outcomes.append((status.HTTP_200_OK, row_id, None, row))
+    return outcomes, deltas
+
+
 @router.get("/invoices", response_model=list[InvoiceRead])
 def list_invoices(
+    response: Response,
     project_id: Optional[str] = Query(default=None),
+    after: Optional[str] = Query(default=None, description="Return invoices after this invoice_id"),
     offset: int = Query(default=0, ge=0),
     limit: int = Query(default=100, ge=1, le=500),
+    estimate_total: bool = Query(default=False),
     db: Session = Depends(get_db),
 ) -> list[InvoiceRead]:
     stmt = select(Invoice)
     if project_id:
         stmt = stmt.where(Invoice.project_id == project_id)
-    stmt = stmt.order_by(Invoice.invoice_id.asc()).offset(offset).limit(limit)
 
-    rows = db.execute(stmt).scalars().all()
+    rows, next_cursor = keyset_page(db, stmt, Invoice.invoice_id, after, limit, offset)
+    set_page_headers(response, count_rows(db, stmt, estimate=estimate_total), next_cursor)
     return [_invoice_to_read(row) for row in rows]
 
 
@@ -103,35 +329,92 @@ def create_invoice(
     if project is None:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    if payload.paid_amount > payload.invoice_amount:
-        raise HTTPException(status_code=422, detail="paid_amount cannot exceed invoice_amount")
+    error = _invoice_create_error(payload)
+    if error:
+        raise HTTPException(status_code=422, detail=error)
 
-    invoice_id = (payload.invoice_id or "").strip() or get_next_invoice_id(db)
+    invoice_id = (payload.invoice_id or "").strip()
+    if invoice_id:
+        advance_id_sequences(db, [invoice_id])
+    else:
+        invoice_id = get_next_invoice_id(db)
 
     existing = db.execute(select(Invoice).where(Invoice.invoice_id == invoice_id)).scalar_one_or_none()
     if existing is not None:
         raise HTTPException(status_code=409, detail="Invoice ID already exists")
 
-    remaining = max(payload.invoice_amount - payload.paid_amount, 0.0)
-
-    invoice = Invoice(
-        invoice_id=invoice_id,
-        project_id=payload.project_id,
-        invoice_amount=payload.invoice_amount,
-        invoice_type=payload.invoice_type,
-        billed_at=payload.billed_at or date.today(),
-        paid_amount=payload.paid_amount,
-        remaining_amount=remaining,
-        status=payload.status or _derive_invoice_status(payload.invoice_amount, payload.paid_amount),
-        note=payload.note,
-    )
+    values = _invoice_values(payload, invoice_id)
+    invoice = Invoice(**values)
     db.add(invoice)
+    _adjust_totals(db, [(invoice.project_id, _invoice_amounts(values))])
     db.commit()
+    publish_dashboard_change()
     db.refresh(invoice)
 
     return _invoice_to_read(invoice)
 
 
+@router.post("/invoices/bulk", response_model=InvoiceBulkResponse)
+def create_invoices_bulk(
+    payload: InvoiceBulkCreate,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_api_key),
+) -> InvoiceBulkResponse:
+    outcomes = _bulk_create_rows(
+        db,
+        payload.items,
+        Invoice,
+        "invoice_id",
+        "INV",
+        "Invoice",
+        _invoice_create_error,
+        _invoice_values,
+    )
+    created = [values for *_, values in outcomes if values is not None]
+    _adjust_totals(db, [(values["project_id"], _invoice_amounts(values)) for values in created])
+    db.commit()
+    if created:
+        publish_dashboard_change()
+
+    results = [
+        InvoiceBulkResult(
+            index=index,
+            status_code=code,
+            invoice_id=invoice_id,
+            detail=detail,
+            invoice=InvoiceRead(**values) if values is not None else None,
+        )
+        for index, (code, invoice_id, detail, values) in enumerate(outcomes)
+    ]
+    return InvoiceBulkResponse(succeeded=len(created), failed=len(results) - len(created), results=results)
+
+
+@router.patch("/invoices/bulk", response_model=InvoiceBulkResponse)
+def update_invoices_bulk(
+    payload: InvoiceBulkUpdate,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_api_key),
+) -> InvoiceBulkResponse:
+    outcomes, deltas = _bulk_update_rows(db, payload.items, Invoice, "invoice_id", "Invoice", _apply_invoice_update)
+    # Read models are built before commit so expired rows are not reloaded one by one.
+    results = [
+        InvoiceBulkResult(
+            index=index,
+            status_code=code,
+            invoice_id=invoice_id,
+            detail=detail,
+            invoice=_invoice_to_read(row) if row is not None else None,
+        )
+        for index, (code, invoice_id, detail, row) in enumerate(outcomes)
+    ]
+    _adjust_totals(db, deltas)
+    db.commit()
+    succeeded = sum(1 for result in results if result.invoice is not None)
+    if succeeded:
+        publish_dashboard_change()
+    return InvoiceBulkResponse(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+
 @router.patch("/invoices/{invoice_id}", response_model=InvoiceRead)
 def update_invoice(
     invoice_id: str,
@@ -143,41 +426,34 @@ def update_invoice(
     if invoice is None:
         raise HTTPException(status_code=404, detail="Invoice not found")
 
-    next_invoice_amount = payload.invoice_amount if payload.invoice_amount is not None else invoice.invoice_amount
-    next_paid_amount = payload.paid_amount if payload.paid_amount is not None else invoice.paid_amount
-    if next_paid_amount > next_invoice_amount:
-        raise HTTPException(status_code=422, detail="paid_amount cannot exceed invoice_amount")
-
-    if payload.invoice_amount is not None:
-        invoice.invoice_amount = payload.invoice_amount
-    if payload.paid_amount is not None:
-        invoice.paid_amount = payload.paid_amount
-    if payload.billed_at is not None:
-        invoice.billed_at = payload.billed_at
-    if payload.note is not None:
-        invoice.note = payload.note
-
-    invoice.remaining_amount = max(invoice.invoice_amount - invoice.paid_amount, 0.0)
-    invoice.status = payload.status or _derive_invoice_status(invoice.invoice_amount, invoice.paid_amount)
+    try:
+        deltas = _apply_invoice_update(invoice, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    _adjust_totals(db, [(invoice.project_id, deltas)])
 
     db.commit()
+    publish_dashboard_change()
     db.refresh(invoice)
     return _invoice_to_read(invoice)
 
 
 @router.get("/payments", response_model=list[PaymentRead])
 def list_payments(
+    response: Response,
     project_id: Optional[str] = Query(default=None),
+    after: Optional[str] = Query(default=None, description="Return payments after this payment_id"),
     offset: int = Query(default=0, ge=0),
     limit: int = Query(default=100, ge=1, le=500),
+    estimate_total: bool = Query(default=False),
     db: Session = Depends(get_db),
 ) -> list[PaymentRead]:
     stmt = select(Payment)
     if project_id:
         stmt = stmt.where(Payment.project_id == project_id)
-    stmt = stmt.order_by(Payment.payment_id.asc()).offset(offset).limit(limit)
 
-    rows = db.execute(stmt).scalars().all()
+    rows, next_cursor = keyset_page(db, stmt, Payment.payment_id, after, limit, offset)
+    set_page_headers(response, count_rows(db, stmt, estimate=estimate_total), next_cursor)
     return [_payment_to_read(row) for row in rows]
 
 
@@ -191,37 +467,92 @@ def create_payment(
     if project is None:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    if payload.paid_amount > payload.ordered_amount:
-        raise HTTPException(status_code=422, detail="paid_amount cannot exceed ordered_amount")
+    error = _payment_create_error(payload)
+    if error:
+        raise HTTPException(status_code=422, detail=error)
 
-    payment_id = (payload.payment_id or "").strip() or get_next_payment_id(db)
+    payment_id = (payload.payment_id or "").strip()
+    if payment_id:
+        advance_id_sequences(db, [payment_id])
+    else:
+        payment_id = get_next_payment_id(db)
 
     existing = db.execute(select(Payment).where(Payment.payment_id == payment_id)).scalar_one_or_none()
     if existing is not None:
         raise HTTPException(status_code=409, detail="Payment ID already exists")
 
-    remaining = max(payload.ordered_amount - payload.paid_amount, 0.0)
-
-    payment = Payment(
-        payment_id=payment_id,
-        project_id=payload.project_id,
-        vendor_id=payload.vendor_id,
-        vendor_name=payload.vendor_name,
-        work_description=payload.work_description,
-        ordered_amount=payload.ordered_amount,
-        paid_amount=payload.paid_amount,
-        remaining_amount=remaining,
-        status=payload.status or _derive_payment_status(payload.ordered_amount, payload.paid_amount),
-        note=payload.note,
-        paid_at=payload.paid_at,
-    )
+    values = _payment_values(payload, payment_id)
+    payment = Payment(**values)
     db.add(payment)
+    _adjust_totals(db, [(payment.project_id, _payment_amounts(values))])
     db.commit()
+    publish_dashboard_change()
     db.refresh(payment)
 
     return _payment_to_read(payment)
 
 
+@router.post("/payments/bulk", response_model=PaymentBulkResponse)
+def create_payments_bulk(
+    payload: PaymentBulkCreate,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_api_key),
+) -> PaymentBulkResponse:
+    outcomes = _bulk_create_rows(
+        db,
+        payload.items,
+        Payment,
+        "payment_id",
+        "PAY",
+        "Payment",
+        _payment_create_error,
+        _payment_values,
+    )
+    created = [values for *_, values in outcomes if values is not None]
+    _adjust_totals(db, [(values["project_id"], _payment_amounts(values)) for values in created])
+    db.commit()
+    if created:
+        publish_dashboard_change()
+
+    results = [
+        PaymentBulkResult(
+            index=index,
+            status_code=code,
+            payment_id=payment_id,
+            detail=detail,
+            payment=PaymentRead(**values) if values is not None else None,
+        )
+        for index, (code, payment_id, detail, values) in enumerate(outcomes)
+    ]
+    return PaymentBulkResponse(succeeded=len(created), failed=len(results) - len(created), results=results)
+
+
+@router.patch("/payments/bulk", response_model=PaymentBulkResponse)
+def update_payments_bulk(
+    payload: PaymentBulkUpdate,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_api_key),
+) -> PaymentBulkResponse:
+    outcomes, deltas = _bulk_update_rows(db, payload.items, Payment, "payment_id", "Payment", _apply_payment_update)
+    # Read models are built before commit so expired rows are not reloaded one by one.
+    results = [
+        PaymentBulkResult(
+            index=index,
+            status_code=code,
+            payment_id=payment_id,
+            detail=detail,
+            payment=_payment_to_read(row) if row is not None else None,
+        )
+        for index, (code, payment_id, detail, row) in enumerate(outcomes)
+    ]
+    _adjust_totals(db, deltas)
+    db.commit()
+    succeeded = sum(1 for result in results if result.payment is not None)
+    if succeeded:
+        publish_dashboard_change()
+    return PaymentBulkResponse(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+
 @router.patch("/payments/{payment_id}", response_model=PaymentRead)
 def update_payment(
     payment_id: str,
@@ -233,27 +564,13 @@ def update_payment(
     if payment is None:
         raise HTTPException(status_code=404, detail="Payment not found")
 
-    next_ordered_amount = payload.ordered_amount if payload.ordered_amount is not None else payment.ordered_amount
-    next_paid_amount = payload.paid_amount if payload.paid_amount is not None else payment.paid_amount
-    if next_paid_amount > next_ordered_amount:
-        raise HTTPException(status_code=422, detail="paid_amount cannot exceed ordered_amount")
-
-    if payload.ordered_amount is not None:
-        payment.ordered_amount = payload.ordered_amount
-    if payload.paid_amount is not None:
-        payment.paid_amount = payload.paid_amount
-    if payload.paid_at is not None:
-        payment.paid_at = payload.paid_at
-    if payload.note is not None:
-        payment.note = payload.note
-    if payload.vendor_name is not None:
-        payment.vendor_name = payload.vendor_name
-    if payload.work_description is not None:
-        payment.work_description = payload.work_description
-
-    payment.remaining_amount = max(payment.ordered_amount - payment.paid_amount, 0.0)
-    payment.status = payload.status or _derive_payment_status(payment.ordered_amount, payment.paid_amount)
+    try:
+        deltas = _apply_payment_update(payment, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    _adjust_totals(db, [(payment.project_id, deltas)])
 
     db.commit()
+    publish_dashboard_change()
     db.refresh(payment)
     return _payment_to_read(payment)
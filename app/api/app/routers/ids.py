@@ -0,0 +1,29 @@
+"""ID reservation endpoints for bulk creators."""
+
+from __future__ import annotations
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..schemas import IdReservationResponse
+from ..security import require_api_key
+from ..services.id_generator import reserve_ids
+
+router = APIRouter(prefix="/ids", tags=["ids"])
+
+MAX_RESERVATION = 5000
+
+
+@router.post("/reserve", response_model=IdReservationResponse)
+def reserve_id_block(
+    prefix: Literal["P", "INV", "PAY"] = Query(...),
+    count: int = Query(default=1, ge=1, le=MAX_RESERVATION),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_api_key),
+) -> IdReservationResponse:
+    ids = reserve_ids(db, prefix, count)
+    db.commit()
+    return IdReservationResponse(prefix=prefix, count=len(ids), first_id=ids[0], last_id=ids[-1], ids=ids)
@@ -11,9 +11,13 @@ from sqlalchemy.orm import Session
 
 from ..database import get_db
 from ..models import Customer, Project
-from ..schemas import ProjectCreate, ProjectListResponse, ProjectRead
+from ..schemas import ROLLUP_MAX_PROJECTS, ProjectCreate, ProjectListResponse, ProjectRead, ProjectRollupRead
 from ..security import require_api_key
+from ..services.dashboard_aggregates import count_project_status
+from ..services.dashboard_events import publish_dashboard_change
 from ..services.id_generator import get_next_project_id
+from ..services.pagination import count_rows, keyset_page
+from ..services.project_rollups import read_project_rollups
 from ..services.sanitize import build_unique_sheet_name, sanitize_sheet_name
 
 router = APIRouter(prefix="/projects", tags=["projects"])
@@ -72,7 +76,9 @@ def create_project(
         created_at=date.today(),
     )
     db.add(project)
+    count_project_status(db, project.project_status)
     db.commit()
+    publish_dashboard_change()
     db.refresh(project)
 
     return _to_project_read(project)
@@ -82,8 +88,10 @@ def create_project(
 def list_projects(
     status_filter: Optional[str] = Query(default=None, alias="status"),
     customer_id: Optional[str] = Query(default=None),
+    after: Optional[str] = Query(default=None, description="Return projects after this project_id"),
     offset: int = Query(default=0, ge=0),
     limit: int = Query(default=100, ge=1, le=500),
+    estimate_total: bool = Query(default=False),
     db: Session = Depends(get_db),
 ) -> ProjectListResponse:
     stmt = select(Project)
@@ -91,11 +99,29 @@ def list_projects(
         stmt = stmt.where(Project.project_status == status_filter)
     if customer_id:
         stmt = stmt.where(Project.customer_id == customer_id)
-    stmt = stmt.order_by(Project.project_id.asc()).offset(offset).limit(limit)
 
-    rows = db.execute(stmt).scalars().all()
+    rows, next_cursor = keyset_page(db, stmt, Project.project_id, after, limit, offset)
+    total = count_rows(db, stmt, estimate=estimate_total)
     items = [_to_project_read(row) for row in rows]
-    return ProjectListResponse(items=items, total=len(items))
+    return ProjectListResponse(items=items, total=total, next_cursor=next_cursor)
+
+
+@router.get("/rollups", response_model=list[ProjectRollupRead])
+def list_project_rollups(
+    project_ids: list[str] = Query(..., alias="project_id", min_length=1, max_length=ROLLUP_MAX_PROJECTS),
+    db: Session = Depends(get_db),
+) -> list[ProjectRollupRead]:
+    """Rollups for several projects in request order; unknown project ids are left out."""
+    rollups = read_project_rollups(db, project_ids)
+    return [rollups[project_id] for project_id in dict.fromkeys(project_ids) if project_id in rollups]
+
+
+@router.get("/{project_id}/rollup", response_model=ProjectRollupRead)
+def get_project_rollup(project_id: str, db: Session = Depends(get_db)) -> ProjectRollupRead:
+    rollup = read_project_rollups(db, [project_id]).get(project_id)
+    if rollup is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return rollup
 
 
 @router.get("/{project_id}", response_model=ProjectRead)
@@ -2,13 +2,18 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
 import os
+from collections.abc import Iterator
 from pathlib import Path
 from tempfile import NamedTemporaryFile
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi import File as FastAPIFile
-from fastapi import UploadFile, status
+from fastapi import Query, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from ..config import (
@@ -17,10 +22,28 @@ from ..config import (
     MAX_UPLOAD_BYTES,
     WORKBOOK_BASE_DIR,
 )
-from ..database import get_db
-from ..schemas import ExcelSyncRequest, ExcelSyncResponse
+from ..database import SessionLocal, get_db
+from ..schemas import (
+    EstimateTemplateImportResponse,
+    ExcelSheetSyncStats,
+    ExcelSyncRequest,
+    ExcelSyncResponse,
+    SyncJobRead,
+)
 from ..security import require_api_key
-from ..services.excel_sync import SyncResult, sync_from_workbook
+from ..services.estimate_templates import import_estimate_templates
+from ..services.excel_sync import (
+    SheetSyncStats,
+    SyncResult,
+    diff_workbook,
+)
+from ..services.sync_jobs import (
+    SYNC_LOCK,
+    SyncJob,
+    get_sync_job,
+    run_sync_serialised,
+    submit_sync_job,
+)
 
 router = APIRouter(prefix="/sync", tags=["sync"])
 
@@ -33,9 +56,84 @@ def _to_sync_response(result: SyncResult) -> ExcelSyncResponse:
         invoices_upserted=result.invoices_upserted,
         payments_upserted=result.payments_upserted,
         work_items_upserted=result.work_items_upserted,
+        cached=result.cached,
+        sheet_timings=result.sheet_timings,
+        rows_inserted=result.total("inserted"),
+        rows_updated=result.total("updated"),
+        rows_unchanged=result.total("unchanged"),
+        rows_deleted=result.total("deleted"),
+        sheet_stats=_to_sheet_stats(result.sheet_stats),
+    )
+
+
+def _to_sheet_stats(sheet_stats: dict[str, SheetSyncStats]) -> dict[str, ExcelSheetSyncStats]:
+    return {
+        sheet_name: ExcelSheetSyncStats(
+            rows=stats.rows,
+            inserted=stats.inserted,
+            updated=stats.updated,
+            unchanged=stats.unchanged,
+            deleted=stats.deleted,
+            resumed=stats.resumed,
+            skipped=stats.skipped,
+        )
+        for sheet_name, stats in sheet_stats.items()
+    }
+
+
+def _to_job_read(job: SyncJob) -> SyncJobRead:
+    return SyncJobRead(
+        job_id=job.job_id,
+        status=job.status,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        duration_seconds=job.duration_seconds,
+        current_sheet=job.current_sheet,
+        rows_processed=sum(stats.rows for stats in job.sheet_stats.values()),
+        sheet_stats=_to_sheet_stats(job.sheet_stats),
+        result=_to_sync_response(job.result) if job.result else None,
+        error=job.error,
     )
 
 
+def _ndjson_line(payload: dict) -> bytes:
+    return (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _iter_diff_lines(workbook_path: str, remove_after: bool) -> Iterator[bytes]:
+    """NDJSON: one line per new/changed/removed row, a summary per sheet, then totals."""
+    # Dependency-managed sessions are closed before a streaming body is sent.
+    db = SessionLocal()
+    try:
+        totals = {"new": 0, "changed": 0, "unchanged": 0, "removed": 0}
+        for sheet in diff_workbook(db, workbook_path):
+            for change in sheet.changes:
+                line = {"type": "row", "sheet": sheet.sheet_name, "key": change.key, "change": change.change}
+                if change.fields:
+                    line["fields"] = change.fields
+                yield _ndjson_line(line)
+            summary = {
+                "new": sheet.new,
+                "changed": sheet.changed,
+                "unchanged": sheet.unchanged,
+                "removed": sheet.removed,
+            }
+            for name, count in summary.items():
+                totals[name] += count
+            yield _ndjson_line({"type": "sheet", "sheet": sheet.sheet_name, **summary})
+        yield _ndjson_line({"type": "summary", **totals})
+    finally:
+        db.close()
+        if remove_after and os.path.exists(workbook_path):
+            os.unlink(workbook_path)
+
+
+def _diff_response(workbook_path: str, remove_after: bool = False) -> StreamingResponse:
+    """Stream the dry-run diff; ``remove_after`` hands ownership of ``workbook_path`` to the stream."""
+    return StreamingResponse(_iter_diff_lines(workbook_path, remove_after), media_type="application/x-ndjson")
+
+
 def _resolve_sync_source_path(requested_path: str | None) -> str:
     if not requested_path:
         return EXCEL_SOURCE_PATH
@@ -58,27 +156,46 @@ def _resolve_sync_source_path(requested_path: str | None) -> str:
     return source.as_posix()
 
 
-@router.post("/excel", response_model=ExcelSyncResponse)
+@router.post("/excel", response_model=ExcelSyncResponse | SyncJobRead)
 def sync_excel(
     payload: ExcelSyncRequest,
+    response: Response,
+    background: bool = Query(default=False),
+    dry_run: bool = Query(default=False),
     db: Session = Depends(get_db),
     _: None = Depends(require_api_key),
-) -> ExcelSyncResponse:
+) -> ExcelSyncResponse | SyncJobRead | StreamingResponse:
     workbook_path = _resolve_sync_source_path(payload.workbook_path)
+
+    if dry_run:
+        if not Path(workbook_path).exists():
+            raise HTTPException(status_code=404, detail=f"Workbook not found: {workbook_path}")
+        return _diff_response(workbook_path)
+
+    if background:
+        if not Path(workbook_path).exists():
+            raise HTTPException(status_code=404, detail=f"Workbook not found: {workbook_path}")
+        response.status_code = status.HTTP_202_ACCEPTED
+        return _to_job_read(submit_sync_job(workbook_path, full_resync=payload.full_resync))
+
     try:
-        result = sync_from_workbook(db, workbook_path=workbook_path)
+        result = run_sync_serialised(workbook_path, db, full_resync=payload.full_resync)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
 
     return _to_sync_response(result)
 
 
-@router.post("/excel/upload", response_model=ExcelSyncResponse)
+@router.post("/excel/upload", response_model=ExcelSyncResponse | SyncJobRead)
 async def sync_excel_upload(
+    response: Response,
     file: UploadFile = FastAPIFile(...),
+    full_resync: bool = Query(default=False),
+    background: bool = Query(default=False),
+    dry_run: bool = Query(default=False),
     db: Session = Depends(get_db),
     _: None = Depends(require_api_key),
-) -> ExcelSyncResponse:
+) -> ExcelSyncResponse | SyncJobRead | StreamingResponse:
     suffix = Path(file.filename or "upload.xlsx").suffix.lower()
     if suffix not in {".xlsx", ".xlsm", ".xltx", ".xltm"}:
         raise HTTPException(
@@ -88,6 +205,7 @@ async def sync_excel_upload(
 
     temp_path = ""
     bytes_written = 0
+    digest = hashlib.sha256()
     try:
         with NamedTemporaryFile(delete=False, suffix=suffix) as temp:
             temp_path = temp.name
@@ -101,14 +219,71 @@ async def sync_excel_upload(
                         status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                         detail=f"Uploaded file too large. Max bytes: {MAX_UPLOAD_BYTES}",
                     )
+                digest.update(chunk)
                 temp.write(chunk)
 
         if bytes_written == 0:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Uploaded file is empty")
 
-        result = sync_from_workbook(db, workbook_path=temp_path)
+        if dry_run:
+            diff_stream = _diff_response(temp_path, remove_after=True)
+            temp_path = ""  # the stream now owns the temp file
+            return diff_stream
+
+        content_sha256 = digest.hexdigest()
+
+        if background:
+            response.status_code = status.HTTP_202_ACCEPTED
+            job = submit_sync_job(
+                temp_path,
+                full_resync=full_resync,
+                content_sha256=content_sha256,
+                remove_after=True,
+            )
+            temp_path = ""  # the job now owns the temp file
+            return _to_job_read(job)
+
+        result = await run_in_threadpool(
+            run_sync_serialised,
+            temp_path,
+            db,
+            full_resync=full_resync,
+            content_sha256=content_sha256,
+        )
         return _to_sync_response(result)
     finally:
         await file.close()
         if temp_path and os.path.exists(temp_path):
             os.unlink(temp_path)
+
+
+@router.post("/templates", response_model=EstimateTemplateImportResponse)
+def sync_estimate_templates(
+    payload: ExcelSyncRequest,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_api_key),
+) -> EstimateTemplateImportResponse:
+    """Import 案件テンプレート and the trade sheets as estimate templates."""
+    workbook_path = _resolve_sync_source_path(payload.workbook_path)
+    try:
+        # Shares the sync lock: both may insert work item master rows.
+        with SYNC_LOCK:
+            result = import_estimate_templates(db, workbook_path)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+    return EstimateTemplateImportResponse(
+        workbook_path=workbook_path,
+        templates=result.templates,
+        items=result.items,
+        masters_created=result.masters_created,
+        removed=result.removed,
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=SyncJobRead)
+def get_sync_job_status(job_id: str, _: None = Depends(require_api_key)) -> SyncJobRead:
+    job = get_sync_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return _to_job_read(job)
@@ -0,0 +1,106 @@
+"""Estimate template endpoints."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..models import EstimateTemplate, EstimateTemplateItem, Project, WorkItemMaster
+from ..schemas import (
+    EstimateTemplateDetail,
+    EstimateTemplateItemRead,
+    EstimateTemplateRead,
+    TemplateInstantiateResponse,
+)
+from ..security import require_api_key
+from ..services.dashboard_aggregates import ITEM_LINE_TOTAL, adjust_aggregates
+from ..services.dashboard_events import publish_dashboard_change
+from ..services.estimate_templates import instantiate_template
+from ..services.project_rollups import adjust_project_rollups
+
+router = APIRouter(tags=["templates"])
+
+
+def _to_template_read(template: EstimateTemplate, item_count: int) -> EstimateTemplateRead:
+    return EstimateTemplateRead(
+        id=template.id,
+        name=template.name,
+        category=template.category,
+        source_sheet=template.source_sheet,
+        item_count=item_count,
+        updated_at=template.updated_at,
+    )
+
+
+@router.get("/templates", response_model=list[EstimateTemplateRead])
+def list_templates(db: Session = Depends(get_db)) -> list[EstimateTemplateRead]:
+    item_count = (
+        select(func.count(EstimateTemplateItem.id))
+        .where(EstimateTemplateItem.template_id == EstimateTemplate.id)
+        .correlate(EstimateTemplate)
+        .scalar_subquery()
+    )
+    rows = db.execute(select(EstimateTemplate, item_count).order_by(EstimateTemplate.name.asc())).all()
+    return [_to_template_read(template, count) for template, count in rows]
+
+
+@router.get("/templates/{template_id}", response_model=EstimateTemplateDetail)
+def get_template(template_id: int, db: Session = Depends(get_db)) -> EstimateTemplateDetail:
+    template = db.get(EstimateTemplate, template_id)
+    if template is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+
+    rows = db.execute(
+        select(EstimateTemplateItem, WorkItemMaster)
+        .join(WorkItemMaster, WorkItemMaster.id == EstimateTemplateItem.master_item_id)
+        .where(EstimateTemplateItem.template_id == template_id)
+        .order_by(EstimateTemplateItem.position.asc())
+    ).all()
+    items = [
+        EstimateTemplateItemRead(
+            position=line.position,
+            master_item_id=master.id,
+            category=master.category,
+            item_name=master.item_name,
+            specification=master.specification,
+            unit=master.unit,
+            quantity=line.quantity,
+            unit_price=master.standard_unit_price,
+        )
+        for line, master in rows
+    ]
+    return EstimateTemplateDetail(**_to_template_read(template, len(items)).model_dump(), items=items)
+
+
+@router.post(
+    "/projects/{project_id}/items/from-template/{template_id}",
+    response_model=TemplateInstantiateResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_project_items_from_template(
+    project_id: str,
+    template_id: int,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_api_key),
+) -> TemplateInstantiateResponse:
+    if db.execute(select(Project.id).where(Project.project_id == project_id)).first() is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if db.get(EstimateTemplate, template_id) is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+
+    items_created, subtotals = instantiate_template(db, template_id, project_id)
+    line_total = sum(subtotals.values())
+    adjust_aggregates(db, {ITEM_LINE_TOTAL: line_total})
+    adjust_project_rollups(
+        db, {(project_id, ITEM_LINE_TOTAL, category): total for category, total in subtotals.items()}
+    )
+    db.commit()
+    publish_dashboard_change()
+    return TemplateInstantiateResponse(
+        project_id=project_id,
+        template_id=template_id,
+        items_created=items_created,
+        line_total=line_total,
+    )
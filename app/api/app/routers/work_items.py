@@ -5,17 +5,66 @@ from __future__ import annotations
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from ..database import get_db
 from ..models import Project, ProjectItem, WorkItemMaster
-from ..schemas import ProjectItemCreate, ProjectItemRead, WorkItemMasterRead
+from ..schemas import (
+    ProjectItemBulkCreate,
+    ProjectItemBulkResponse,
+    ProjectItemBulkResult,
+    ProjectItemCreate,
+    ProjectItemRead,
+    WorkItemMasterRead,
+)
 from ..security import require_api_key
+from ..services.dashboard_aggregates import ITEM_LINE_TOTAL, adjust_aggregates
+from ..services.dashboard_events import publish_dashboard_change
+from ..services.project_rollups import adjust_project_rollups, merge_rollup_deltas, rollup_deltas
+from ..services.work_item_catalog import get_work_item_catalog
+from ..services.work_item_search import search_work_items
 
 router = APIRouter(tags=["work-items"])
 
 
+def _item_to_read(row: ProjectItem) -> ProjectItemRead:
+    return ProjectItemRead(
+        id=row.id,
+        project_id=row.project_id,
+        category=row.category,
+        item_name=row.item_name,
+        specification=row.specification,
+        unit=row.unit,
+        quantity=row.quantity,
+        unit_price=row.unit_price,
+        line_total=row.line_total,
+    )
+
+
+def _project_item_values(project_id: str, payload: ProjectItemCreate, master: Optional[WorkItemMaster]) -> dict:
+    """Resolve a line from its payload, falling back to the master; raises ValueError when incomplete."""
+    category = payload.category or (master.category if master else None)
+    item_name = payload.item_name or (master.item_name if master else None)
+    if not category or not item_name:
+        raise ValueError("category and item_name are required")
+
+    specification = payload.specification if payload.specification is not None else (master.specification if master else None)
+    unit = payload.unit if payload.unit is not None else (master.unit if master else None)
+    unit_price = payload.unit_price if payload.unit_price is not None else (master.standard_unit_price if master else 0.0)
+
+    return {
+        "project_id": project_id,
+        "category": category,
+        "item_name": item_name,
+        "specification": specification,
+        "unit": unit,
+        "quantity": payload.quantity,
+        "unit_price": unit_price,
+        "line_total": payload.quantity * unit_price,
+    }
+
+
 @router.get("/work-items", response_model=list[WorkItemMasterRead])
 def list_work_items(
     category: Optional[str] = Query(default=None),
@@ -23,15 +72,15 @@ def list_work_items(
     limit: int = Query(default=100, ge=1, le=500),
     db: Session = Depends(get_db),
 ) -> list[WorkItemMasterRead]:
-    stmt = select(WorkItemMaster)
-    if category:
-        stmt = stmt.where(WorkItemMaster.category == category)
-    if q:
-        like = f"%{q}%"
-        stmt = stmt.where(WorkItemMaster.item_name.like(like))
-    stmt = stmt.order_by(WorkItemMaster.category.asc(), WorkItemMaster.item_name.asc()).limit(limit)
-
-    rows = db.execute(stmt).scalars().all()
+    if q and q.strip():
+        # Ranked: name hits first, then category, then specification.
+        rows = search_work_items(db, q, category=category, limit=limit)
+    else:
+        stmt = select(WorkItemMaster)
+        if category:
+            stmt = stmt.where(WorkItemMaster.category == category)
+        stmt = stmt.order_by(WorkItemMaster.category.asc(), WorkItemMaster.item_name.asc()).limit(limit)
+        rows = db.execute(stmt).scalars().all()
     return [
         WorkItemMasterRead(
             id=row.id,
@@ -48,6 +97,16 @@ def list_work_items(
     ]
 
 
+@router.get("/work-items/suggest", response_model=list[WorkItemMasterRead])
+def suggest_work_items(
+    q: str = Query(..., min_length=1),
+    category: Optional[str] = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=100),
+) -> list[WorkItemMasterRead]:
+    """Type-ahead served from the in-memory catalog; no database session per keystroke."""
+    return get_work_item_catalog().suggest(q, category=category, limit=limit)
+
+
 @router.get("/projects/{project_id}/items", response_model=list[ProjectItemRead])
 def list_project_items(project_id: str, db: Session = Depends(get_db)) -> list[ProjectItemRead]:
     project = db.execute(select(Project).where(Project.project_id == project_id)).scalar_one_or_none()
@@ -57,20 +116,7 @@ def list_project_items(project_id: str, db: Session = Depends(get_db)) -> list[P
     rows = db.execute(
         select(ProjectItem).where(ProjectItem.project_id == project_id).order_by(ProjectItem.id.asc())
     ).scalars().all()
-    return [
-        ProjectItemRead(
-            id=row.id,
-            project_id=row.project_id,
-            category=row.category,
-            item_name=row.item_name,
-            specification=row.specification,
-            unit=row.unit,
-            quantity=row.quantity,
-            unit_price=row.unit_price,
-            line_total=row.line_total,
-        )
-        for row in rows
-    ]
+    return [_item_to_read(row) for row in rows]
 
 
 @router.post("/projects/{project_id}/items", response_model=ProjectItemRead, status_code=status.HTTP_201_CREATED)
@@ -92,39 +138,75 @@ def create_project_item(
         if master is None:
             raise HTTPException(status_code=404, detail="Work item master not found")
 
-    category = payload.category or (master.category if master else None)
-    item_name = payload.item_name or (master.item_name if master else None)
-    if not category or not item_name:
-        raise HTTPException(status_code=422, detail="category and item_name are required")
-
-    specification = payload.specification if payload.specification is not None else (master.specification if master else None)
-    unit = payload.unit if payload.unit is not None else (master.unit if master else None)
-    unit_price = payload.unit_price if payload.unit_price is not None else (master.standard_unit_price if master else 0.0)
+    try:
+        values = _project_item_values(project_id, payload, master)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
 
-    line_total = payload.quantity * unit_price
-
-    item = ProjectItem(
-        project_id=project_id,
-        category=category,
-        item_name=item_name,
-        specification=specification,
-        unit=unit,
-        quantity=payload.quantity,
-        unit_price=unit_price,
-        line_total=line_total,
-    )
+    item = ProjectItem(**values)
     db.add(item)
+    adjust_aggregates(db, {ITEM_LINE_TOTAL: item.line_total})
+    adjust_project_rollups(db, rollup_deltas(project_id, {ITEM_LINE_TOTAL: item.line_total}, bucket=item.category))
     db.commit()
+    publish_dashboard_change()
     db.refresh(item)
 
-    return ProjectItemRead(
-        id=item.id,
-        project_id=item.project_id,
-        category=item.category,
-        item_name=item.item_name,
-        specification=item.specification,
-        unit=item.unit,
-        quantity=item.quantity,
-        unit_price=item.unit_price,
-        line_total=item.line_total,
-    )
+    return _item_to_read(item)
+
+
+@router.post("/projects/{project_id}/items/bulk", response_model=ProjectItemBulkResponse)
+def create_project_items_bulk(
+    project_id: str,
+    payload: ProjectItemBulkCreate,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_api_key),
+) -> ProjectItemBulkResponse:
+    """Add many lines with one master lookup, one executemany and one commit; results follow input order."""
+    project = db.execute(select(Project.id).where(Project.project_id == project_id)).first()
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    master_ids = {line.master_item_id for line in payload.items if line.master_item_id is not None}
+    masters = {
+        master.id: master
+        for master in db.execute(select(WorkItemMaster).where(WorkItemMaster.id.in_(master_ids))).scalars()
+    }
+
+    results: list[ProjectItemBulkResult] = []
+    accepted: list[tuple[int, dict]] = []
+    for index, line in enumerate(payload.items):
+        master = masters.get(line.master_item_id) if line.master_item_id is not None else None
+        if line.master_item_id is not None and master is None:
+            results.append(ProjectItemBulkResult(index=index, status_code=404, detail="Work item master not found"))
+            continue
+        try:
+            accepted.append((index, _project_item_values(project_id, line, master)))
+        except ValueError as exc:
+            results.append(ProjectItemBulkResult(index=index, status_code=422, detail=str(exc)))
+
+    if accepted:
+        rows = [values for _, values in accepted]
+        item_ids = db.execute(
+            insert(ProjectItem).returning(ProjectItem.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        adjust_aggregates(db, {ITEM_LINE_TOTAL: sum(values["line_total"] for values in rows)})
+        adjust_project_rollups(
+            db,
+            merge_rollup_deltas(
+                rollup_deltas(project_id, {ITEM_LINE_TOTAL: values["line_total"]}, bucket=values["category"])
+                for values in rows
+            ),
+        )
+        db.commit()
+        publish_dashboard_change()
+        results.extend(
+            ProjectItemBulkResult(
+                index=index,
+                status_code=status.HTTP_201_CREATED,
+                item=ProjectItemRead(id=item_id, **values),
+            )
+            for (index, values), item_id in zip(accepted, item_ids)
+        )
+
+    results.sort(key=lambda result: result.index)
+    return ProjectItemBulkResponse(succeeded=len(accepted), failed=len(results) - len(accepted), results=results)
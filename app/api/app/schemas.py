@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from datetime import date
+from datetime import date, datetime
 from typing import Optional
 
 from pydantic import BaseModel, Field
@@ -39,6 +39,26 @@ class ProjectRead(BaseModel):
 class ProjectListResponse(BaseModel):
     items: list[ProjectRead]
     total: int
+    next_cursor: Optional[str] = None
+
+
+class ProjectRollupRead(BaseModel):
+    project_id: str
+    category_subtotals: dict[str, float]
+    estimate_total: float
+    invoice_total: float
+    invoice_remaining: float
+    payment_total: float
+    payment_remaining: float
+    gross_profit: float
+    estimated_margin_rate: Optional[float] = None
+    achieved_margin_rate: Optional[float] = None
+    target_margin_rate: float
+    margin_gap: Optional[float] = None
+
+
+# Upper bound on projects in one batched rollup request.
+ROLLUP_MAX_PROJECTS = 500
 
 
 class EstimateCoverRequest(BaseModel):
@@ -51,6 +71,17 @@ class ReceiptRequest(BaseModel):
 
 class ExcelSyncRequest(BaseModel):
     workbook_path: Optional[str] = None
+    full_resync: bool = False
+
+
+class ExcelSheetSyncStats(BaseModel):
+    rows: int
+    inserted: int
+    updated: int
+    unchanged: int
+    deleted: int
+    resumed: int = 0
+    skipped: bool
 
 
 class ExcelSyncResponse(BaseModel):
@@ -60,6 +91,27 @@ class ExcelSyncResponse(BaseModel):
     invoices_upserted: int
     payments_upserted: int
     work_items_upserted: int
+    cached: bool = False
+    sheet_timings: dict[str, float] = Field(default_factory=dict)
+    rows_inserted: int = 0
+    rows_updated: int = 0
+    rows_unchanged: int = 0
+    rows_deleted: int = 0
+    sheet_stats: dict[str, ExcelSheetSyncStats] = Field(default_factory=dict)
+
+
+class SyncJobRead(BaseModel):
+    job_id: str
+    status: str
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+    current_sheet: Optional[str] = None
+    rows_processed: int = 0
+    sheet_stats: dict[str, ExcelSheetSyncStats] = Field(default_factory=dict)
+    result: Optional[ExcelSyncResponse] = None
+    error: Optional[str] = None
 
 
 class WorkItemMasterRead(BaseModel):
@@ -164,6 +216,118 @@ class PaymentUpdate(BaseModel):
     work_description: Optional[str] = None
 
 
+# Upper bound on records accepted by one bulk request.
+BULK_MAX_ITEMS = 1000
+
+
+class InvoiceBulkCreate(BaseModel):
+    items: list[InvoiceCreate] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class InvoiceBulkUpdateItem(InvoiceUpdate):
+    invoice_id: str
+
+
+class InvoiceBulkUpdate(BaseModel):
+    items: list[InvoiceBulkUpdateItem] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class InvoiceBulkResult(BaseModel):
+    index: int
+    status_code: int
+    invoice_id: Optional[str] = None
+    detail: Optional[str] = None
+    invoice: Optional[InvoiceRead] = None
+
+
+class InvoiceBulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: list[InvoiceBulkResult]
+
+
+class PaymentBulkCreate(BaseModel):
+    items: list[PaymentCreate] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class PaymentBulkUpdateItem(PaymentUpdate):
+    payment_id: str
+
+
+class PaymentBulkUpdate(BaseModel):
+    items: list[PaymentBulkUpdateItem] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class PaymentBulkResult(BaseModel):
+    index: int
+    status_code: int
+    payment_id: Optional[str] = None
+    detail: Optional[str] = None
+    payment: Optional[PaymentRead] = None
+
+
+class PaymentBulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: list[PaymentBulkResult]
+
+
+class ProjectItemBulkCreate(BaseModel):
+    items: list[ProjectItemCreate] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class ProjectItemBulkResult(BaseModel):
+    index: int
+    status_code: int
+    detail: Optional[str] = None
+    item: Optional[ProjectItemRead] = None
+
+
+class ProjectItemBulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: list[ProjectItemBulkResult]
+
+
+class EstimateTemplateRead(BaseModel):
+    id: int
+    name: str
+    category: Optional[str] = None
+    source_sheet: Optional[str] = None
+    item_count: int
+    updated_at: datetime
+
+
+class EstimateTemplateItemRead(BaseModel):
+    position: int
+    master_item_id: int
+    category: str
+    item_name: str
+    specification: Optional[str] = None
+    unit: Optional[str] = None
+    quantity: float
+    unit_price: float
+
+
+class EstimateTemplateDetail(EstimateTemplateRead):
+    items: list[EstimateTemplateItemRead]
+
+
+class EstimateTemplateImportResponse(BaseModel):
+    workbook_path: str
+    templates: int
+    items: int
+    masters_created: int
+    removed: list[str] = Field(default_factory=list)
+
+
+class TemplateInstantiateResponse(BaseModel):
+    project_id: str
+    template_id: int
+    items_created: int
+    line_total: float
+
+
 class DashboardSummaryResponse(BaseModel):
     project_total: int
     project_status_counts: dict[str, int]
@@ -202,3 +366,11 @@ class DashboardOverviewResponse(BaseModel):
     active_project_count: int
     monthly_sales_current_year: list[DashboardMonthlySalesPoint]
     active_projects: list[DashboardActiveProject]
+
+
+class IdReservationResponse(BaseModel):
+    prefix: str
+    count: int
+    first_id: str
+    last_id: str
+    ids: list[str]
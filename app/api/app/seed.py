@@ -4,10 +4,10 @@ from __future__ import annotations
 
 from datetime import date
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
-from .models import Customer, Invoice, Payment, Project, ProjectItem, WorkItemMaster
+from .models import Customer, Invoice, Payment, Project, ProjectItem, WorkItemMaster, classify_project_status
 
 
 def seed_data(db: Session) -> None:
@@ -122,3 +122,15 @@ def seed_data(db: Session) -> None:
             )
         )
         db.commit()
+
+
+def backfill_project_status_class(db: Session) -> None:
+    """Classify projects stored before ``status_class`` existed."""
+    rows = db.execute(select(Project.id, Project.project_status).where(Project.status_class.is_(None))).all()
+    if not rows:
+        return
+    db.execute(
+        update(Project),
+        [{"id": project_id, "status_class": classify_project_status(status)} for project_id, status in rows],
+    )
+    db.commit()
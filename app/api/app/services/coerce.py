@@ -0,0 +1,64 @@
+"""Cell coercion shared by workbook import paths.
+
+openpyxl already returns typed values (int/float/datetime) for most cells, so
+each converter checks the exact type first and only falls back to string
+parsing for the remainder. Date strings repeat heavily within a sheet (same
+billing day, same order day), so their parsing is memoised.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Optional
+
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d")
+
+
+def to_str(value) -> Optional[str]:
+    if value is None:
+        return None
+    s = (value if type(value) is str else str(value)).strip()
+    return s if s else None
+
+
+def to_float(value, default: Optional[float] = 0.0) -> Optional[float]:
+    kind = type(value)
+    if kind is float:
+        return value
+    if kind is int:
+        return float(value)
+    try:
+        if value is None or value == "":
+            return default
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_string(value: str) -> Optional[date]:
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def to_date(value) -> Optional[date]:
+    kind = type(value)
+    if kind is datetime:
+        return value.date()
+    if kind is date:
+        return value
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        return _parse_date_string(value[:10])
+    return None
+
@@ -0,0 +1,87 @@
+"""Materialised dashboard summary totals, kept current by write-path deltas."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from ..database import dialect_insert
+from ..models import DashboardAggregate, Invoice, Payment, Project, ProjectItem
+
+PROJECT_COUNT = "project_count"
+INVOICE_AMOUNT = "invoice_amount"
+INVOICE_REMAINING = "invoice_remaining"
+PAYMENT_ORDERED = "payment_ordered"
+PAYMENT_REMAINING = "payment_remaining"
+ITEM_LINE_TOTAL = "item_line_total"
+
+UNSET_STATUS = "未設定"
+
+
+def adjust_aggregates(db: Session, deltas: Mapping[str, float], bucket: str = "") -> None:
+    """Add ``deltas`` (metric -> signed amount) to the stored totals; does not commit."""
+    rows = [
+        {"metric": metric, "bucket": bucket, "value": float(delta)}
+        for metric, delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+    table = DashboardAggregate.__table__
+    stmt = dialect_insert(db, table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["metric", "bucket"],
+        set_={"value": table.c.value + stmt.excluded.value},
+    )
+    db.execute(stmt)
+
+
+def count_project_status(db: Session, status: Optional[str], delta: int = 1) -> None:
+    adjust_aggregates(db, {PROJECT_COUNT: delta}, bucket=status or UNSET_STATUS)
+
+
+def rebuild_dashboard_aggregates(db: Session) -> None:
+    """Recompute every stored total from the source tables; does not commit."""
+    totals = {
+        INVOICE_AMOUNT: select(func.coalesce(func.sum(Invoice.invoice_amount), 0.0)),
+        INVOICE_REMAINING: select(func.coalesce(func.sum(Invoice.remaining_amount), 0.0)),
+        PAYMENT_ORDERED: select(func.coalesce(func.sum(Payment.ordered_amount), 0.0)),
+        PAYMENT_REMAINING: select(func.coalesce(func.sum(Payment.remaining_amount), 0.0)),
+        ITEM_LINE_TOTAL: select(func.coalesce(func.sum(ProjectItem.line_total), 0.0)),
+    }
+    rows = [
+        {"metric": metric, "bucket": "", "value": float(db.execute(stmt).scalar_one() or 0.0)}
+        for metric, stmt in totals.items()
+    ]
+
+    status_counts: dict[str, int] = {}
+    for status, count in db.execute(
+        select(Project.project_status, func.count(Project.id)).group_by(Project.project_status)
+    ):
+        bucket = status or UNSET_STATUS
+        status_counts[bucket] = status_counts.get(bucket, 0) + int(count)
+    rows.extend(
+        {"metric": PROJECT_COUNT, "bucket": bucket, "value": float(count)}
+        for bucket, count in status_counts.items()
+    )
+
+    db.execute(delete(DashboardAggregate))
+    db.execute(insert(DashboardAggregate), rows)
+
+
+def read_dashboard_aggregates(db: Session) -> tuple[dict[str, float], dict[str, int]]:
+    """Return (metric totals, project counts per status)."""
+    totals: dict[str, float] = {}
+    status_counts: dict[str, int] = {}
+    for metric, bucket, value in db.execute(
+        select(DashboardAggregate.metric, DashboardAggregate.bucket, DashboardAggregate.value)
+    ):
+        if metric == PROJECT_COUNT:
+            if round(value):
+                status_counts[bucket] = int(round(value))
+        else:
+            totals[metric] = float(value)
+    return totals, status_counts
@@ -0,0 +1,68 @@
+"""In-process response cache for the polled dashboard endpoints.
+
+Entries expire after ``DASHBOARD_CACHE_TTL_SECONDS`` and are dropped by
+``invalidate_dashboard_cache`` after any committed write that affects them. The
+cache is per process, so with several workers the TTL bounds how stale another
+worker's copy can be.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from pydantic import BaseModel
+
+from ..config import DASHBOARD_CACHE_TTL_SECONDS
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    body: bytes
+    etag: str
+    expires_at: float
+
+
+_entries: dict[str, CachedBody] = {}
+_lock = threading.Lock()
+# Bumped on every invalidation so a response computed before a write is not stored after it.
+_generation = 0
+
+
+def invalidate_dashboard_cache() -> None:
+    """Drop every cached dashboard response; call after committing a write."""
+    global _generation
+    with _lock:
+        _entries.clear()
+        _generation += 1
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def get_or_build(key: str, build: Callable[[], BaseModel]) -> CachedBody:
+    """Return the cached JSON body for ``key``, building it when missing or expired."""
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry.expires_at > now:
+            return entry
+        generation = _generation
+
+    body = build().model_dump_json().encode("utf-8")
+    entry = CachedBody(body=body, etag=_etag(body), expires_at=now + DASHBOARD_CACHE_TTL_SECONDS)
+    with _lock:
+        if DASHBOARD_CACHE_TTL_SECONDS > 0 and generation == _generation:
+            _entries[key] = entry
+    return entry
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
@@ -0,0 +1,170 @@
+"""In-process pub/sub that fans dashboard changes out to SSE clients.
+
+Writers call ``publish_dashboard_change`` after committing. A single broadcaster
+task per event loop coalesces bursts of changes, reloads the dashboard snapshot
+once, and pushes only the changed top-level fields to every subscriber, so idle
+connections cost a queue each and never query the database themselves.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
+from typing import Optional
+
+from .dashboard_cache import invalidate_dashboard_cache
+
+logger = logging.getLogger(__name__)
+
+# topic ("summary" / "overview") -> response payload
+Snapshot = dict[str, dict]
+
+COALESCE_SECONDS = 0.2
+KEEPALIVE_SECONDS = 15.0
+SUBSCRIBER_QUEUE_SIZE = 8
+
+
+@dataclass(frozen=True)
+class DashboardEvent:
+    event: str  # "snapshot" | "delta"
+    version: int
+    data: Snapshot
+
+    def encode(self) -> str:
+        payload = json.dumps({"version": self.version, **self.data}, ensure_ascii=False, default=str)
+        return f"id: {self.version}\nevent: {self.event}\ndata: {payload}\n\n"
+
+
+def diff_snapshots(previous: Snapshot, current: Snapshot) -> Snapshot:
+    """Return, per topic, the top-level fields whose value changed."""
+    delta: Snapshot = {}
+    for topic, payload in current.items():
+        before = previous.get(topic, {})
+        changed = {name: value for name, value in payload.items() if before.get(name) != value}
+        if changed:
+            delta[topic] = changed
+    return delta
+
+
+class DashboardEventBus:
+    def __init__(
+        self,
+        loader: Optional[Callable[[], Snapshot]] = None,
+        coalesce_seconds: float = COALESCE_SECONDS,
+        keepalive_seconds: float = KEEPALIVE_SECONDS,
+        queue_size: int = SUBSCRIBER_QUEUE_SIZE,
+    ) -> None:
+        # Blocking callable run in a worker thread; set by the dashboard router.
+        self.loader = loader
+        self._coalesce_seconds = coalesce_seconds
+        self._keepalive_seconds = keepalive_seconds
+        self._queue_size = queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._subscribers: set[asyncio.Queue] = set()
+        self._snapshot: Optional[Snapshot] = None
+        self._stale = True
+        self._version = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self) -> None:
+        """Signal that dashboard data changed; safe to call from any thread."""
+        self._stale = True
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None:
+            return
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:
+            # The loop that served earlier subscribers has been closed.
+            pass
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._refresh_lock = asyncio.Lock()
+            self._subscribers = set()
+            self._task = None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._broadcast())
+
+    async def _refresh(self) -> None:
+        """Reload the snapshot and push any delta to current subscribers."""
+        async with self._refresh_lock:
+            if not self._stale and self._snapshot is not None:
+                return
+            # Cleared before loading so a publish during the load is not lost; a failed
+            # load marks the snapshot stale again so the next wakeup retries it.
+            self._stale = False
+            try:
+                current = await asyncio.to_thread(self.loader)
+            except Exception:
+                self._stale = True
+                raise
+            previous, self._snapshot = self._snapshot, current
+            if previous is None:
+                return
+            delta = diff_snapshots(previous, current)
+            if not delta:
+                return
+            self._version += 1
+            event = DashboardEvent("delta", self._version, delta)
+            for queue in self._subscribers:
+                self._offer(queue, event)
+
+    def _offer(self, queue: asyncio.Queue, event: DashboardEvent) -> None:
+        if queue.full():
+            # A client that stopped reading gets the full state instead of a backlog.
+            while not queue.empty():
+                queue.get_nowait()
+            event = DashboardEvent("snapshot", self._version, self._snapshot)
+        queue.put_nowait(event)
+
+    async def _broadcast(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            await asyncio.sleep(self._coalesce_seconds)
+            if not self._subscribers:
+                # Nobody is listening; the next subscriber reloads.
+                continue
+            try:
+                await self._refresh()
+            except Exception:  # noqa: BLE001 - keep the broadcaster alive for the next change
+                logger.exception("Failed to refresh dashboard snapshot")
+
+    async def subscribe(self) -> AsyncIterator[Optional[DashboardEvent]]:
+        """Yield a snapshot, then deltas; ``None`` marks a keepalive interval."""
+        self._ensure_running()
+        await self._refresh()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        snapshot = DashboardEvent("snapshot", self._version, self._snapshot)
+        self._subscribers.add(queue)
+        try:
+            yield snapshot
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=self._keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self._subscribers.discard(queue)
+
+
+dashboard_bus = DashboardEventBus()
+
+
+def publish_dashboard_change() -> None:
+    """Drop cached dashboard responses and notify stream subscribers; call after committing."""
+    invalidate_dashboard_cache()
+    dashboard_bus.publish()
@@ -0,0 +1,292 @@
+"""Estimate templates imported from the workbook and copied into projects.
+
+A template is an ordered list of work item master ids with default quantities.
+Templates come from the ``案件テンプレート`` cost table and from every trade
+sheet (解体工事, 仮設, 床, ...) laid out as a 内訳明細書: header row 3 with
+``名称形状`` / ``数量``, the trade name in B4, and lines from row 5 with name (B),
+specification (C), quantity (D), unit (E) and unit price (F). Lines are matched
+to master items by normalised name, preferring the same category; unmatched
+lines become new master items priced from the sheet.
+
+Instantiating a template is a single ``INSERT ... SELECT`` from the template
+lines joined to the master, however many lines it has.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from openpyxl import load_workbook
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from ..models import EstimateTemplate, EstimateTemplateItem, ProjectItem, WorkItemMaster
+from .coerce import to_float, to_str
+from .work_item_catalog import invalidate_work_item_catalog
+from .work_item_search import normalize_search_text, refresh_work_item_search_index
+
+PROJECT_TEMPLATE_SHEET = "案件テンプレート"
+# 案件テンプレート cost table: header on row 14, numbered lines below it.
+PROJECT_TEMPLATE_FIRST_ROW = 15
+TRADE_SHEET_HEADER_ROW = 3
+TRADE_SHEET_FIRST_ROW = 5
+UNCATEGORIZED = "未分類"
+
+
+@dataclass
+class TemplateLine:
+    category: str
+    item_name: str
+    specification: Optional[str]
+    unit: Optional[str]
+    quantity: float
+    unit_price: float
+
+
+@dataclass
+class ParsedTemplate:
+    name: str
+    source_sheet: str
+    category: Optional[str]
+    lines: list[TemplateLine] = field(default_factory=list)
+
+
+@dataclass
+class TemplateImportResult:
+    templates: int = 0
+    items: int = 0
+    masters_created: int = 0
+    removed: list[str] = field(default_factory=list)
+
+
+def _quantity(value) -> float:
+    quantity = to_float(value, 1.0)
+    return quantity if quantity > 0 else 1.0
+
+
+def _parse_project_template(ws) -> ParsedTemplate:
+    template = ParsedTemplate(name=PROJECT_TEMPLATE_SHEET, source_sheet=PROJECT_TEMPLATE_SHEET, category=None)
+    for row in ws.iter_rows(min_row=PROJECT_TEMPLATE_FIRST_ROW, max_col=10, values_only=True):
+        row = tuple(row) + (None,) * (10 - len(row))
+        # Column A numbers the lines; the totals row below the table has none.
+        if not isinstance(row[0], (int, float)):
+            break
+        item_name = to_str(row[3])
+        if not item_name:
+            continue
+        template.lines.append(
+            TemplateLine(
+                category=to_str(row[2]) or UNCATEGORIZED,
+                item_name=item_name,
+                specification=to_str(row[4]),
+                unit=to_str(row[7]),
+                quantity=_quantity(row[8]),
+                unit_price=to_float(row[5], 0.0),
+            )
+        )
+    return template
+
+
+def _is_trade_sheet(ws) -> bool:
+    rows = ws.iter_rows(min_row=TRADE_SHEET_HEADER_ROW, max_row=TRADE_SHEET_HEADER_ROW, max_col=4, values_only=True)
+    header = next(rows, ())
+    header = tuple(header) + (None,) * (4 - len(header))
+    return to_str(header[1]) == "名称形状" and to_str(header[3]) == "数量"
+
+
+def _parse_trade_sheet(ws) -> ParsedTemplate:
+    title = next(ws.iter_rows(min_row=4, max_row=4, min_col=2, max_col=2, values_only=True), (None,))
+    sheet_name = ws.title.strip()
+    category = to_str(title[0]) or sheet_name
+    # Some sheet names carry a stray quote, e.g. "電気設備‘".
+    template = ParsedTemplate(name=sheet_name.rstrip("‘’'"), source_sheet=ws.title, category=category)
+    for row in ws.iter_rows(min_row=TRADE_SHEET_FIRST_ROW, min_col=2, max_col=6, values_only=True):
+        row = tuple(row) + (None,) * (5 - len(row))
+        item_name = to_str(row[0])
+        if not item_name:
+            continue
+        template.lines.append(
+            TemplateLine(
+                category=category,
+                item_name=item_name,
+                specification=to_str(row[1]),
+                unit=to_str(row[3]),
+                quantity=_quantity(row[2]),
+                unit_price=to_float(row[4], 0.0),
+            )
+        )
+    return template
+
+
+def read_workbook_templates(workbook_path: str) -> list[ParsedTemplate]:
+    source = Path(workbook_path).expanduser().resolve()
+    if not source.exists():
+        raise FileNotFoundError(f"Workbook not found: {source}")
+
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        templates = []
+        for ws in wb.worksheets:
+            if ws.title == PROJECT_TEMPLATE_SHEET:
+                templates.append(_parse_project_template(ws))
+            elif _is_trade_sheet(ws):
+                templates.append(_parse_trade_sheet(ws))
+        return templates
+    finally:
+        wb.close()
+
+
+def _resolve_master_ids(db: Session, lines: list[TemplateLine]) -> tuple[list[int], int]:
+    """Map lines to master ids in order, inserting missing masters in one statement."""
+    by_name: dict[str, list[tuple[int, str]]] = {}
+    for item_id, category, item_name in db.execute(
+        select(WorkItemMaster.id, WorkItemMaster.category, WorkItemMaster.item_name).order_by(WorkItemMaster.id)
+    ):
+        by_name.setdefault(normalize_search_text(item_name), []).append((item_id, normalize_search_text(category)))
+
+    # Existing ids are >= 0; -1 - n refers to the n-th master inserted below.
+    resolved: list[int] = []
+    pending: dict[tuple[str, str], int] = {}
+    new_masters: list[dict] = []
+    for line in lines:
+        name_key, category_key = normalize_search_text(line.item_name), normalize_search_text(line.category)
+        candidates = by_name.get(name_key)
+        if candidates:
+            same_category = [item_id for item_id, category in candidates if category == category_key]
+            resolved.append(same_category[0] if same_category else candidates[0][0])
+            continue
+        key = (category_key, name_key)
+        if key not in pending:
+            pending[key] = len(new_masters)
+            new_masters.append(
+                {
+                    "category": line.category,
+                    "item_name": line.item_name,
+                    "specification": line.specification,
+                    "unit": line.unit,
+                    "standard_unit_price": line.unit_price,
+                }
+            )
+        resolved.append(-1 - pending[key])
+
+    new_ids: list[int] = []
+    if new_masters:
+        new_ids = list(
+            db.execute(
+                insert(WorkItemMaster).returning(WorkItemMaster.id, sort_by_parameter_order=True), new_masters
+            ).scalars()
+        )
+    return [item_id if item_id >= 0 else new_ids[-1 - item_id] for item_id in resolved], len(new_masters)
+
+
+def import_estimate_templates(db: Session, workbook_path: str) -> TemplateImportResult:
+    """Replace every workbook-sourced template with the workbook's current lines and commit."""
+    parsed = read_workbook_templates(workbook_path)
+    result = TemplateImportResult()
+    existing = {template.name: template for template in db.execute(select(EstimateTemplate)).scalars()}
+
+    lines = [line for template in parsed for line in template.lines]
+    master_ids, result.masters_created = _resolve_master_ids(db, lines)
+    next_master = iter(master_ids)
+
+    item_rows: list[dict] = []
+    now = datetime.utcnow()
+    for template in parsed:
+        row = existing.get(template.name)
+        template_master_ids = [next(next_master) for _ in template.lines]
+        if not template.lines:
+            # An emptied sheet removes its template rather than leaving a blank one.
+            if row is not None:
+                db.execute(delete(EstimateTemplateItem).where(EstimateTemplateItem.template_id == row.id))
+                db.delete(row)
+                result.removed.append(template.name)
+            continue
+        if row is None:
+            row = EstimateTemplate(name=template.name)
+            db.add(row)
+        else:
+            db.execute(delete(EstimateTemplateItem).where(EstimateTemplateItem.template_id == row.id))
+        row.category = template.category
+        row.source_sheet = template.source_sheet
+        row.updated_at = now
+        db.flush()
+        item_rows.extend(
+            {"template_id": row.id, "position": position, "master_item_id": master_id, "quantity": line.quantity}
+            for position, (line, master_id) in enumerate(zip(template.lines, template_master_ids), start=1)
+        )
+        result.templates += 1
+
+    # Templates whose sheet is gone from the workbook are removed like emptied ones.
+    parsed_names = {template.name for template in parsed}
+    for name, row in existing.items():
+        if name not in parsed_names and row.source_sheet is not None:
+            db.execute(delete(EstimateTemplateItem).where(EstimateTemplateItem.template_id == row.id))
+            db.delete(row)
+            result.removed.append(name)
+
+    if item_rows:
+        db.execute(insert(EstimateTemplateItem), item_rows)
+    result.items = len(item_rows)
+    if result.masters_created:
+        refresh_work_item_search_index(db)
+    db.commit()
+    if result.masters_created:
+        invalidate_work_item_catalog()
+    return result
+
+
+def instantiate_template(db: Session, template_id: int, project_id: str) -> tuple[int, dict[str, float]]:
+    """Copy a template's lines into ``project_items`` with one INSERT ... SELECT.
+
+    Returns (rows, line total per category).
+    Prices come from the master at copy time. Does not commit.
+    """
+    line_total = EstimateTemplateItem.quantity * WorkItemMaster.standard_unit_price
+    source = (
+        select(
+            literal(project_id),
+            WorkItemMaster.category,
+            WorkItemMaster.item_name,
+            WorkItemMaster.specification,
+            WorkItemMaster.unit,
+            EstimateTemplateItem.quantity,
+            WorkItemMaster.standard_unit_price,
+            line_total,
+            literal(datetime.utcnow()),
+        )
+        .join(WorkItemMaster, WorkItemMaster.id == EstimateTemplateItem.master_item_id)
+        .where(EstimateTemplateItem.template_id == template_id)
+        .order_by(EstimateTemplateItem.position)
+    )
+    count = 0
+    subtotals: dict[str, float] = {}
+    for category, lines, total in db.execute(
+        select(WorkItemMaster.category, func.count(), func.sum(line_total))
+        .select_from(EstimateTemplateItem)
+        .join(WorkItemMaster, WorkItemMaster.id == EstimateTemplateItem.master_item_id)
+        .where(EstimateTemplateItem.template_id == template_id)
+        .group_by(WorkItemMaster.category)
+    ):
+        count += lines
+        subtotals[category] = float(total or 0.0)
+    if count:
+        db.execute(
+            insert(ProjectItem).from_select(
+                [
+                    ProjectItem.project_id,
+                    ProjectItem.category,
+                    ProjectItem.item_name,
+                    ProjectItem.specification,
+                    ProjectItem.unit,
+                    ProjectItem.quantity,
+                    ProjectItem.unit_price,
+                    ProjectItem.line_total,
+                    ProjectItem.created_at_ts,
+                ],
+                source,
+            )
+        )
+    return count, subtotals
@@ -2,18 +2,62 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+import json
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from dataclasses import asdict, dataclass, field, replace
 from datetime import date, datetime
 from pathlib import Path
 from typing import Optional
 
 from openpyxl import load_workbook
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.orm import Session
 
-from ..models import Customer, Invoice, Payment, Project, WorkItemMaster
+from ..config import SYNC_COMMIT_CHUNK_ROWS
+from ..database import dialect_insert
+from ..models import (
+    Customer,
+    EstimateTemplateItem,
+    Invoice,
+    Payment,
+    Project,
+    SyncCheckpoint,
+    SyncRowFingerprint,
+    SyncSheetFingerprint,
+    WorkbookSyncState,
+    WorkItemMaster,
+    classify_project_status,
+)
+from .coerce import to_date, to_float, to_str
+from .dashboard_aggregates import rebuild_dashboard_aggregates
+from .dashboard_events import publish_dashboard_change
+from .id_generator import advance_id_sequences
+from .project_rollups import rebuild_project_rollups
+from .work_item_catalog import invalidate_work_item_catalog
+from .work_item_search import refresh_work_item_search_index
 from .sanitize import sanitize_sheet_name
 
+# Rows per executemany batch for bulk upserts.
+SYNC_BATCH_SIZE = 500
+
+# Called with (sheet_name, None) when a sheet starts and (sheet_name, stats) when it is applied.
+SyncProgress = Callable[[str, Optional["SheetSyncStats"]], None]
+
+
+@dataclass
+class SheetSyncStats:
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    # Rows already committed by an interrupted chunked sync of the same workbook.
+    resumed: int = 0
+    # True only when the sheet matched the previous sync; resumed sheets are not skipped.
+    skipped: bool = False
+
 
 @dataclass
 class SyncResult:
@@ -23,38 +67,88 @@ class SyncResult:
     invoices_upserted: int
     payments_upserted: int
     work_items_upserted: int
+    sheet_timings: dict[str, float] = field(default_factory=dict)
+    sheet_stats: dict[str, SheetSyncStats] = field(default_factory=dict)
+    cached: bool = False
 
+    def total(self, counter: str) -> int:
+        return sum(getattr(stats, counter) for stats in self.sheet_stats.values())
 
-def _to_str(value) -> Optional[str]:
-    if value is None:
-        return None
-    s = str(value).strip()
-    return s if s else None
 
+@dataclass
+class RowChange:
+    key: str
+    change: str  # "new" | "changed" | "removed"
+    fields: list[str] = field(default_factory=list)
 
-def _to_float(value, default: float = 0.0) -> float:
-    try:
-        if value is None or value == "":
-            return default
-        return float(value)
-    except (TypeError, ValueError):
-        return default
 
+@dataclass
+class SheetDiff:
+    sheet_name: str
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    changes: list[RowChange] = field(default_factory=list)
 
-def _to_date(value) -> Optional[date]:
-    if value is None or value == "":
-        return None
-    if isinstance(value, datetime):
-        return value.date()
-    if isinstance(value, date):
-        return value
-    if isinstance(value, str):
-        for fmt in ("%Y-%m-%d", "%Y/%m/%d"):
-            try:
-                return datetime.strptime(value[:10], fmt).date()
-            except ValueError:
-                continue
-    return None
+
+@dataclass
+class ParsedSheet:
+    """Source rows keyed by their natural key (last occurrence wins)."""
+
+    rows: dict[str, dict] = field(default_factory=dict)
+    processed: int = 0
+    # First project name seen per project_id, used when a placeholder project is needed.
+    project_names: dict[str, Optional[str]] = field(default_factory=dict)
+    parse_seconds: float = 0.0
+
+
+def _iter_sheet_rows(ws, max_col: int) -> Iterator[tuple[int, tuple]]:
+    """Stream data rows (row 5 onward) as value tuples padded to ``max_col``."""
+    # Rely on the parser rather than the stored <dimension>, which may be stale.
+    ws.reset_dimensions()
+    yield from enumerate(ws.iter_rows(min_row=5, max_col=max_col, values_only=True), start=5)
+
+
+def _batched(rows: list, size: int = SYNC_BATCH_SIZE) -> Iterator[list]:
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fingerprint(payload) -> str:
+    raw = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _bulk_upsert(db: Session, model, rows: list[dict], keys: tuple[str, ...]) -> None:
+    """INSERT ... ON CONFLICT (keys) DO UPDATE every non-key column present in rows."""
+    if not rows:
+        return
+    stmt = dialect_insert(db, model.__table__)
+    update_columns = [name for name in rows[0] if name not in keys]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={name: stmt.excluded[name] for name in update_columns},
+    )
+    for batch in _batched(rows):
+        db.execute(stmt, batch)
+
+
+def _bulk_insert_missing(db: Session, model, rows: list[dict]) -> None:
+    """INSERT ... ON CONFLICT DO NOTHING, used for placeholder parents."""
+    if not rows:
+        return
+    stmt = dialect_insert(db, model.__table__).on_conflict_do_nothing()
+    for batch in _batched(rows):
+        db.execute(stmt, batch)
 
 
 def _get_or_create_placeholder_customer(db: Session) -> Customer:
@@ -72,248 +166,727 @@ def _get_or_create_placeholder_customer(db: Session) -> Customer:
     return customer
 
 
-def sync_from_workbook(db: Session, workbook_path: str) -> SyncResult:
-    source = Path(workbook_path).expanduser().resolve()
-    if not source.exists():
-        raise FileNotFoundError(f"Workbook not found: {source}")
+def _insert_placeholder_projects(db: Session, parsed: ParsedSheet, placeholder: Customer) -> None:
+    referenced = {row["project_id"] for row in parsed.rows.values()}
+    existing_projects = set(db.execute(select(Project.project_id)).scalars())
+    missing = [
+        {
+            "project_id": project_id,
+            "project_sheet_name": sanitize_sheet_name(project_id, f"{project_id}_案件"),
+            "customer_id": placeholder.customer_id,
+            "customer_name": placeholder.customer_name,
+            "project_name": project_name or project_id,
+            "project_status": "①リード",
+            "created_at": date.today(),
+        }
+        for project_id, project_name in parsed.project_names.items()
+        if project_id in referenced and project_id not in existing_projects
+    ]
+    _bulk_insert_missing(db, Project, missing)
+
+
+# --- 顧客マスタ -------------------------------------------------------------
+
+
+def _parse_customers(rows: Iterable[tuple[int, tuple]]) -> ParsedSheet:
+    parsed = ParsedSheet()
+    for _, values in rows:
+        customer_id = to_str(values[0])
+        customer_name = to_str(values[2])
+        if not customer_id or not customer_name:
+            continue
+        parsed.rows[customer_id] = {
+            "customer_id": customer_id,
+            "customer_name": customer_name,
+            "contact_name": to_str(values[4]),
+            "status": to_str(values[17]) or "アクティブ",
+        }
+        parsed.processed += 1
+    return parsed
+
+
+def _apply_customers(db: Session, parsed: ParsedSheet, placeholder: Customer) -> None:
+    _bulk_upsert(db, Customer, list(parsed.rows.values()), keys=("customer_id",))
+
+
+# --- 案件管理 ---------------------------------------------------------------
+
+
+def _parse_projects(rows: Iterable[tuple[int, tuple]]) -> ParsedSheet:
+    parsed = ParsedSheet()
+    for _, values in rows:
+        project_id = to_str(values[0])
+        if not project_id or not project_id.startswith("P-"):
+            continue
+
+        project_name = to_str(values[3]) or to_str(values[31]) or "案件未設定"
+        # customer_id / customer_name / created_at stay None here and fall back at
+        # apply time, so the row fingerprint does not depend on today's date.
+        parsed.rows[project_id] = {
+            "project_id": project_id,
+            "project_sheet_name": sanitize_sheet_name(f"{project_id}_{project_name}", f"{project_id}_案件"),
+            "customer_id": to_str(values[1]),
+            "customer_name": to_str(values[2]),
+            "project_name": project_name,
+            "site_address": to_str(values[30]),
+            "owner_name": to_str(values[12]) or "吉野博",
+            "target_margin_rate": to_float(values[7], 0.25) or 0.25,
+            "project_status": to_str(values[8]) or "①リード",
+            "created_at": to_date(values[18]),
+        }
+        parsed.processed += 1
+    return parsed
+
+
+def _apply_projects(db: Session, parsed: ParsedSheet, placeholder: Customer) -> None:
+    today = date.today()
+    rows = []
+    referenced_customers: dict[str, dict] = {}
+    for source in parsed.rows.values():
+        row = dict(source)
+        row["customer_id"] = row["customer_id"] or placeholder.customer_id
+        row["customer_name"] = row["customer_name"] or placeholder.customer_name
+        row["created_at"] = row["created_at"] or today
+        row["status_class"] = classify_project_status(row["project_status"])
+        referenced_customers.setdefault(
+            row["customer_id"],
+            {"customer_id": row["customer_id"], "customer_name": row["customer_name"], "status": "アクティブ"},
+        )
+        rows.append(row)
+
+    _bulk_insert_missing(db, Customer, list(referenced_customers.values()))
+    _bulk_upsert(db, Project, rows, keys=("project_id",))
+
+
+# --- 請求管理 ---------------------------------------------------------------
+
+
+def _parse_invoices(rows: Iterable[tuple[int, tuple]]) -> ParsedSheet:
+    parsed = ParsedSheet()
+    for row, values in rows:
+        project_id = to_str(values[1])
+        if not project_id:
+            continue
+
+        invoice_id = to_str(values[0])
+        if not invoice_id or invoice_id.startswith("="):
+            invoice_id = f"INV-{row - 4:03d}"
+
+        parsed.project_names.setdefault(project_id, to_str(values[2]))
+        previous = parsed.rows.get(invoice_id)
+        parsed.rows[invoice_id] = {
+            "invoice_id": invoice_id,
+            "project_id": project_id,
+            "invoice_amount": to_float(values[6], 0.0),
+            "billed_at": to_date(values[4]) or (previous["billed_at"] if previous else None),
+            "note": to_str(values[11]),
+        }
+        parsed.processed += 1
+    return parsed
+
+
+def _apply_invoices(db: Session, parsed: ParsedSheet, placeholder: Customer) -> None:
+    today = date.today()
+    undated_ids = [row["invoice_id"] for row in parsed.rows.values() if row["billed_at"] is None]
+    existing_billed_at: dict[str, Optional[date]] = {}
+    for batch in _batched(undated_ids):
+        existing_billed_at.update(
+            db.execute(select(Invoice.invoice_id, Invoice.billed_at).where(Invoice.invoice_id.in_(batch))).all()
+        )
+
+    rows = []
+    for source in parsed.rows.values():
+        row = dict(source)
+        row["billed_at"] = row["billed_at"] or existing_billed_at.get(row["invoice_id"]) or today
+        rows.append(row)
+
+    _insert_placeholder_projects(db, parsed, placeholder)
+    _bulk_upsert(db, Invoice, rows, keys=("invoice_id",))
+
+
+# --- 工事項目DB -------------------------------------------------------------
+
+
+def _work_item_key(source_item_id: Optional[int], category: str, item_name: str) -> str:
+    if source_item_id is not None:
+        return f"#{source_item_id}"
+    return f"{category}|{item_name}"
+
+
+def _parse_work_items(rows: Iterable[tuple[int, tuple]]) -> ParsedSheet:
+    parsed = ParsedSheet()
+    for _, values in rows:
+        category = to_str(values[1])
+        item_name = to_str(values[2])
+        if not category or not item_name:
+            continue
+
+        source_item_id = values[0]
+        source_item_id_int = int(source_item_id) if isinstance(source_item_id, (int, float)) else None
+
+        margin = values[8]
+        parsed.rows[_work_item_key(source_item_id_int, category, item_name)] = {
+            "source_item_id": source_item_id_int,
+            "category": category,
+            "item_name": item_name,
+            "specification": to_str(values[3]),
+            "unit": to_str(values[4]),
+            "standard_unit_price": to_float(values[5], 0.0),
+            "default_vendor_name": to_str(values[6]),
+            "margin_rate": to_float(margin, 0.0) if margin is not None else None,
+        }
+        parsed.processed += 1
+    return parsed
+
+
+def _apply_work_items(db: Session, parsed: ParsedSheet, placeholder: Customer) -> None:
+    by_source_id: dict[int, int | dict] = {}
+    by_name: dict[tuple[str, str], int | dict] = {}
+    for item_id, source_item_id, category, item_name in db.execute(
+        select(
+            WorkItemMaster.id,
+            WorkItemMaster.source_item_id,
+            WorkItemMaster.category,
+            WorkItemMaster.item_name,
+        ).order_by(WorkItemMaster.id.asc())
+    ):
+        if source_item_id is not None:
+            by_source_id.setdefault(source_item_id, item_id)
+        by_name.setdefault((category, item_name), item_id)
+
+    updates: dict[int, dict] = {}
+    inserts: list[dict] = []
+    for fields in parsed.rows.values():
+        source_item_id = fields["source_item_id"]
+        name_key = (fields["category"], fields["item_name"])
+
+        # Targets are either an existing primary key (int) or a pending insert dict.
+        target = by_source_id.get(source_item_id) if source_item_id is not None else None
+        if target is None:
+            target = by_name.get(name_key)
+
+        if isinstance(target, int):
+            updates[target] = {"id": target, **fields}
+        elif target is not None:
+            target.update(fields)
+        else:
+            target = dict(fields)
+            inserts.append(target)
+
+        if source_item_id is not None:
+            by_source_id[source_item_id] = target
+        by_name[name_key] = target
+
+    for batch in _batched(list(updates.values())):
+        db.execute(update(WorkItemMaster), batch)
+    for batch in _batched(inserts):
+        db.execute(insert(WorkItemMaster), batch)
+
+
+def _existing_work_item_keys(db: Session) -> set[str]:
+    rows = db.execute(
+        select(WorkItemMaster.source_item_id, WorkItemMaster.category, WorkItemMaster.item_name)
+    ).all()
+    return {_work_item_key(*row) for row in rows}
+
+
+def _delete_work_items(db: Session, keys: list[str]) -> int:
+    """Delete masters whose key left the workbook, keeping any an estimate template still uses.
+
+    Returns the number of masters deleted.
+    """
+    removed = set(keys)
+    referenced = set(db.execute(select(EstimateTemplateItem.master_item_id).distinct()).scalars())
+    # Keys are matched as built rather than split back apart: categories may contain "|".
+    item_ids = [
+        item_id
+        for item_id, *key in db.execute(
+            select(WorkItemMaster.id, WorkItemMaster.source_item_id, WorkItemMaster.category, WorkItemMaster.item_name)
+        )
+        if _work_item_key(*key) in removed and item_id not in referenced
+    ]
+    for batch in _batched(item_ids):
+        db.execute(delete(WorkItemMaster).where(WorkItemMaster.id.in_(batch)))
+    return len(item_ids)
+
+
+# --- 支払管理 ---------------------------------------------------------------
+
+
+def _parse_payments(rows: Iterable[tuple[int, tuple]]) -> ParsedSheet:
+    parsed = ParsedSheet()
+    for row, values in rows:
+        project_id = to_str(values[1])
+        if not project_id:
+            continue
+
+        payment_id = to_str(values[0])
+        if not payment_id or payment_id.startswith("="):
+            payment_id = f"PAY-{row - 4:03d}"
+
+        parsed.project_names.setdefault(project_id, to_str(values[4]))
+
+        ordered_amount = to_float(values[6], 0.0)
+        paid_amount = to_float(values[8], 0.0)
+        remaining_amount = to_float(values[9], ordered_amount - paid_amount)
+        if remaining_amount < 0:
+            remaining_amount = 0.0
+
+        parsed.rows[payment_id] = {
+            "payment_id": payment_id,
+            "project_id": project_id,
+            "vendor_id": to_str(values[2]),
+            "vendor_name": to_str(values[3]),
+            "work_description": to_str(values[4]),
+            "ordered_amount": ordered_amount,
+            "paid_amount": paid_amount,
+            "remaining_amount": remaining_amount,
+            "status": to_str(values[10]),
+            "note": to_str(values[12]),
+            "paid_at": to_date(values[7]),
+        }
+        parsed.processed += 1
+    return parsed
+
+
+def _apply_payments(db: Session, parsed: ParsedSheet, placeholder: Customer) -> None:
+    _insert_placeholder_projects(db, parsed, placeholder)
+    _bulk_upsert(db, Payment, list(parsed.rows.values()), keys=("payment_id",))
+
+
+# --- orchestration ----------------------------------------------------------
+
+
+def _key_loader(column) -> Callable[[Session], set[str]]:
+    def _load(db: Session) -> set[str]:
+        return set(db.execute(select(column)).scalars())
+
+    return _load
+
+
+def _key_deleter(column) -> Callable[[Session, list[str]], int]:
+    def _delete(db: Session, keys: list[str]) -> int:
+        return sum(db.execute(delete(column.class_).where(column.in_(batch))).rowcount for batch in _batched(keys))
+
+    return _delete
+
+
+def _natural_key(field_name: str) -> Callable[[Mapping], list[str]]:
+    def _keys(fields: Mapping) -> list[str]:
+        return [fields[field_name]]
+
+    return _keys
+
+
+def _work_item_index_keys(fields: Mapping) -> list[str]:
+    # Mirrors _apply_work_items: match by source ID first, then by category + name.
+    keys = [_work_item_key(fields["source_item_id"], fields["category"], fields["item_name"])]
+    if fields["source_item_id"] is not None:
+        keys.append(_work_item_key(None, fields["category"], fields["item_name"]))
+    return keys
+
+
+@dataclass(frozen=True)
+class _SheetSpec:
+    sheet_name: str
+    model: type
+    max_col: int
+    parse: Callable[[Iterable[tuple[int, tuple]]], ParsedSheet]
+    apply: Callable[[Session, ParsedSheet, Customer], None]
+    existing_keys: Callable[[Session], set[str]]
+    # Keys under which a parsed row or DB row can be matched, in priority order.
+    index_keys: Callable[[Mapping], list[str]]
+    # Parsed fields left as None are filled in at apply time rather than overwritten.
+    fallback_fields: tuple[str, ...] = ()
+    # Master sheets have no deleter: API-created ledgers may still reference
+    # customers/projects that were removed from the workbook. Returns the rows deleted.
+    delete: Optional[Callable[[Session, list[str]], int]] = None
+
+
+# Apply order matters: customers → projects → invoices / work items / payments.
+SHEET_SPECS: tuple[_SheetSpec, ...] = (
+    _SheetSpec(
+        sheet_name="顧客マスタ",
+        model=Customer,
+        max_col=18,
+        parse=_parse_customers,
+        apply=_apply_customers,
+        existing_keys=_key_loader(Customer.customer_id),
+        index_keys=_natural_key("customer_id"),
+    ),
+    _SheetSpec(
+        sheet_name="案件管理",
+        model=Project,
+        max_col=32,
+        parse=_parse_projects,
+        apply=_apply_projects,
+        existing_keys=_key_loader(Project.project_id),
+        index_keys=_natural_key("project_id"),
+        fallback_fields=("customer_id", "customer_name", "created_at"),
+    ),
+    _SheetSpec(
+        sheet_name="請求管理",
+        model=Invoice,
+        max_col=12,
+        parse=_parse_invoices,
+        apply=_apply_invoices,
+        existing_keys=_key_loader(Invoice.invoice_id),
+        index_keys=_natural_key("invoice_id"),
+        fallback_fields=("billed_at",),
+        delete=_key_deleter(Invoice.invoice_id),
+    ),
+    _SheetSpec(
+        sheet_name="工事項目DB",
+        model=WorkItemMaster,
+        max_col=9,
+        parse=_parse_work_items,
+        apply=_apply_work_items,
+        existing_keys=_existing_work_item_keys,
+        index_keys=_work_item_index_keys,
+        delete=_delete_work_items,
+    ),
+    _SheetSpec(
+        sheet_name="支払管理",
+        model=Payment,
+        max_col=13,
+        parse=_parse_payments,
+        apply=_apply_payments,
+        existing_keys=_key_loader(Payment.payment_id),
+        index_keys=_natural_key("payment_id"),
+        delete=_key_deleter(Payment.payment_id),
+    ),
+)
+
+
+def _load_checkpoint(db: Session, checkpoint_key: str, sheet_name: str) -> Optional[SyncCheckpoint]:
+    return db.execute(
+        select(SyncCheckpoint).where(
+            SyncCheckpoint.content_sha256 == checkpoint_key,
+            SyncCheckpoint.sheet_name == sheet_name,
+        )
+    ).scalar_one_or_none()
+
+
+def _save_checkpoint(db: Session, checkpoint_key: str, sheet_name: str, rows_committed: int, completed: bool) -> None:
+    _bulk_upsert(
+        db,
+        SyncCheckpoint,
+        [
+            {
+                "content_sha256": checkpoint_key,
+                "sheet_name": sheet_name,
+                "rows_committed": rows_committed,
+                "completed": completed,
+                "updated_at": datetime.utcnow(),
+            }
+        ],
+        keys=("content_sha256", "sheet_name"),
+    )
 
-    wb = load_workbook(source, data_only=True, keep_vba=True)
-
-    customers_upserted = 0
-    projects_upserted = 0
-    invoices_upserted = 0
-    payments_upserted = 0
-    work_items_upserted = 0
-
-    # 1) 顧客マスタ
-    if "顧客マスタ" in wb.sheetnames:
-        ws = wb["顧客マスタ"]
-        for row in range(5, ws.max_row + 1):
-            customer_id = _to_str(ws.cell(row, 1).value)
-            customer_name = _to_str(ws.cell(row, 3).value)
-            if not customer_id or not customer_name:
-                continue
-            existing = db.execute(
-                select(Customer).where(Customer.customer_id == customer_id)
-            ).scalar_one_or_none()
-            if existing is None:
-                existing = Customer(
-                    customer_id=customer_id,
-                    customer_name=customer_name,
-                )
-                db.add(existing)
-            existing.customer_name = customer_name
-            existing.contact_name = _to_str(ws.cell(row, 5).value)
-            existing.status = _to_str(ws.cell(row, 18).value) or "アクティブ"
-            customers_upserted += 1
 
-    db.flush()
-    placeholder = _get_or_create_placeholder_customer(db)
-
-    # 2) 案件管理
-    if "案件管理" in wb.sheetnames:
-        ws = wb["案件管理"]
-        for row in range(5, ws.max_row + 1):
-            project_id = _to_str(ws.cell(row, 1).value)
-            if not project_id or not project_id.startswith("P-"):
-                continue
+def _sync_sheet(
+    db: Session,
+    spec: _SheetSpec,
+    parsed: ParsedSheet,
+    placeholder: Customer,
+    full_resync: bool,
+    chunk_rows: int = 0,
+    checkpoint_key: Optional[str] = None,
+) -> SheetSyncStats:
+    """Apply one sheet's changed rows and update its journal.
+
+    With ``checkpoint_key`` the sheet is committed every ``chunk_rows`` source rows
+    (in parse order) and the committed position is stored, so a rerun of the same
+    workbook continues after the last committed chunk.
+    """
+    stats = SheetSyncStats(rows=parsed.processed)
+    row_hashes = {key: _fingerprint(fields) for key, fields in parsed.rows.items()}
+    sheet_hash = _fingerprint(sorted(row_hashes.items()))
+
+    resume_from = 0
+    if checkpoint_key:
+        checkpoint = _load_checkpoint(db, checkpoint_key, spec.sheet_name)
+        if checkpoint is not None and checkpoint.completed:
+            # Applied by the interrupted attempt, not unchanged: leave ``skipped`` False so
+            # the post-sync refresh still covers these rows.
+            stats.unchanged = stats.resumed = len(row_hashes)
+            return stats
+        resume_from = checkpoint.rows_committed if checkpoint is not None else 0
+
+    stored_sheet_hash = db.execute(
+        select(SyncSheetFingerprint.content_hash).where(SyncSheetFingerprint.sheet_name == spec.sheet_name)
+    ).scalar_one_or_none()
+    if not full_resync and stored_sheet_hash == sheet_hash:
+        stats.unchanged = len(row_hashes)
+        stats.skipped = True
+        return stats
+
+    stored_rows: dict[str, str] = dict(
+        db.execute(
+            select(SyncRowFingerprint.row_key, SyncRowFingerprint.content_hash).where(
+                SyncRowFingerprint.sheet_name == spec.sheet_name
+            )
+        ).all()
+    )
+    pending = list(row_hashes)[resume_from:]
+    changed = {key for key in pending if full_resync or stored_rows.get(key) != row_hashes[key]}
+    removed = [key for key in stored_rows if key not in row_hashes]
+
+    existing_keys = spec.existing_keys(db) if changed else set()
+    stats.inserted = sum(1 for key in changed if key not in existing_keys)
+    stats.updated = len(changed) - stats.inserted
+    stats.unchanged = len(row_hashes) - len(changed)
+    stats.resumed = min(resume_from, len(row_hashes))
+
+    step = chunk_rows if checkpoint_key and chunk_rows > 0 else max(len(pending), 1)
+    for start in range(0, len(pending), step):
+        chunk = {key: parsed.rows[key] for key in pending[start : start + step] if key in changed}
+        if chunk:
+            spec.apply(db, replace(parsed, rows=chunk), placeholder)
+            _bulk_upsert(
+                db,
+                SyncRowFingerprint,
+                [{"sheet_name": spec.sheet_name, "row_key": key, "content_hash": row_hashes[key]} for key in chunk],
+                keys=("sheet_name", "row_key"),
+            )
+        if checkpoint_key and start + step < len(pending):
+            _save_checkpoint(db, checkpoint_key, spec.sheet_name, resume_from + start + step, completed=False)
+            db.commit()
+
+    if removed and spec.delete is not None:
+        stats.deleted = spec.delete(db, removed)
+    for batch in _batched(removed):
+        db.execute(
+            delete(SyncRowFingerprint).where(
+                SyncRowFingerprint.sheet_name == spec.sheet_name,
+                SyncRowFingerprint.row_key.in_(batch),
+            )
+        )
+    _bulk_upsert(
+        db,
+        SyncSheetFingerprint,
+        [
+            {
+                "sheet_name": spec.sheet_name,
+                "content_hash": sheet_hash,
+                "row_count": len(row_hashes),
+                "synced_at": datetime.utcnow(),
+            }
+        ],
+        keys=("sheet_name",),
+    )
+    if checkpoint_key:
+        _save_checkpoint(db, checkpoint_key, spec.sheet_name, len(row_hashes), completed=True)
+        db.commit()
+    return stats
 
-            customer_id = _to_str(ws.cell(row, 2).value) or placeholder.customer_id
-            customer_name = _to_str(ws.cell(row, 3).value) or placeholder.customer_name
-            project_name = _to_str(ws.cell(row, 4).value) or _to_str(ws.cell(row, 32).value) or "案件未設定"
-            project_sheet_name = sanitize_sheet_name(f"{project_id}_{project_name}", f"{project_id}_案件")
-
-            customer = db.execute(
-                select(Customer).where(Customer.customer_id == customer_id)
-            ).scalar_one_or_none()
-            if customer is None:
-                customer = Customer(
-                    customer_id=customer_id,
-                    customer_name=customer_name,
-                    status="アクティブ",
-                )
-                db.add(customer)
-
-            existing = db.execute(
-                select(Project).where(Project.project_id == project_id)
-            ).scalar_one_or_none()
-            if existing is None:
-                existing = Project(
-                    project_id=project_id,
-                    project_sheet_name=project_sheet_name,
-                    customer_id=customer_id,
-                    customer_name=customer_name,
-                    project_name=project_name,
-                    project_status="①リード",
-                )
-                db.add(existing)
-
-            existing.project_sheet_name = project_sheet_name
-            existing.customer_id = customer_id
-            existing.customer_name = customer_name
-            existing.project_name = project_name
-            existing.site_address = _to_str(ws.cell(row, 31).value)
-            existing.owner_name = _to_str(ws.cell(row, 13).value) or "吉野博"
-            existing.target_margin_rate = _to_float(ws.cell(row, 8).value, 0.25) or 0.25
-            existing.project_status = _to_str(ws.cell(row, 9).value) or "①リード"
-            existing.created_at = _to_date(ws.cell(row, 19).value) or date.today()
-            projects_upserted += 1
 
-    db.flush()
+def _interrupted_sync_pending(db: Session) -> bool:
+    """True when a chunked sync committed rows but never reached its final commit.
 
-    # 3) 請求管理
-    if "請求管理" in wb.sheetnames:
-        ws = wb["請求管理"]
-        for row in range(5, ws.max_row + 1):
-            project_id = _to_str(ws.cell(row, 2).value)
-            if not project_id:
-                continue
+    Checkpoints are only removed by that final commit, which also rebuilds the
+    derived totals and search index, so any left over mark those as stale.
+    """
+    return db.execute(select(SyncCheckpoint.id).limit(1)).first() is not None
 
-            invoice_id = _to_str(ws.cell(row, 1).value)
-            if not invoice_id or invoice_id.startswith("="):
-                invoice_id = f"INV-{row - 4:03d}"
-
-            project = db.execute(
-                select(Project).where(Project.project_id == project_id)
-            ).scalar_one_or_none()
-            if project is None:
-                project = Project(
-                    project_id=project_id,
-                    project_sheet_name=sanitize_sheet_name(project_id, f"{project_id}_案件"),
-                    customer_id=placeholder.customer_id,
-                    customer_name=placeholder.customer_name,
-                    project_name=_to_str(ws.cell(row, 3).value) or project_id,
-                    project_status="①リード",
-                    created_at=date.today(),
-                )
-                db.add(project)
-                db.flush()
-
-            existing = db.execute(
-                select(Invoice).where(Invoice.invoice_id == invoice_id)
-            ).scalar_one_or_none()
-            if existing is None:
-                existing = Invoice(
-                    invoice_id=invoice_id,
-                    project_id=project_id,
-                    invoice_amount=0.0,
-                )
-                db.add(existing)
-
-            existing.project_id = project_id
-            existing.invoice_amount = _to_float(ws.cell(row, 7).value, 0.0)
-            existing.billed_at = _to_date(ws.cell(row, 5).value) or existing.billed_at or date.today()
-            existing.note = _to_str(ws.cell(row, 12).value)
-            invoices_upserted += 1
-
-    # 4) 工事項目DB
-    if "工事項目DB" in wb.sheetnames:
-        ws = wb["工事項目DB"]
-        for row in range(5, ws.max_row + 1):
-            category = _to_str(ws.cell(row, 2).value)
-            item_name = _to_str(ws.cell(row, 3).value)
-            if not category or not item_name:
-                continue
 
-            source_item_id = ws.cell(row, 1).value
-            source_item_id_int = int(source_item_id) if isinstance(source_item_id, (int, float)) else None
+def get_cached_sync_result(db: Session, content_sha256: str) -> Optional[SyncResult]:
+    """Return the stored result if this exact workbook was the last one applied."""
+    if _interrupted_sync_pending(db):
+        return None
+    result_json = db.execute(
+        select(WorkbookSyncState.result_json).where(WorkbookSyncState.content_sha256 == content_sha256)
+    ).scalar_one_or_none()
+    if result_json is None:
+        return None
+    payload = json.loads(result_json)
+    payload["sheet_stats"] = {name: SheetSyncStats(**stats) for name, stats in payload["sheet_stats"].items()}
+    payload["cached"] = True
+    return SyncResult(**payload)
+
+
+def _remember_sync_result(db: Session, content_sha256: str, result: SyncResult) -> None:
+    # Only the most recently applied workbook is cached.
+    db.execute(delete(WorkbookSyncState))
+    db.add(
+        WorkbookSyncState(
+            content_sha256=content_sha256,
+            result_json=json.dumps(asdict(result), ensure_ascii=False),
+        )
+    )
 
-            existing = None
-            if source_item_id_int is not None:
-                existing = db.execute(
-                    select(WorkItemMaster).where(WorkItemMaster.source_item_id == source_item_id_int)
-                ).scalar_one_or_none()
-            if existing is None:
-                existing = db.execute(
-                    select(WorkItemMaster).where(
-                        WorkItemMaster.category == category,
-                        WorkItemMaster.item_name == item_name,
-                    )
-                ).scalar_one_or_none()
 
-            if existing is None:
-                existing = WorkItemMaster(
-                    source_item_id=source_item_id_int,
-                    category=category,
-                    item_name=item_name,
-                    standard_unit_price=0.0,
-                )
-                db.add(existing)
-
-            existing.source_item_id = source_item_id_int
-            existing.category = category
-            existing.item_name = item_name
-            existing.specification = _to_str(ws.cell(row, 4).value)
-            existing.unit = _to_str(ws.cell(row, 5).value)
-            existing.standard_unit_price = _to_float(ws.cell(row, 6).value, 0.0)
-            existing.default_vendor_name = _to_str(ws.cell(row, 7).value)
-            margin = ws.cell(row, 9).value
-            existing.margin_rate = _to_float(margin, 0.0) if margin is not None else None
-            work_items_upserted += 1
-
-    # 5) 支払管理
-    if "支払管理" in wb.sheetnames:
-        ws = wb["支払管理"]
-        for row in range(5, ws.max_row + 1):
-            project_id = _to_str(ws.cell(row, 2).value)
-            if not project_id:
-                continue
+def _parse_loaded_sheet(wb, spec: _SheetSpec) -> ParsedSheet:
+    started = time.perf_counter()
+    parsed = spec.parse(_iter_sheet_rows(wb[spec.sheet_name], spec.max_col))
+    parsed.parse_seconds = time.perf_counter() - started
+    return parsed
 
-            payment_id = _to_str(ws.cell(row, 1).value)
-            if not payment_id or payment_id.startswith("="):
-                payment_id = f"PAY-{row - 4:03d}"
-
-            project = db.execute(
-                select(Project).where(Project.project_id == project_id)
-            ).scalar_one_or_none()
-            if project is None:
-                project = Project(
-                    project_id=project_id,
-                    project_sheet_name=sanitize_sheet_name(project_id, f"{project_id}_案件"),
-                    customer_id=placeholder.customer_id,
-                    customer_name=placeholder.customer_name,
-                    project_name=_to_str(ws.cell(row, 5).value) or project_id,
-                    project_status="①リード",
-                    created_at=date.today(),
-                )
-                db.add(project)
-                db.flush()
-
-            existing = db.execute(
-                select(Payment).where(Payment.payment_id == payment_id)
-            ).scalar_one_or_none()
-            if existing is None:
-                existing = Payment(
-                    payment_id=payment_id,
-                    project_id=project_id,
-                )
-                db.add(existing)
-
-            ordered_amount = _to_float(ws.cell(row, 7).value, 0.0)
-            paid_amount = _to_float(ws.cell(row, 9).value, 0.0)
-            remaining_amount = _to_float(ws.cell(row, 10).value, ordered_amount - paid_amount)
-            if remaining_amount < 0:
-                remaining_amount = 0.0
-
-            existing.project_id = project_id
-            existing.vendor_id = _to_str(ws.cell(row, 3).value)
-            existing.vendor_name = _to_str(ws.cell(row, 4).value)
-            existing.work_description = _to_str(ws.cell(row, 5).value)
-            existing.ordered_amount = ordered_amount
-            existing.paid_amount = paid_amount
-            existing.remaining_amount = remaining_amount
-            existing.status = _to_str(ws.cell(row, 11).value)
-            existing.note = _to_str(ws.cell(row, 13).value)
-            existing.paid_at = _to_date(ws.cell(row, 8).value)
-            payments_upserted += 1
 
-    db.commit()
+def _parse_workbook(source: Path) -> dict[str, ParsedSheet]:
+    """Parse stage: every sheet present in the workbook, before anything is applied."""
+    # Read-only mode streams only the sheet XML parts that are iterated, so memory
+    # stays flat regardless of template sheets, VBA payload or row count.
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        return {
+            spec.sheet_name: _parse_loaded_sheet(wb, spec)
+            for spec in SHEET_SPECS
+            if spec.sheet_name in wb.sheetnames
+        }
+    finally:
+        wb.close()
+
+
+def diff_workbook(db: Session, workbook_path: str) -> Iterator[SheetDiff]:
+    """Compare the workbook against current DB state without writing anything.
+
+    Yields each sheet's diff as soon as that sheet is compared. Each sheet is
+    checked with one bulk SELECT indexed by natural key, so the cost does not grow
+    with per-row round trips.
+    """
+    source = Path(workbook_path).expanduser().resolve()
+    if not source.exists():
+        raise FileNotFoundError(f"Workbook not found: {source}")
 
-    return SyncResult(
+    parsed_sheets = _parse_workbook(source)
+    for spec in SHEET_SPECS:
+        parsed = parsed_sheets.get(spec.sheet_name)
+        if parsed is None:
+            continue
+
+        sheet_diff = SheetDiff(sheet_name=spec.sheet_name)
+        field_names = list(next(iter(parsed.rows.values()))) if parsed.rows else []
+        current: dict[str, Mapping] = {}
+        if field_names:
+            columns = [getattr(spec.model, name) for name in field_names]
+            for row in db.execute(select(*columns)).mappings():
+                for key in spec.index_keys(row):
+                    current.setdefault(key, row)
+
+        for key, fields in parsed.rows.items():
+            existing = next((current[k] for k in spec.index_keys(fields) if k in current), None)
+            if existing is None:
+                sheet_diff.new += 1
+                sheet_diff.changes.append(RowChange(key=key, change="new"))
+                continue
+            changed_fields = [
+                name
+                for name, value in fields.items()
+                if not (value is None and name in spec.fallback_fields) and existing[name] != value
+            ]
+            if changed_fields:
+                sheet_diff.changed += 1
+                sheet_diff.changes.append(RowChange(key=key, change="changed", fields=changed_fields))
+            else:
+                sheet_diff.unchanged += 1
+
+        if spec.delete is not None:
+            journal_keys = db.execute(
+                select(SyncRowFingerprint.row_key).where(SyncRowFingerprint.sheet_name == spec.sheet_name)
+            ).scalars()
+            for key in journal_keys:
+                if key not in parsed.rows:
+                    sheet_diff.removed += 1
+                    sheet_diff.changes.append(RowChange(key=key, change="removed"))
+
+        yield sheet_diff
+
+
+def sync_from_workbook(
+    db: Session,
+    workbook_path: str,
+    full_resync: bool = False,
+    content_sha256: Optional[str] = None,
+    progress: Optional[SyncProgress] = None,
+    commit_chunk_rows: Optional[int] = None,
+) -> SyncResult:
+    """Apply the workbook to the DB, writing only rows whose content changed.
+
+    Every source row and sheet is fingerprinted into the sync journal. Sheets whose
+    hash matches the previous sync are skipped; ``full_resync`` rewrites every row.
+    When ``content_sha256`` is given the result is cached for repeated uploads.
+    Sheets are parsed first, then applied in a single ordered pass. When
+    ``commit_chunk_rows`` (default ``APP_SYNC_COMMIT_CHUNK_ROWS``) is positive,
+    each sheet commits every that many rows and records a checkpoint keyed by the
+    workbook's SHA-256, so rerunning an interrupted sync of the same file resumes
+    after the last committed chunk. The derived totals and search index are
+    rebuilt whenever an interrupted run left checkpoints behind, even if every
+    sheet is skipped.
+    """
+    source = Path(workbook_path).expanduser().resolve()
+    if not source.exists():
+        raise FileNotFoundError(f"Workbook not found: {source}")
+
+    parsed_sheets = _parse_workbook(source)
+
+    derived_stale = _interrupted_sync_pending(db)
+
+    chunk_rows = SYNC_COMMIT_CHUNK_ROWS if commit_chunk_rows is None else commit_chunk_rows
+    checkpoint_key: Optional[str] = None
+    if chunk_rows > 0:
+        checkpoint_key = content_sha256 or _file_sha256(source)
+        # Checkpoints of any other workbook can no longer be resumed.
+        db.execute(delete(SyncCheckpoint).where(SyncCheckpoint.content_sha256 != checkpoint_key))
+
+    processed: dict[str, int] = {}
+    sheet_timings: dict[str, float] = {}
+    sheet_stats: dict[str, SheetSyncStats] = {}
+    placeholder: Optional[Customer] = None
+
+    for spec in SHEET_SPECS:
+        if placeholder is None and spec.sheet_name != "顧客マスタ":
+            placeholder = _get_or_create_placeholder_customer(db)
+        parsed = parsed_sheets.get(spec.sheet_name)
+        if parsed is None:
+            continue
+
+        if progress:
+            progress(spec.sheet_name, None)
+        started = time.perf_counter()
+        sheet_stats[spec.sheet_name] = _sync_sheet(
+            db, spec, parsed, placeholder, full_resync, chunk_rows=chunk_rows, checkpoint_key=checkpoint_key
+        )
+        sheet_timings[spec.sheet_name] = round(parsed.parse_seconds + time.perf_counter() - started, 4)
+        processed[spec.sheet_name] = parsed.processed
+        if progress:
+            progress(spec.sheet_name, sheet_stats[spec.sheet_name])
+
+    result = SyncResult(
         workbook_path=str(source),
-        customers_upserted=customers_upserted,
-        projects_upserted=projects_upserted,
-        invoices_upserted=invoices_upserted,
-        payments_upserted=payments_upserted,
-        work_items_upserted=work_items_upserted,
+        customers_upserted=processed.get("顧客マスタ", 0),
+        projects_upserted=processed.get("案件管理", 0),
+        invoices_upserted=processed.get("請求管理", 0),
+        payments_upserted=processed.get("支払管理", 0),
+        work_items_upserted=processed.get("工事項目DB", 0),
+        sheet_timings=sheet_timings,
+        sheet_stats=sheet_stats,
+    )
+    if content_sha256:
+        _remember_sync_result(db, content_sha256, result)
+    else:
+        db.execute(delete(WorkbookSyncState))
+    if checkpoint_key or derived_stale:
+        db.execute(delete(SyncCheckpoint))
+    if derived_stale or not all(stats.skipped for stats in sheet_stats.values()):
+        rebuild_dashboard_aggregates(db)
+        rebuild_project_rollups(db)
+    work_item_stats = sheet_stats.get("工事項目DB")
+    work_items_changed = derived_stale or (work_item_stats is not None and not work_item_stats.skipped)
+    if work_items_changed:
+        refresh_work_item_search_index(db)
+    # Keep the id counters ahead of every project/invoice/payment id the workbook carries.
+    advance_id_sequences(
+        db,
+        (
+            key
+            for name in ("案件管理", "請求管理", "支払管理")
+            if name in parsed_sheets
+            for key in (*parsed_sheets[name].rows, *parsed_sheets[name].project_names)
+        ),
     )
+    db.commit()
+    publish_dashboard_change()
+    if work_items_changed:
+        invalidate_work_item_catalog()
+    return result
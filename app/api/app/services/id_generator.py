@@ -1,20 +1,40 @@
-"""ID generation helpers compatible with Excel rules."""
+"""ID generation helpers compatible with Excel rules.
+
+Numbers come from the ``id_sequences`` table (one counter row per prefix) so an
+allocation is a single atomic ``UPDATE ... RETURNING`` instead of a table scan.
+On Postgres the row lock serialises concurrent creators until commit; on SQLite
+the UPDATE opens the transaction with the write lock (as ``BEGIN IMMEDIATE``
+would), so two requests can never be handed the same number.
+"""
 
 from __future__ import annotations
 
 import re
+from collections.abc import Iterable
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
-from ..models import Invoice, Payment, Project
+from ..database import dialect_insert
+from ..models import IdSequence, Invoice, Payment, Project
 
 PROJECT_ID_PATTERN = re.compile(r"^P-(\d+)$")
 INVOICE_ID_PATTERN = re.compile(r"^INV-(\d+)$")
 PAYMENT_ID_PATTERN = re.compile(r"^PAY-(\d+)$")
 
+# prefix -> (id column, pattern)
+ID_PREFIXES = {
+    "P": (Project.project_id, PROJECT_ID_PATTERN),
+    "INV": (Invoice.invoice_id, INVOICE_ID_PATTERN),
+    "PAY": (Payment.payment_id, PAYMENT_ID_PATTERN),
+}
+
+
+def format_id(prefix: str, number: int) -> str:
+    return f"{prefix}-{number:03d}"
 
-def _get_next_prefixed_id(ids: list[str], pattern: re.Pattern[str], prefix: str) -> str:
+
+def _max_number(ids: Iterable[str], pattern: re.Pattern[str]) -> int:
     max_num = 0
     for raw in ids:
         value = (raw or "").strip()
@@ -24,19 +44,77 @@ def _get_next_prefixed_id(ids: list[str], pattern: re.Pattern[str], prefix: str)
         n = int(m.group(1))
         if n > max_num:
             max_num = n
-    return f"{prefix}-{max_num + 1:03d}"
+    return max_num
+
+
+def _ensure_sequence(db: Session, prefix: str) -> None:
+    """Create the counter row on first use, seeded from the highest existing id."""
+    if db.execute(select(IdSequence.id).where(IdSequence.prefix == prefix)).first() is not None:
+        return
+    column, pattern = ID_PREFIXES[prefix]
+    seed = _max_number(db.execute(select(column)).scalars(), pattern)
+    stmt = dialect_insert(db, IdSequence.__table__).values(prefix=prefix, last_value=seed)
+    db.execute(stmt.on_conflict_do_nothing(index_elements=["prefix"]))
+
+
+def allocate_id_numbers(db: Session, prefix: str, count: int = 1) -> range:
+    """Atomically reserve ``count`` consecutive numbers for ``prefix``; does not commit."""
+    if prefix not in ID_PREFIXES:
+        raise ValueError(f"Unknown id prefix: {prefix}")
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    _ensure_sequence(db, prefix)
+    last_value = db.execute(
+        update(IdSequence)
+        .where(IdSequence.prefix == prefix)
+        .values(last_value=IdSequence.last_value + count)
+        .returning(IdSequence.last_value)
+    ).scalar_one()
+    return range(last_value - count + 1, last_value + 1)
+
+
+def reserve_ids(db: Session, prefix: str, count: int) -> list[str]:
+    """Reserve a contiguous block of formatted ids (e.g. INV-101..INV-600); does not commit."""
+    return [format_id(prefix, number) for number in allocate_id_numbers(db, prefix, count)]
+
+
+def _advance(db: Session, prefix: str, number: int) -> None:
+    _ensure_sequence(db, prefix)
+    db.execute(
+        update(IdSequence)
+        .where(IdSequence.prefix == prefix, IdSequence.last_value < number)
+        .values(last_value=number)
+    )
+
+
+def advance_id_sequences(db: Session, ids: Iterable[str]) -> None:
+    """Move counters past explicitly supplied or imported ids; never moves them back."""
+    highest: dict[str, int] = {}
+    for raw in ids:
+        value = (raw or "").strip()
+        for prefix, (_, pattern) in ID_PREFIXES.items():
+            m = pattern.match(value)
+            if m:
+                highest[prefix] = max(highest.get(prefix, 0), int(m.group(1)))
+                break
+
+    for prefix, number in highest.items():
+        _advance(db, prefix, number)
+
+
+def reseed_id_sequences(db: Session) -> None:
+    """Raise every counter to the highest id in its table (rows may predate the counters)."""
+    for prefix, (column, pattern) in ID_PREFIXES.items():
+        _advance(db, prefix, _max_number(db.execute(select(column)).scalars(), pattern))
 
 
 def get_next_project_id(db: Session) -> str:
-    rows = db.execute(select(Project.project_id)).scalars().all()
-    return _get_next_prefixed_id(rows, PROJECT_ID_PATTERN, "P")
+    return format_id("P", allocate_id_numbers(db, "P")[0])
 
 
 def get_next_invoice_id(db: Session) -> str:
-    rows = db.execute(select(Invoice.invoice_id)).scalars().all()
-    return _get_next_prefixed_id(rows, INVOICE_ID_PATTERN, "INV")
+    return format_id("INV", allocate_id_numbers(db, "INV")[0])
 
 
 def get_next_payment_id(db: Session) -> str:
-    rows = db.execute(select(Payment.payment_id)).scalars().all()
-    return _get_next_prefixed_id(rows, PAYMENT_ID_PATTERN, "PAY")
+    return format_id("PAY", allocate_id_numbers(db, "PAY")[0])
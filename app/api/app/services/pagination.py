@@ -0,0 +1,76 @@
+"""Keyset pagination and row totals for the list endpoints.
+
+Pages are ordered by the business id and continue from ``after=<last id>``, so
+fetching page N costs an index seek instead of scanning the N-1 pages before it
+(as ``OFFSET`` does). One extra row is fetched to learn whether another page
+exists without a second query.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Optional
+
+from fastapi import Response
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+TOTAL_COUNT_HEADER = "X-Total-Count"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def keyset_page(
+    db: Session,
+    stmt: Select,
+    key,
+    after: Optional[str],
+    limit: int,
+    offset: int = 0,
+) -> tuple[Sequence, Optional[str]]:
+    """Return one page of ``stmt`` ordered by ``key`` and the cursor for the next page.
+
+    ``offset`` is kept for existing clients and applies on top of the cursor.
+    """
+    if after:
+        stmt = stmt.where(key > after)
+    stmt = stmt.order_by(key.asc()).offset(offset).limit(limit + 1)
+    rows = db.execute(stmt).scalars().all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, getattr(rows[-1], key.key)
+
+
+def _estimated_rows(db: Session, table_name: str) -> Optional[int]:
+    """Planner row estimate on Postgres; ``None`` elsewhere or before the table is analyzed."""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    estimate = db.execute(
+        text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"), {"name": table_name}
+    ).scalar()
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+def count_rows(db: Session, stmt: Select, estimate: bool = False) -> int:
+    """Count the rows matched by ``stmt`` (filters only, before paging).
+
+    With ``estimate`` an unfiltered count on Postgres reads ``pg_class.reltuples``
+    instead of scanning the table.
+    """
+    if estimate and stmt.whereclause is None:
+        froms = stmt.get_final_froms()
+        if len(froms) == 1:
+            estimated = _estimated_rows(db, froms[0].name)
+            if estimated is not None:
+                return estimated
+    return db.execute(select(func.count()).select_from(stmt.order_by(None).subquery())).scalar_one()
+
+
+def set_page_headers(response: Response, total: int, next_cursor: Optional[str]) -> None:
+    """Expose paging state on endpoints whose body is a bare list."""
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
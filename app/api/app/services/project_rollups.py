@@ -0,0 +1,137 @@
+"""Per-project estimate, invoice and payment totals stored in ``project_rollups``."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from ..database import dialect_insert
+from ..models import Invoice, Payment, Project, ProjectItem, ProjectRollup
+from ..schemas import ProjectRollupRead
+from .dashboard_aggregates import (
+    INVOICE_AMOUNT,
+    INVOICE_REMAINING,
+    ITEM_LINE_TOTAL,
+    PAYMENT_ORDERED,
+    PAYMENT_REMAINING,
+)
+
+# (project_id, metric, bucket)
+RollupKey = tuple[str, str, str]
+
+
+def rollup_deltas(project_id: str, deltas: Mapping[str, float], bucket: str = "") -> dict[RollupKey, float]:
+    """Key dashboard-style ``deltas`` (metric -> amount) by project and bucket."""
+    return {(project_id, metric, bucket): float(delta) for metric, delta in deltas.items()}
+
+
+def merge_rollup_deltas(parts: Iterable[Mapping[RollupKey, float]]) -> dict[RollupKey, float]:
+    merged: dict[RollupKey, float] = {}
+    for part in parts:
+        for key, delta in part.items():
+            merged[key] = merged.get(key, 0.0) + delta
+    return merged
+
+
+def adjust_project_rollups(db: Session, deltas: Mapping[RollupKey, float]) -> None:
+    """Add signed ``deltas`` to the stored rollups; does not commit.
+
+    Keys must be unique within one call (Postgres rejects an upsert touching the
+    same row twice), so merge per-row deltas with ``merge_rollup_deltas`` first.
+    """
+    rows = [
+        {"project_id": project_id, "metric": metric, "bucket": bucket, "value": float(delta)}
+        for (project_id, metric, bucket), delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+    table = ProjectRollup.__table__
+    stmt = dialect_insert(db, table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["project_id", "metric", "bucket"],
+        set_={"value": table.c.value + stmt.excluded.value},
+    )
+    db.execute(stmt)
+
+
+def rebuild_project_rollups(db: Session) -> None:
+    """Recompute every project's rollup from the source tables; does not commit."""
+    rows = [
+        {"project_id": project_id, "metric": ITEM_LINE_TOTAL, "bucket": category, "value": float(total or 0.0)}
+        for project_id, category, total in db.execute(
+            select(ProjectItem.project_id, ProjectItem.category, func.sum(ProjectItem.line_total)).group_by(
+                ProjectItem.project_id, ProjectItem.category
+            )
+        )
+    ]
+    ledgers = (
+        (Invoice, {INVOICE_AMOUNT: Invoice.invoice_amount, INVOICE_REMAINING: Invoice.remaining_amount}),
+        (Payment, {PAYMENT_ORDERED: Payment.ordered_amount, PAYMENT_REMAINING: Payment.remaining_amount}),
+    )
+    for model, metrics in ledgers:
+        columns = [func.sum(column) for column in metrics.values()]
+        for project_id, *totals in db.execute(select(model.project_id, *columns).group_by(model.project_id)):
+            rows.extend(
+                {"project_id": project_id, "metric": metric, "bucket": "", "value": float(total or 0.0)}
+                for metric, total in zip(metrics, totals)
+            )
+
+    db.execute(delete(ProjectRollup))
+    if rows:
+        db.execute(insert(ProjectRollup), rows)
+
+
+def _margin_rate(profit: float, base: float) -> Optional[float]:
+    return round(profit / base, 4) if base > 0 else None
+
+
+def read_project_rollups(db: Session, project_ids: Iterable[str]) -> dict[str, ProjectRollupRead]:
+    """Rollups for the existing projects among ``project_ids``, with two queries however many are asked for."""
+    targets = dict(
+        db.execute(
+            select(Project.project_id, Project.target_margin_rate).where(Project.project_id.in_(set(project_ids)))
+        ).all()
+    )
+    if not targets:
+        return {}
+
+    subtotals: dict[str, dict[str, float]] = {project_id: {} for project_id in targets}
+    totals: dict[str, dict[str, float]] = {project_id: {} for project_id in targets}
+    for project_id, metric, bucket, value in db.execute(
+        select(ProjectRollup.project_id, ProjectRollup.metric, ProjectRollup.bucket, ProjectRollup.value)
+        .where(ProjectRollup.project_id.in_(targets))
+        .order_by(ProjectRollup.project_id, ProjectRollup.metric, ProjectRollup.bucket)
+    ):
+        if metric == ITEM_LINE_TOTAL:
+            # Categories emptied by deletes keep a zero row; drop them from the breakdown.
+            if round(value, 2):
+                subtotals[project_id][bucket] = float(value)
+        else:
+            totals[project_id][metric] = float(value)
+
+    rollups = {}
+    for project_id, target_margin_rate in targets.items():
+        estimate_total = sum(subtotals[project_id].values())
+        invoice_total = totals[project_id].get(INVOICE_AMOUNT, 0.0)
+        payment_total = totals[project_id].get(PAYMENT_ORDERED, 0.0)
+        gross_profit = invoice_total - payment_total
+        achieved = _margin_rate(gross_profit, invoice_total)
+        rollups[project_id] = ProjectRollupRead(
+            project_id=project_id,
+            category_subtotals=subtotals[project_id],
+            estimate_total=estimate_total,
+            invoice_total=invoice_total,
+            invoice_remaining=totals[project_id].get(INVOICE_REMAINING, 0.0),
+            payment_total=payment_total,
+            payment_remaining=totals[project_id].get(PAYMENT_REMAINING, 0.0),
+            gross_profit=gross_profit,
+            estimated_margin_rate=_margin_rate(estimate_total - payment_total, estimate_total),
+            achieved_margin_rate=achieved,
+            target_margin_rate=target_margin_rate,
+            margin_gap=round(achieved - target_margin_rate, 4) if achieved is not None else None,
+        )
+    return rollups
@@ -0,0 +1,148 @@
+"""In-process background queue for Excel sync jobs."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Optional
+
+from ..database import SessionLocal
+from .excel_sync import SheetSyncStats, SyncProgress, SyncResult, get_cached_sync_result, sync_from_workbook
+
+# Every sync, inline or queued, holds this lock so two syncs never write the same tables.
+SYNC_LOCK = threading.Lock()
+
+# Finished jobs kept for polling before the oldest are dropped.
+MAX_FINISHED_JOBS = 50
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="excel-sync")
+_jobs: dict[str, "SyncJob"] = {}
+_jobs_lock = threading.Lock()
+
+
+@dataclass
+class SyncJob:
+    job_id: str
+    status: str = "queued"
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+    current_sheet: Optional[str] = None
+    sheet_stats: dict[str, SheetSyncStats] = field(default_factory=dict)
+    result: Optional[SyncResult] = None
+    error: Optional[str] = None
+
+
+def _sync_unless_cached(
+    db,
+    workbook_path: str,
+    full_resync: bool,
+    content_sha256: Optional[str],
+    progress: Optional[SyncProgress] = None,
+) -> SyncResult:
+    # Caller holds SYNC_LOCK, so the cached result cannot be replaced by a sync finishing meanwhile.
+    if content_sha256 and not full_resync:
+        cached = get_cached_sync_result(db, content_sha256)
+        if cached is not None:
+            return cached
+    return sync_from_workbook(
+        db, workbook_path, full_resync=full_resync, content_sha256=content_sha256, progress=progress
+    )
+
+
+def run_sync_serialised(
+    workbook_path: str,
+    db,
+    full_resync: bool = False,
+    content_sha256: Optional[str] = None,
+) -> SyncResult:
+    """Run a sync in the caller's thread while holding the global sync lock.
+
+    With ``content_sha256`` the stored result of that workbook is returned instead
+    when it was the last one applied, unless ``full_resync`` is set.
+    """
+    with SYNC_LOCK:
+        return _sync_unless_cached(db, workbook_path, full_resync, content_sha256)
+
+
+def get_sync_job(job_id: str) -> Optional[SyncJob]:
+    """Return a snapshot of the job so callers never observe a half-updated record."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        return replace(job, sheet_stats=dict(job.sheet_stats))
+
+
+def _register(job: SyncJob) -> None:
+    with _jobs_lock:
+        _jobs[job.job_id] = job
+        finished = [j for j in _jobs.values() if j.finished_at is not None]
+        if len(finished) > MAX_FINISHED_JOBS:
+            finished.sort(key=lambda j: j.finished_at)
+            for stale in finished[: len(finished) - MAX_FINISHED_JOBS]:
+                _jobs.pop(stale.job_id, None)
+
+
+def submit_sync_job(
+    workbook_path: str,
+    full_resync: bool = False,
+    content_sha256: Optional[str] = None,
+    remove_after: bool = False,
+) -> SyncJob:
+    """Queue a sync on the single worker thread and return immediately.
+
+    ``remove_after`` hands ownership of ``workbook_path`` (an upload temp file) to the job.
+    """
+    job = SyncJob(job_id=uuid.uuid4().hex)
+    _register(job)
+    _executor.submit(_run_job, job, workbook_path, full_resync, content_sha256, remove_after)
+    return get_sync_job(job.job_id)
+
+
+def _run_job(
+    job: SyncJob,
+    workbook_path: str,
+    full_resync: bool,
+    content_sha256: Optional[str],
+    remove_after: bool,
+) -> None:
+    def on_progress(sheet_name: str, stats: Optional[SheetSyncStats]) -> None:
+        with _jobs_lock:
+            if stats is None:
+                job.current_sheet = sheet_name
+            else:
+                job.sheet_stats[sheet_name] = stats
+                job.current_sheet = None
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        with SYNC_LOCK:
+            with _jobs_lock:
+                job.status = "running"
+                job.started_at = datetime.utcnow()
+            result = _sync_unless_cached(db, workbook_path, full_resync, content_sha256, progress=on_progress)
+        with _jobs_lock:
+            job.result = result
+            job.sheet_stats.update(result.sheet_stats)
+            job.status = "succeeded"
+    except Exception as exc:  # noqa: BLE001 - surfaced to the poller instead of lost in the worker
+        db.rollback()
+        with _jobs_lock:
+            job.error = str(exc)
+            job.status = "failed"
+    finally:
+        db.close()
+        if remove_after and os.path.exists(workbook_path):
+            os.unlink(workbook_path)
+        with _jobs_lock:
+            job.current_sheet = None
+            job.finished_at = datetime.utcnow()
+            job.duration_seconds = round(time.perf_counter() - started, 4)
@@ -0,0 +1,150 @@
+"""Process-local, read-through catalog of the work item master for type-ahead.
+
+The estimate screen asks for suggestions on every keystroke. The catalog keeps
+the whole master in memory as one sorted tuple of read models plus an n-gram
+map (character and bigram -> ascending item positions, stored as compact
+``array('I')``), so a suggestion is a few set intersections with no database
+session. Text is normalised like the DB search index (NFKC, case, katakana to
+hiragana). The catalog is dropped by ``invalidate_work_item_catalog`` when a
+sync changes the master, and reloaded after ``WORK_ITEM_CATALOG_TTL_SECONDS`` so
+other workers' copies cannot stay stale for long.
+"""
+
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from array import array
+from collections.abc import Iterable
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..config import WORK_ITEM_CATALOG_TTL_SECONDS
+from ..database import SessionLocal
+from ..models import WorkItemMaster
+from ..schemas import WorkItemMasterRead
+from .work_item_search import item_search_fields, normalize_search_text, score_match, text_bigrams
+
+
+def _query_grams(tokens: Iterable[str]) -> set[str]:
+    grams: set[str] = set()
+    for token in tokens:
+        grams.update(text_bigrams(token) if len(token) > 1 else token)
+    return grams
+
+
+class WorkItemCatalog:
+    def __init__(self, items: Iterable[WorkItemMasterRead]) -> None:
+        self.items = tuple(sorted(items, key=lambda item: (item.category, item.item_name, item.id)))
+        self._fields = tuple(
+            item_search_fields(item.category, item.item_name, item.specification) for item in self.items
+        )
+        postings: dict[str, array] = {}
+        for position, fields in enumerate(self._fields):
+            keys: set[str] = set()
+            for field in fields:
+                keys.update(field.replace(" ", ""))
+                keys.update(text_bigrams(field))
+            for key in keys:
+                postings.setdefault(key, array("I")).append(position)
+        self._postings = postings
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def suggest(self, q: str, category: Optional[str] = None, limit: int = 20) -> list[WorkItemMasterRead]:
+        """Items containing every term of ``q``, ranked like ``/work-items?q=``."""
+        query = " ".join(normalize_search_text(q).split())
+        tokens = query.split()
+        if not tokens:
+            return []
+
+        lists = [self._postings.get(gram) for gram in _query_grams(tokens)]
+        if any(positions is None for positions in lists):
+            return []
+        lists.sort(key=len)
+        candidates = set(lists[0])
+        for positions in lists[1:]:
+            candidates.intersection_update(positions)
+            if not candidates:
+                return []
+
+        scored = []
+        for position in candidates:
+            item = self.items[position]
+            if category and item.category != category:
+                continue
+            score = score_match(self._fields[position], query, tokens)
+            if score:
+                # Items are pre-sorted, so the position breaks ties by category and name.
+                scored.append((-score, position))
+        return [self.items[position] for _, position in heapq.nsmallest(limit, scored)]
+
+
+def load_work_item_catalog(db: Session) -> WorkItemCatalog:
+    rows = db.execute(
+        select(
+            WorkItemMaster.id,
+            WorkItemMaster.source_item_id,
+            WorkItemMaster.category,
+            WorkItemMaster.item_name,
+            WorkItemMaster.specification,
+            WorkItemMaster.unit,
+            WorkItemMaster.standard_unit_price,
+            WorkItemMaster.default_vendor_name,
+            WorkItemMaster.margin_rate,
+        )
+    ).mappings()
+    return WorkItemCatalog(WorkItemMasterRead(**row) for row in rows)
+
+
+_catalog: Optional[WorkItemCatalog] = None
+_expires_at = 0.0
+# Bumped on every invalidation so a catalog loaded before a sync is not kept after it.
+_generation = 0
+_state_lock = threading.Lock()
+_load_lock = threading.Lock()
+
+
+def invalidate_work_item_catalog() -> None:
+    """Drop the catalog; call after committing a change to the work item master."""
+    global _catalog, _generation
+    with _state_lock:
+        _catalog = None
+        _generation += 1
+
+
+def _current() -> Optional[WorkItemCatalog]:
+    with _state_lock:
+        if _catalog is not None and _expires_at > time.monotonic():
+            return _catalog
+    return None
+
+
+def get_work_item_catalog() -> WorkItemCatalog:
+    """Return the cached catalog, loading it with a private session when missing or expired."""
+    global _catalog, _expires_at
+    catalog = _current()
+    if catalog is not None:
+        return catalog
+
+    # One loader at a time; concurrent callers reuse its result.
+    with _load_lock:
+        catalog = _current()
+        if catalog is not None:
+            return catalog
+        with _state_lock:
+            generation = _generation
+        db = SessionLocal()
+        try:
+            catalog = load_work_item_catalog(db)
+        finally:
+            db.close()
+        with _state_lock:
+            if WORK_ITEM_CATALOG_TTL_SECONDS > 0 and generation == _generation:
+                _catalog = catalog
+                _expires_at = time.monotonic() + WORK_ITEM_CATALOG_TTL_SECONDS
+    return catalog
@@ -0,0 +1,206 @@
+"""Bigram search index over the work item master.
+
+Item names are Japanese without word boundaries, so ``LIKE '%q%'`` cannot use an
+index. Every item's category, name and specification are normalised and split
+into character bigrams stored in ``work_item_search_grams``, and the normalised
+text is kept on the item. A query narrows to the items that contain all of its
+bigrams through the ``(gram, item_id)`` index, then verifies, ranks and limits
+them against the normalised text in one SQL statement, so only the returned rows
+are loaded. The same tables work on SQLite and Postgres. One-character queries
+have no bigram and fall back to ``LIKE`` on the raw columns.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import unicodedata
+from collections.abc import Iterable, Sequence
+from typing import Optional
+
+from sqlalchemy import case, delete, insert, intersect, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..models import WorkItemMaster, WorkItemSearchGram
+
+# Bump when normalisation or gram extraction changes; every item is then reindexed.
+SEARCH_INDEX_VERSION = "3"
+REINDEX_BATCH_ROWS = 1000
+
+# Field weights: a hit in the name outranks the category, which outranks the spec.
+NAME_WEIGHT = 3
+CATEGORY_WEIGHT = 2
+SPECIFICATION_WEIGHT = 1
+EXACT_NAME_BONUS = 10
+NAME_PREFIX_BONUS = 5
+
+
+# Katakana ァ..ヶ map onto hiragana ぁ..ゖ, so "ボード" and "ぼーど" match.
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(ord("ァ"), ord("ヶ") + 1)}
+
+
+def normalize_search_text(value: Optional[str]) -> str:
+    """Fold full-width/half-width forms (NFKC), letter case and katakana/hiragana."""
+    return unicodedata.normalize("NFKC", value or "").casefold().translate(_KATAKANA_TO_HIRAGANA)
+
+
+def text_bigrams(text: str) -> set[str]:
+    grams: set[str] = set()
+    for token in text.split():
+        grams.update(token[i : i + 2] for i in range(len(token) - 1))
+    return grams
+
+
+def item_search_fields(
+    category: Optional[str], item_name: Optional[str], specification: Optional[str]
+) -> tuple[str, str, str]:
+    """Normalised (name, category, specification), the order ``score_match`` expects."""
+    return (
+        normalize_search_text(item_name),
+        normalize_search_text(category),
+        normalize_search_text(specification),
+    )
+
+
+def _signature(fields: Sequence[str]) -> str:
+    return hashlib.sha1("\x1f".join((SEARCH_INDEX_VERSION, *fields)).encode("utf-8")).hexdigest()
+
+
+def _batched(values: list, size: int = REINDEX_BATCH_ROWS) -> Iterable[list]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def refresh_work_item_search_index(db: Session) -> int:
+    """Reindex items whose text changed since they were last indexed; returns how many. Does not commit.
+
+    Unchanged items cost one signature comparison, so this is cheap to run after
+    every sync and at startup.
+    """
+    stale: dict[int, dict] = {}
+    grams: list[dict] = []
+    for item_id, category, item_name, specification, signature in db.execute(
+        select(
+            WorkItemMaster.id,
+            WorkItemMaster.category,
+            WorkItemMaster.item_name,
+            WorkItemMaster.specification,
+            WorkItemMaster.search_signature,
+        )
+    ):
+        fields = item_search_fields(category, item_name, specification)
+        current = _signature(fields)
+        if current == signature:
+            continue
+        stale[item_id] = {
+            "id": item_id,
+            "search_signature": current,
+            "search_name": fields[0],
+            "search_category": fields[1],
+            "search_specification": fields[2],
+        }
+        item_grams = set().union(*(text_bigrams(field) for field in fields))
+        grams.extend({"gram": gram, "item_id": item_id} for gram in item_grams)
+
+    # Grams of deleted items (SQLite does not enforce the cascade).
+    db.execute(
+        delete(WorkItemSearchGram).where(WorkItemSearchGram.item_id.not_in(select(WorkItemMaster.id)))
+    )
+    for batch in _batched(list(stale)):
+        db.execute(delete(WorkItemSearchGram).where(WorkItemSearchGram.item_id.in_(batch)))
+    for batch in _batched(grams):
+        db.execute(insert(WorkItemSearchGram), batch)
+    for batch in _batched(list(stale.values())):
+        db.execute(update(WorkItemMaster), batch)
+    return len(stale)
+
+
+def score_match(fields: tuple[str, str, str], query: str, tokens: list[str]) -> int:
+    """Rank an item's normalised fields against the query; 0 means a token is missing."""
+    name, category, specification = fields
+    score = 0
+    for token in tokens:
+        if token in name:
+            score += NAME_WEIGHT
+        elif token in category:
+            score += CATEGORY_WEIGHT
+        elif token in specification:
+            score += SPECIFICATION_WEIGHT
+        else:
+            return 0
+    if name == query:
+        score += EXACT_NAME_BONUS
+    elif name.startswith(query):
+        score += NAME_PREFIX_BONUS
+    return score
+
+
+def _like_fallback(db: Session, q: str, category: Optional[str], limit: int) -> list[WorkItemMaster]:
+    """Single-character queries: rank in SQL so only ``limit`` rows are loaded."""
+    like = f"%{q}%"
+    rank = case(
+        (WorkItemMaster.item_name.like(f"{q}%"), NAME_WEIGHT + NAME_PREFIX_BONUS),
+        (WorkItemMaster.item_name.like(like), NAME_WEIGHT),
+        (WorkItemMaster.category.like(like), CATEGORY_WEIGHT),
+        else_=SPECIFICATION_WEIGHT,
+    )
+    stmt = select(WorkItemMaster).where(
+        or_(
+            WorkItemMaster.item_name.like(like),
+            WorkItemMaster.category.like(like),
+            WorkItemMaster.specification.like(like),
+        )
+    )
+    if category:
+        stmt = stmt.where(WorkItemMaster.category == category)
+    stmt = stmt.order_by(
+        rank.desc(), WorkItemMaster.category.asc(), WorkItemMaster.item_name.asc(), WorkItemMaster.id.asc()
+    ).limit(limit)
+    return list(db.execute(stmt).scalars())
+
+
+def search_work_items(
+    db: Session,
+    q: str,
+    category: Optional[str] = None,
+    limit: int = 100,
+) -> list[WorkItemMaster]:
+    """Return items matching every whitespace-separated term of ``q``, best match first."""
+    query = " ".join(normalize_search_text(q).split())
+    tokens = query.split()
+    if not tokens:
+        return []
+
+    grams = text_bigrams(query)
+    if not grams:
+        return _like_fallback(db, q.strip(), category, limit)
+
+    # Items holding every query bigram; INTERSECT lets each posting list be read once off the index.
+    candidates = intersect(
+        *(select(WorkItemSearchGram.item_id).where(WorkItemSearchGram.gram == gram) for gram in sorted(grams))
+    )
+    name, category_text, specification = (
+        WorkItemMaster.search_name,
+        WorkItemMaster.search_category,
+        WorkItemMaster.search_specification,
+    )
+    # Mirrors score_match: every token must hit a field, scored by the best field it hits.
+    token_hits = []
+    score = case(
+        (name == query, EXACT_NAME_BONUS),
+        (name.startswith(query, autoescape=True), NAME_PREFIX_BONUS),
+        else_=0,
+    )
+    for token in tokens:
+        in_name = name.contains(token, autoescape=True)
+        in_category = category_text.contains(token, autoescape=True)
+        in_specification = specification.contains(token, autoescape=True)
+        token_hits.append(or_(in_name, in_category, in_specification))
+        score = score + case((in_name, NAME_WEIGHT), (in_category, CATEGORY_WEIGHT), else_=SPECIFICATION_WEIGHT)
+
+    stmt = select(WorkItemMaster).where(WorkItemMaster.id.in_(candidates), *token_hits)
+    if category:
+        stmt = stmt.where(WorkItemMaster.category == category)
+    stmt = stmt.order_by(
+        score.desc(), WorkItemMaster.category.asc(), WorkItemMaster.item_name.asc(), WorkItemMaster.id.asc()
+    ).limit(limit)
+    return list(db.execute(stmt).scalars())
@@ -6,6 +6,7 @@ import os
 import tempfile
 from pathlib import Path
 
+import pytest
 from fastapi.testclient import TestClient
 from openpyxl import Workbook
 
@@ -105,6 +106,72 @@ def test_create_project_and_list() -> None:
         assert payload["total"] >= 1
 
 
+def test_list_endpoints_keyset_pagination() -> None:
+    with TestClient(app) as client:
+        full = client.get("/api/v1/projects", params={"limit": 500}).json()
+        assert full["total"] == len(full["items"])
+
+        seen: list[str] = []
+        params: dict = {"limit": 2}
+        while True:
+            page = client.get("/api/v1/projects", params=params).json()
+            assert page["total"] == full["total"]
+            seen.extend(p["project_id"] for p in page["items"])
+            if page["next_cursor"] is None:
+                break
+            params["after"] = page["next_cursor"]
+        assert seen == [p["project_id"] for p in full["items"]]
+
+        first = client.get("/api/v1/invoices", params={"limit": 1})
+        total = int(first.headers["x-total-count"])
+        assert total >= 1
+        if total > 1:
+            cursor = first.headers["x-next-cursor"]
+            second = client.get("/api/v1/invoices", params={"limit": 1, "after": cursor}).json()
+            assert second[0]["invoice_id"] > first.json()[0]["invoice_id"]
+
+        customers = client.get("/api/v1/customers", params={"limit": 1})
+        assert int(customers.headers["x-total-count"]) >= len(customers.json()) == 1
+
+        unpaged = client.get("/api/v1/customers")
+        assert len(unpaged.json()) == int(unpaged.headers["x-total-count"])
+        assert "x-next-cursor" not in unpaged.headers
+
+
+def test_streaming_ledger_export() -> None:
+    import csv
+    import io
+    import json
+
+    with TestClient(app) as client:
+        client.post(
+            "/api/v1/invoices",
+            json={"project_id": "P-003", "invoice_amount": 123, "billed_at": "2019-05-10"},
+        )
+        listed = client.get("/api/v1/invoices", params={"limit": 500})
+        ndjson = client.get("/api/v1/export/invoices")
+        assert ndjson.status_code == 200
+        assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in ndjson.text.splitlines()]
+        assert len(rows) == int(listed.headers["x-total-count"])
+        assert [r["invoice_id"] for r in rows] == sorted(r["invoice_id"] for r in rows)
+
+        ranged = client.get(
+            "/api/v1/export/invoices", params={"date_from": "2019-05-01", "date_to": "2019-05-31", "format": "csv"}
+        )
+        assert ranged.headers["content-type"].startswith("text/csv")
+        records = list(csv.DictReader(io.StringIO(ranged.content.decode("utf-8-sig"))))
+        assert records and all(r["billed_at"].startswith("2019-05") for r in records)
+        assert any(r["invoice_amount"] == "123.0" for r in records)
+
+        items = client.get("/api/v1/export/project-items", params={"project_id": "P-003"})
+        assert all(json.loads(line)["project_id"] == "P-003" for line in items.text.splitlines())
+
+        assert client.get("/api/v1/export/customers").status_code == 422
+        bad_range = client.get("/api/v1/export/payments", params={"date_from": "2020-02-01", "date_to": "2020-01-01"})
+        assert bad_range.status_code == 422
+
+
 def test_document_exports() -> None:
     with TestClient(app) as client:
         estimate = client.post(
@@ -144,6 +211,217 @@ def test_project_item_endpoints() -> None:
         assert any(item["id"] == created["id"] for item in items)
 
 
+def test_project_items_bulk_create() -> None:
+    with TestClient(app) as client:
+        masters = client.get("/api/v1/work-items").json()
+        first, second = masters[0], masters[1]
+        before = client.get("/api/v1/dashboard/summary").json()["item_total_amount"]
+
+        resp = client.post(
+            "/api/v1/projects/P-003/items/bulk",
+            json={
+                "items": [
+                    {"master_item_id": first["id"], "quantity": 2},
+                    {"master_item_id": 999999, "quantity": 1},
+                    {"master_item_id": second["id"], "quantity": 3, "unit_price": 100, "item_name": "上書き名"},
+                    {"quantity": 1},
+                    {"category": "手入力", "item_name": "自由明細", "unit_price": 50},
+                ]
+            },
+        )
+        assert resp.status_code == 200
+        body = resp.json()
+        assert (body["succeeded"], body["failed"]) == (3, 2)
+        assert [r["status_code"] for r in body["results"]] == [201, 404, 201, 422, 201]
+        created = [r["item"] for r in body["results"] if r["item"]]
+        assert created[0]["line_total"] == 2 * first["standard_unit_price"]
+        assert created[1]["item_name"] == "上書き名" and created[1]["line_total"] == 300
+        assert created[1]["category"] == second["category"]
+
+        listed = {item["id"]: item for item in client.get("/api/v1/projects/P-003/items").json()}
+        assert all(listed[item["id"]] == item for item in created)
+
+        after = client.get("/api/v1/dashboard/summary").json()["item_total_amount"]
+        assert after == before + sum(item["line_total"] for item in created)
+
+        missing = client.post("/api/v1/projects/P-404/items/bulk", json={"items": [{"quantity": 1}]})
+        assert missing.status_code == 404
+
+
+def test_estimate_templates_import_and_instantiate() -> None:
+    wb = Workbook()
+    ws_template = wb.active
+    ws_template.title = "案件テンプレート"
+    ws_template.cell(14, 1, "No.")
+    ws_template.cell(15, 1, 1)
+    ws_template.cell(15, 3, "テンプレ工事")
+    ws_template.cell(15, 4, "テンプレ養生")
+    ws_template.cell(15, 6, 3000)
+    ws_template.cell(15, 8, "式")
+    ws_template.cell(15, 9, 2)
+    ws_template.cell(16, 1, 2)
+
+    ws_trade = wb.create_sheet("テンプレ解体")
+    ws_trade.cell(3, 2, "名称形状")
+    ws_trade.cell(3, 4, "数量")
+    ws_trade.cell(4, 2, "テンプレ解体工事")
+    for row, (name, qty, unit, price) in enumerate(
+        [("テンプレ撤去", 3, "㎥", 20000), (None, 1, "式", 0), ("テンプレ運搬", None, "台", 18000)], start=5
+    ):
+        ws_trade.cell(row, 2, name)
+        ws_trade.cell(row, 4, qty)
+        ws_trade.cell(row, 5, unit)
+        ws_trade.cell(row, 6, price)
+    wb_path = TMP_DIR / "templates.xlsx"
+    wb.save(wb_path)
+
+    with TestClient(app) as client:
+        imported = client.post("/api/v1/sync/templates", json={"workbook_path": str(wb_path)}).json()
+        assert (imported["templates"], imported["items"], imported["masters_created"]) == (2, 3, 3)
+        again = client.post("/api/v1/sync/templates", json={"workbook_path": str(wb_path)}).json()
+        assert again["masters_created"] == 0
+
+        templates = {t["name"]: t for t in client.get("/api/v1/templates").json()}
+        trade = templates["テンプレ解体"]
+        assert (trade["category"], trade["item_count"]) == ("テンプレ解体工事", 2)
+        detail = client.get(f"/api/v1/templates/{trade['id']}").json()
+        assert [(i["item_name"], i["quantity"], i["unit_price"]) for i in detail["items"]] == [
+            ("テンプレ撤去", 3, 20000),
+            ("テンプレ運搬", 1, 18000),
+        ]
+
+        project = client.post("/api/v1/projects", json={"customer_id": "C-001", "project_name": "テンプレ案件"}).json()
+        before = client.get("/api/v1/dashboard/summary").json()["item_total_amount"]
+        created = client.post(f"/api/v1/projects/{project['project_id']}/items/from-template/{trade['id']}")
+        assert created.status_code == 201
+        assert created.json()["items_created"] == 2 and created.json()["line_total"] == 78000
+
+        items = client.get(f"/api/v1/projects/{project['project_id']}/items").json()
+        assert [(i["item_name"], i["line_total"]) for i in items] == [("テンプレ撤去", 60000), ("テンプレ運搬", 18000)]
+        assert client.get("/api/v1/dashboard/summary").json()["item_total_amount"] == before + 78000
+
+        missing = client.post(f"/api/v1/projects/{project['project_id']}/items/from-template/999999")
+        assert missing.status_code == 404
+
+        del wb["テンプレ解体"]
+        wb.save(wb_path)
+        pruned = client.post("/api/v1/sync/templates", json={"workbook_path": str(wb_path)}).json()
+        assert (pruned["templates"], pruned["removed"]) == (1, ["テンプレ解体"])
+        assert "テンプレ解体" not in {t["name"] for t in client.get("/api/v1/templates").json()}
+
+
+def test_work_item_search_uses_ranked_bigram_index() -> None:
+    from app.database import SessionLocal
+    from app.models import WorkItemMaster
+    from app.services.work_item_search import refresh_work_item_search_index
+
+    with TestClient(app) as client:
+        db = SessionLocal()
+        try:
+            db.add_all(
+                [
+                    WorkItemMaster(category="検索テスト", item_name="ＲＣ造解体工事", specification="重機"),
+                    WorkItemMaster(category="検索テスト", item_name="養生シート", specification="RC造解体用"),
+                    WorkItemMaster(category="検索テスト", item_name="木造解体", specification=None),
+                ]
+            )
+            db.flush()
+            assert refresh_work_item_search_index(db) == 3
+            assert refresh_work_item_search_index(db) == 0
+            db.commit()
+        finally:
+            db.close()
+
+        hits = client.get("/api/v1/work-items", params={"q": "rc造解体", "category": "検索テスト"}).json()
+        assert [h["item_name"] for h in hits] == ["ＲＣ造解体工事", "養生シート"]
+
+        multi = client.get("/api/v1/work-items", params={"q": "解体 木", "category": "検索テスト"}).json()
+        assert [h["item_name"] for h in multi] == ["木造解体"]
+
+        single = client.get("/api/v1/work-items", params={"q": "養", "category": "検索テスト"}).json()
+        assert [h["item_name"] for h in single] == ["養生シート"]
+
+
+def test_work_item_search_ranks_common_terms_in_one_query() -> None:
+    from sqlalchemy import event, select
+
+    from app.database import SessionLocal, engine
+    from app.models import WorkItemMaster
+    from app.schemas import WorkItemMasterRead
+    from app.services.work_item_catalog import WorkItemCatalog
+    from app.services.work_item_search import refresh_work_item_search_index, search_work_items
+
+    db = SessionLocal()
+    try:
+        db.add_all(
+            [WorkItemMaster(category="共通語テスト", item_name=f"内装解体{i:02d}", specification="手壊し") for i in range(40)]
+            + [WorkItemMaster(category="共通語テスト", item_name=f"養生{i:02d}", specification="解体前") for i in range(40)]
+            + [WorkItemMaster(category="共通語テスト", item_name="解体", specification=None)]
+        )
+        db.flush()
+        refresh_work_item_search_index(db)
+
+        statements: list[str] = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany) -> None:
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _record)
+        try:
+            hits = search_work_items(db, "解体", category="共通語テスト", limit=5)
+        finally:
+            event.remove(engine, "before_cursor_execute", _record)
+        # Ranked and limited in SQL: 81 candidates, one statement, five rows loaded.
+        assert len(statements) == 1
+        assert [h.item_name for h in hits] == ["解体", "内装解体00", "内装解体01", "内装解体02", "内装解体03"]
+
+        rows = db.execute(select(WorkItemMaster).where(WorkItemMaster.category == "共通語テスト")).scalars()
+        catalog = WorkItemCatalog(WorkItemMasterRead.model_validate(row, from_attributes=True) for row in rows)
+        for q in ("解体", "養生 解体", "解体前"):
+            expected = [item.id for item in catalog.suggest(q, limit=100)]
+            assert [h.id for h in search_work_items(db, q, category="共通語テスト")] == expected
+    finally:
+        db.rollback()
+        db.close()
+
+def test_work_item_suggest_from_memory_catalog() -> None:
+    from app.database import SessionLocal
+    from app.models import WorkItemMaster
+    from app.services import work_item_catalog
+
+    with TestClient(app) as client:
+        db = SessionLocal()
+        try:
+            db.add_all(
+                [
+                    WorkItemMaster(category="候補テスト", item_name="石膏ボード張り", standard_unit_price=1500),
+                    WorkItemMaster(category="候補テスト", item_name="ﾎﾞｰﾄﾞ撤去", standard_unit_price=800),
+                    WorkItemMaster(category="候補テスト", item_name="巾木", specification="ぼーど見切り"),
+                ]
+            )
+            db.commit()
+        finally:
+            db.close()
+        work_item_catalog.invalidate_work_item_catalog()
+
+        hits = client.get("/api/v1/work-items/suggest", params={"q": "ボード", "category": "候補テスト"}).json()
+        assert [h["item_name"] for h in hits] == ["ﾎﾞｰﾄﾞ撤去", "石膏ボード張り", "巾木"]
+        assert hits[0]["standard_unit_price"] == 800
+
+        single = client.get("/api/v1/work-items/suggest", params={"q": "巾", "category": "候補テスト"}).json()
+        assert [h["item_name"] for h in single] == ["巾木"]
+
+        assert client.get("/api/v1/work-items/suggest", params={"q": "存在しない語"}).json() == []
+        catalog = work_item_catalog.get_work_item_catalog()
+        assert work_item_catalog.get_work_item_catalog() is catalog
+
+        wb_path = TMP_DIR / "catalog_sync.xlsx"
+        _create_sync_workbook(wb_path)
+        client.post("/api/v1/sync/excel", json={"workbook_path": str(wb_path), "full_resync": True})
+        assert work_item_catalog.get_work_item_catalog() is not catalog
+        assert client.get("/api/v1/work-items/suggest", params={"q": "同期明細"}).json()[0]["item_name"] == "同期明細"
+
+
 def test_excel_sync_endpoint() -> None:
     wb_path = TMP_DIR / "sync_source.xlsx"
     _create_sync_workbook(wb_path)
@@ -267,6 +545,107 @@ def test_invoice_and_payment_endpoints() -> None:
         assert invalid_payment.status_code == 422
 
 
+def test_invoice_ids_are_unique_under_concurrent_creates() -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    with TestClient(app) as client:
+        def create(_: int):
+            return client.post("/api/v1/invoices", json={"project_id": "P-003", "invoice_amount": 10})
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            responses = list(pool.map(create, range(16)))
+        assert [r.status_code for r in responses] == [201] * 16
+        ids = [r.json()["invoice_id"] for r in responses]
+        assert len(set(ids)) == 16
+
+        explicit = client.post(
+            "/api/v1/invoices", json={"project_id": "P-003", "invoice_id": "INV-950", "invoice_amount": 10}
+        )
+        assert explicit.status_code == 201
+        following = client.post("/api/v1/invoices", json={"project_id": "P-003", "invoice_amount": 10})
+        assert following.json()["invoice_id"] == "INV-951"
+
+
+def test_reserve_id_block() -> None:
+    with TestClient(app) as client:
+        block = client.post("/api/v1/ids/reserve", params={"prefix": "PAY", "count": 50})
+        assert block.status_code == 200
+        body = block.json()
+        assert body["count"] == 50 and len(body["ids"]) == 50
+        first = int(body["first_id"].split("-")[1])
+        assert body["ids"] == [f"PAY-{n:03d}" for n in range(first, first + 50)]
+        assert body["last_id"] == body["ids"][-1]
+
+        created = client.post(
+            "/api/v1/payments",
+            json={"project_id": "P-003", "payment_id": body["ids"][0], "ordered_amount": 10},
+        )
+        assert created.status_code == 201
+        after = client.post("/api/v1/payments", json={"project_id": "P-003", "ordered_amount": 10}).json()
+        assert int(after["payment_id"].split("-")[1]) == first + 50
+
+        assert client.post("/api/v1/ids/reserve", params={"prefix": "XYZ", "count": 1}).status_code == 422
+        assert client.post("/api/v1/ids/reserve", params={"prefix": "INV", "count": 0}).status_code == 422
+
+
+def test_bulk_invoice_and_payment_endpoints() -> None:
+    with TestClient(app) as client:
+        before = client.get("/api/v1/dashboard/summary").json()
+
+        created = client.post(
+            "/api/v1/invoices/bulk",
+            json={
+                "items": [
+                    {"project_id": "P-003", "invoice_amount": 100},
+                    {"project_id": "P-404", "invoice_amount": 100},
+                    {"project_id": "P-003", "invoice_amount": 100, "paid_amount": 200},
+                    {"project_id": "P-003", "invoice_id": "INV-980", "invoice_amount": 300, "paid_amount": 100},
+                    {"project_id": "P-003", "invoice_id": "INV-980", "invoice_amount": 50},
+                    {"project_id": "P-003", "invoice_amount": 40},
+                ]
+            },
+        )
+        assert created.status_code == 200
+        body = created.json()
+        assert (body["succeeded"], body["failed"]) == (3, 3)
+        assert [r["status_code"] for r in body["results"]] == [201, 404, 422, 201, 409, 201]
+        auto_ids = [body["results"][0]["invoice_id"], body["results"][5]["invoice_id"]]
+        assert auto_ids == ["INV-981", "INV-982"]
+        assert body["results"][3]["invoice"]["remaining_amount"] == 200
+
+        updated = client.patch(
+            "/api/v1/invoices/bulk",
+            json={
+                "items": [
+                    {"invoice_id": "INV-980", "paid_amount": 300},
+                    {"invoice_id": "INV-999", "paid_amount": 1},
+                    {"invoice_id": "INV-981", "paid_amount": 500},
+                ]
+            },
+        ).json()
+        assert [r["status_code"] for r in updated["results"]] == [200, 404, 422]
+        assert updated["results"][0]["invoice"]["status"] == "✅入金済"
+
+        payments = client.post(
+            "/api/v1/payments/bulk",
+            json={"items": [{"project_id": "P-003", "ordered_amount": 80}, {"project_id": "P-003", "ordered_amount": 20}]},
+        ).json()
+        assert payments["succeeded"] == 2
+        patched = client.patch(
+            "/api/v1/payments/bulk",
+            json={"items": [{"payment_id": payments["results"][1]["payment_id"], "paid_amount": 20}]},
+        ).json()
+        assert patched["results"][0]["payment"]["remaining_amount"] == 0
+
+        after = client.get("/api/v1/dashboard/summary").json()
+        assert after["invoice_total_amount"] == before["invoice_total_amount"] + 440
+        assert after["invoice_remaining_amount"] == before["invoice_remaining_amount"] + 140
+        assert after["payment_total_amount"] == before["payment_total_amount"] + 100
+        assert after["payment_remaining_amount"] == before["payment_remaining_amount"] + 80
+
+        assert client.post("/api/v1/invoices/bulk", json={"items": []}).status_code == 422
+
+
 def test_dashboard_summary() -> None:
     with TestClient(app) as client:
         resp = client.get("/api/v1/dashboard/summary")
@@ -292,3 +671,810 @@ def test_dashboard_overview() -> None:
         assert isinstance(body["monthly_sales_current_year"], list)
         assert len(body["monthly_sales_current_year"]) == 12
         assert isinstance(body["active_projects"], list)
+
+
+def test_dashboard_summary_aggregates_follow_writes() -> None:
+    from sqlalchemy import func, select
+
+    from app.database import SessionLocal
+    from app.models import Invoice, Payment, Project, ProjectItem
+
+    with TestClient(app) as client:
+        project = client.post(
+            "/api/v1/projects", json={"customer_id": "C-001", "project_name": "集計テスト案件"}
+        ).json()
+        invoice = client.post(
+            "/api/v1/invoices",
+            json={"project_id": project["project_id"], "invoice_amount": 1000, "paid_amount": 200},
+        ).json()
+        client.patch(f"/api/v1/invoices/{invoice['invoice_id']}", json={"invoice_amount": 1500})
+        payment = client.post(
+            "/api/v1/payments", json={"project_id": project["project_id"], "ordered_amount": 700}
+        ).json()
+        client.patch(f"/api/v1/payments/{payment['payment_id']}", json={"paid_amount": 300})
+        client.post(
+            f"/api/v1/projects/{project['project_id']}/items",
+            json={"category": "集計", "item_name": "集計明細", "quantity": 2, "unit_price": 250},
+        )
+
+        body = client.get("/api/v1/dashboard/summary").json()
+
+    db = SessionLocal()
+    try:
+        def total(column) -> float:
+            return float(db.execute(select(func.coalesce(func.sum(column), 0.0))).scalar_one())
+
+        assert body["project_total"] == db.execute(select(func.count(Project.id))).scalar_one()
+        assert body["invoice_total_amount"] == total(Invoice.invoice_amount)
+        assert body["invoice_remaining_amount"] == total(Invoice.remaining_amount)
+        assert body["payment_total_amount"] == total(Payment.ordered_amount)
+        assert body["payment_remaining_amount"] == total(Payment.remaining_amount)
+        assert body["item_total_amount"] == total(ProjectItem.line_total)
+    finally:
+        db.close()
+
+
+def test_project_rollups_follow_writes() -> None:
+    from sqlalchemy import func, select
+
+    from app.database import SessionLocal
+    from app.models import Invoice, Payment, ProjectItem
+    from app.services.project_rollups import read_project_rollups, rebuild_project_rollups
+
+    with TestClient(app) as client:
+        project_id = client.post(
+            "/api/v1/projects", json={"customer_id": "C-001", "project_name": "原価集計テスト案件"}
+        ).json()["project_id"]
+        other_id = client.post(
+            "/api/v1/projects", json={"customer_id": "C-001", "project_name": "原価集計テスト案件2"}
+        ).json()["project_id"]
+
+        client.post(
+            f"/api/v1/projects/{project_id}/items",
+            json={"category": "内装", "item_name": "クロス貼替", "quantity": 10, "unit_price": 1000},
+        )
+        client.post(
+            f"/api/v1/projects/{project_id}/items/bulk",
+            json={
+                "items": [
+                    {"category": "内装", "item_name": "床張替", "quantity": 2, "unit_price": 5000},
+                    {"category": "設備", "item_name": "照明交換", "quantity": 1, "unit_price": 8000},
+                ]
+            },
+        )
+        invoice = client.post(
+            "/api/v1/invoices", json={"project_id": project_id, "invoice_amount": 40000, "paid_amount": 10000}
+        ).json()
+        client.patch(f"/api/v1/invoices/{invoice['invoice_id']}", json={"invoice_amount": 50000})
+        client.post(
+            "/api/v1/payments/bulk",
+            json={
+                "items": [
+                    {"project_id": project_id, "ordered_amount": 20000},
+                    {"project_id": project_id, "ordered_amount": 10000, "paid_amount": 10000},
+                    {"project_id": other_id, "ordered_amount": 3000},
+                ]
+            },
+        )
+
+        rollup = client.get(f"/api/v1/projects/{project_id}/rollup")
+        assert rollup.status_code == 200
+        body = rollup.json()
+        assert body["category_subtotals"] == {"内装": 20000, "設備": 8000}
+        assert body["estimate_total"] == 28000
+        assert (body["invoice_total"], body["invoice_remaining"]) == (50000, 40000)
+        assert (body["payment_total"], body["payment_remaining"]) == (30000, 20000)
+        assert body["gross_profit"] == 20000
+        assert body["achieved_margin_rate"] == 0.4
+        assert body["margin_gap"] == pytest.approx(0.15)
+
+        batch = client.get(
+            "/api/v1/projects/rollups", params=[("project_id", other_id), ("project_id", "P-404"), ("project_id", project_id)]
+        ).json()
+        assert [row["project_id"] for row in batch] == [other_id, project_id]
+        assert batch[0]["payment_total"] == 3000
+        assert batch[0]["achieved_margin_rate"] is None
+        assert batch[1] == body
+
+        assert client.get("/api/v1/projects/P-404/rollup").status_code == 404
+        assert client.get("/api/v1/projects/rollups").status_code == 422
+
+    db = SessionLocal()
+    try:
+        incremental = read_project_rollups(db, [project_id, other_id])
+        rebuild_project_rollups(db)
+        assert read_project_rollups(db, [project_id, other_id]) == incremental
+
+        def total(column, model) -> float:
+            return float(
+                db.execute(
+                    select(func.coalesce(func.sum(column), 0.0)).where(model.project_id == project_id)
+                ).scalar_one()
+            )
+
+        assert incremental[project_id].estimate_total == total(ProjectItem.line_total, ProjectItem)
+        assert incremental[project_id].invoice_total == total(Invoice.invoice_amount, Invoice)
+        assert incremental[project_id].payment_total == total(Payment.ordered_amount, Payment)
+        db.rollback()
+    finally:
+        db.close()
+
+
+def test_dashboard_overview_monthly_sales_match_ledger() -> None:
+    from datetime import date, timedelta
+
+    from sqlalchemy import select
+
+    from app.database import SessionLocal
+    from app.models import Invoice
+
+    today = date.today()
+    billed_dates = [
+        today,
+        today.replace(day=1),
+        date(today.year, 12, 31),
+        date(today.year - 1, today.month, 1),
+        date(today.year - 1, 12, 31),
+        date(today.year - 2, 6, 15),
+        today - timedelta(days=400),
+    ]
+
+    with TestClient(app) as client:
+        for index, billed_at in enumerate(billed_dates):
+            created = client.post(
+                "/api/v1/invoices",
+                json={"project_id": "P-003", "invoice_amount": 1000 + index, "billed_at": billed_at.isoformat()},
+            )
+            assert created.status_code == 201
+        body = client.get("/api/v1/dashboard/overview").json()
+
+    db = SessionLocal()
+    try:
+        invoices = db.execute(select(Invoice.billed_at, Invoice.invoice_amount)).all()
+    finally:
+        db.close()
+
+    try:
+        last_year_cutoff = today.replace(year=today.year - 1)
+    except ValueError:
+        last_year_cutoff = today.replace(year=today.year - 1, day=28)
+    monthly = [0.0] * 12
+    current_month = ytd = last_ytd = 0.0
+    for billed_at, amount in invoices:
+        if billed_at is None:
+            continue
+        if billed_at.year == today.year:
+            monthly[billed_at.month - 1] += amount
+            if today.replace(day=1) <= billed_at <= today:
+                current_month += amount
+            if billed_at <= today:
+                ytd += amount
+        elif billed_at.year == today.year - 1 and billed_at <= last_year_cutoff:
+            last_ytd += amount
+
+    assert [point["amount"] for point in body["monthly_sales_current_year"]] == monthly
+    assert body["current_month_sales"] == current_month
+    assert body["ytd_sales"] == ytd
+    assert body["last_year_ytd_sales"] == last_ytd
+
+
+def test_dashboard_cache_etag_and_write_invalidation() -> None:
+    with TestClient(app) as client:
+        first = client.get("/api/v1/dashboard/summary")
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+
+        not_modified = client.get("/api/v1/dashboard/summary", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+
+        overview = client.get("/api/v1/dashboard/overview")
+        assert client.get(
+            "/api/v1/dashboard/overview", headers={"If-None-Match": overview.headers["etag"]}
+        ).status_code == 304
+
+        client.post("/api/v1/invoices", json={"project_id": "P-003", "invoice_amount": 4321})
+
+        changed = client.get("/api/v1/dashboard/summary", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        assert changed.json()["invoice_total_amount"] == first.json()["invoice_total_amount"] + 4321
+
+
+def test_dashboard_overview_active_projects_use_status_class() -> None:
+    from sqlalchemy import func, select
+
+    from app.database import SessionLocal
+    from app.models import Project
+
+    with TestClient(app) as client:
+        created = client.post(
+            "/api/v1/projects", json={"customer_id": "C-002", "project_name": "進行中ダッシュボード案件"}
+        ).json()
+        client.post("/api/v1/invoices", json={"project_id": created["project_id"], "invoice_amount": 900})
+        client.post("/api/v1/payments", json={"project_id": created["project_id"], "ordered_amount": 400})
+        body = client.get("/api/v1/dashboard/overview").json()
+
+    db = SessionLocal()
+    try:
+        statuses = dict(db.execute(select(Project.project_id, Project.status_class)).all())
+        active_total = db.execute(select(func.count(Project.id)).where(Project.status_class == "active")).scalar_one()
+        newest_active = db.execute(
+            select(Project.project_id)
+            .where(Project.status_class == "active")
+            .order_by(Project.created_at.desc(), Project.id.desc())
+            .limit(12)
+        ).scalars().all()
+    finally:
+        db.close()
+
+    assert statuses["P-003"] == "completed"
+    assert body["active_project_count"] == active_total
+    assert len(body["active_projects"]) == min(active_total, 12)
+    assert [project["project_id"] for project in body["active_projects"]] == newest_active
+    listed = {project["project_id"]: project for project in body["active_projects"]}
+    assert listed[created["project_id"]]["invoice_total_amount"] == 900
+    assert listed[created["project_id"]]["gross_estimate"] == 500
+
+
+def test_dashboard_stream_fans_out_deltas() -> None:
+    import asyncio
+
+    from app.services.dashboard_events import dashboard_bus
+
+    with TestClient(app) as client:
+
+        async def scenario():
+            events = dashboard_bus.subscribe()
+            snapshot = await anext(events)
+            await asyncio.to_thread(
+                client.post, "/api/v1/invoices", json={"project_id": "P-003", "invoice_amount": 777}
+            )
+            delta = await asyncio.wait_for(anext(events), timeout=10)
+            await events.aclose()
+            return snapshot, delta
+
+        snapshot, delta = asyncio.run(scenario())
+
+    assert snapshot.event == "snapshot"
+    assert set(snapshot.data) == {"summary", "overview"}
+    assert delta.event == "delta"
+    assert delta.version == snapshot.version + 1
+    summary_delta = delta.data["summary"]
+    assert summary_delta["invoice_total_amount"] == snapshot.data["summary"]["invoice_total_amount"] + 777
+    assert "project_total" not in summary_delta
+    assert delta.encode().startswith(f"id: {delta.version}\nevent: delta\ndata: ")
+    assert dashboard_bus.subscriber_count == 0
+
+
+
+def test_dashboard_stream_retries_failed_snapshot_load() -> None:
+    import asyncio
+
+    from app.services.dashboard_events import DashboardEventBus
+
+    loads = iter([{"summary": {"total": 1}}, RuntimeError("db down"), {"summary": {"total": 2}}])
+
+    def loader():
+        value = next(loads)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    bus = DashboardEventBus(loader=loader, coalesce_seconds=0)
+
+    async def scenario():
+        first = bus.subscribe()
+        initial = await anext(first)
+        bus.publish()
+        await asyncio.sleep(0.05)  # the broadcaster's reload fails
+        second = bus.subscribe()
+        retried = await anext(second)
+        delta = await asyncio.wait_for(anext(first), timeout=5)
+        await first.aclose()
+        await second.aclose()
+        return initial, retried, delta
+
+    initial, retried, delta = asyncio.run(scenario())
+    assert initial.data == {"summary": {"total": 1}}
+    # The failed reload left the snapshot stale, so the next subscriber reloads it.
+    assert retried.data == {"summary": {"total": 2}}
+    assert (delta.event, delta.data) == ("delta", {"summary": {"total": 2}})
+
+def test_excel_sync_bulk_upsert_is_idempotent() -> None:
+    wb_path = TMP_DIR / "sync_bulk_source.xlsx"
+    _create_sync_workbook(wb_path)
+
+    with TestClient(app) as client:
+        first = client.post("/api/v1/sync/excel", json={"workbook_path": str(wb_path)})
+        second = client.post("/api/v1/sync/excel", json={"workbook_path": str(wb_path)})
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert set(second.json()["sheet_timings"]) >= {"顧客マスタ", "案件管理", "請求管理", "工事項目DB"}
+
+        invoices = client.get("/api/v1/invoices", params={"project_id": "P-101"}).json()
+        assert [x["invoice_id"] for x in invoices] == ["INV-101"]
+        assert invoices[0]["invoice_amount"] == 500000
+
+        items = client.get("/api/v1/work-items", params={"q": "同期明細"}).json()
+        assert len(items) == 1
+        assert items[0]["standard_unit_price"] == 12345
+
+
+def test_excel_sync_streams_rows_past_blank_lines() -> None:
+    wb_path = TMP_DIR / "sync_sparse_source.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "顧客マスタ"
+    ws.cell(4, 1, "顧客ID")
+    ws.cell(5, 1, "C-201")
+    ws.cell(5, 3, "疎データ顧客A")
+    ws.cell(40, 1, "C-202")
+    ws.cell(40, 3, "疎データ顧客B")
+    wb.save(wb_path)
+
+    with TestClient(app) as client:
+        resp = client.post("/api/v1/sync/excel", json={"workbook_path": str(wb_path)})
+        assert resp.status_code == 200
+        assert resp.json()["customers_upserted"] == 2
+
+        customer_ids = {c["customer_id"] for c in client.get("/api/v1/customers").json()}
+        assert {"C-201", "C-202"} <= customer_ids
+
+
+def test_excel_sync_incremental_journal() -> None:
+    wb_path = TMP_DIR / "sync_incremental_source.xlsx"
+    _create_sync_workbook(wb_path)
+
+    with TestClient(app) as client:
+        client.post("/api/v1/sync/excel", json={"workbook_path": str(wb_path), "full_resync": True})
+
+        unchanged = client.post("/api/v1/sync/excel", json={"workbook_path": str(wb_path)}).json()
+        assert unchanged["rows_inserted"] == 0
+        assert unchanged["rows_updated"] == 0
+        assert unchanged["rows_unchanged"] >= 4
+        assert all(stats["skipped"] for stats in unchanged["sheet_stats"].values())
+
+        from openpyxl import load_workbook
+
+        wb = load_workbook(wb_path)
+        wb["請求管理"].cell(5, 7, 650000)
+        wb["請求管理"].cell(6, 1, "INV-190")
+        wb["請求管理"].cell(6, 2, "P-101")
+        wb["請求管理"].cell(6, 7, 1000)
+        wb.save(wb_path)
+
+        changed = client.post("/api/v1/sync/excel", json={"workbook_path": str(wb_path)}).json()
+        invoice_stats = changed["sheet_stats"]["請求管理"]
+        assert invoice_stats == {
+            "rows": 2, "inserted": 1, "updated": 1, "unchanged": 0, "deleted": 0, "resumed": 0, "skipped": False
+        }
+        assert changed["sheet_stats"]["顧客マスタ"]["skipped"] is True
+
+        wb["請求管理"].delete_rows(6)
+        wb.save(wb_path)
+        removed = client.post("/api/v1/sync/excel", json={"workbook_path": str(wb_path)}).json()
+        assert removed["sheet_stats"]["請求管理"]["deleted"] == 1
+
+        invoices = client.get("/api/v1/invoices", params={"project_id": "P-101"}).json()
+        assert [(x["invoice_id"], x["invoice_amount"]) for x in invoices] == [("INV-101", 650000)]
+
+
+def test_excel_sync_work_item_deletes_keep_template_lines() -> None:
+    from openpyxl import load_workbook
+    from sqlalchemy import select
+
+    from app.database import SessionLocal
+    from app.models import EstimateTemplate, EstimateTemplateItem, WorkItemMaster
+    from app.services.excel_sync import sync_from_workbook
+
+    wb_path = TMP_DIR / "sync_work_item_delete_source.xlsx"
+    _create_sync_workbook(wb_path)
+    wb = load_workbook(wb_path)
+    for row, (category, item_name) in enumerate((("内装|仕上", "区切り明細"), ("解体工事", "参照明細")), start=6):
+        wb["工事項目DB"].cell(row, 2, category)
+        wb["工事項目DB"].cell(row, 3, item_name)
+    wb.save(wb_path)
+
+    db = SessionLocal()
+    try:
+        sync_from_workbook(db, str(wb_path))
+        masters = dict(
+            db.execute(
+                select(WorkItemMaster.item_name, WorkItemMaster.id).where(
+                    WorkItemMaster.item_name.in_(["区切り明細", "参照明細"])
+                )
+            ).all()
+        )
+        template = EstimateTemplate(name="削除保護テンプレート")
+        db.add(template)
+        db.flush()
+        db.add(EstimateTemplateItem(template_id=template.id, position=1, master_item_id=masters["参照明細"], quantity=1))
+        db.commit()
+
+        wb["工事項目DB"].delete_rows(6, 2)
+        wb.save(wb_path)
+        result = sync_from_workbook(db, str(wb_path))
+        # The master a template still uses is kept, so only one row counts as deleted.
+        assert result.sheet_stats["工事項目DB"].deleted == 1
+
+        remaining = set(db.execute(select(WorkItemMaster.id).where(WorkItemMaster.id.in_(masters.values()))).scalars())
+        assert remaining == {masters["参照明細"]}
+        lines = db.execute(select(EstimateTemplateItem).where(EstimateTemplateItem.template_id == template.id))
+        assert [line.master_item_id for line in lines.scalars()] == [masters["参照明細"]]
+        db.delete(template)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_excel_sync_upload_returns_cached_result_for_same_file() -> None:
+    wb_path = TMP_DIR / "sync_cached_upload.xlsx"
+    _create_sync_workbook(wb_path)
+    content = wb_path.read_bytes()
+    mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+    with TestClient(app) as client:
+        first = client.post(
+            "/api/v1/sync/excel/upload",
+            files={"file": ("sync_cached_upload.xlsx", content, mime)},
+        )
+        assert first.status_code == 200
+        assert first.json()["cached"] is False
+
+        again = client.post(
+            "/api/v1/sync/excel/upload",
+            files={"file": ("renamed.xlsx", content, mime)},
+        )
+        assert again.status_code == 200
+        body = again.json()
+        assert body["cached"] is True
+        assert body["customers_upserted"] == first.json()["customers_upserted"]
+
+        forced = client.post(
+            "/api/v1/sync/excel/upload",
+            params={"full_resync": True},
+            files={"file": ("renamed.xlsx", content, mime)},
+        )
+        assert forced.json()["cached"] is False
+
+        queued = client.post(
+            "/api/v1/sync/excel/upload",
+            params={"background": True},
+            files={"file": ("renamed.xlsx", content, mime)},
+        )
+        assert queued.status_code == 202
+        job = _wait_for_sync_job(client, queued.json()["job_id"])
+        assert job["status"] == "succeeded"
+        assert job["result"]["cached"] is True
+        assert job["sheet_stats"] == forced.json()["sheet_stats"]
+
+
+def _wait_for_sync_job(client: TestClient, job_id: str) -> dict:
+    import time
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        job = client.get(f"/api/v1/sync/jobs/{job_id}").json()
+        if job["status"] in {"succeeded", "failed"}:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"sync job {job_id} did not finish")
+
+
+def test_excel_sync_background_jobs() -> None:
+    wb_path = TMP_DIR / "sync_background_source.xlsx"
+    _create_sync_workbook(wb_path)
+
+    with TestClient(app) as client:
+        queued = client.post(
+            "/api/v1/sync/excel",
+            params={"background": True},
+            json={"workbook_path": str(wb_path), "full_resync": True},
+        )
+        assert queued.status_code == 202
+        job = _wait_for_sync_job(client, queued.json()["job_id"])
+        assert job["status"] == "succeeded"
+        assert job["result"]["customers_upserted"] >= 1
+        assert job["rows_processed"] >= 4
+        assert "請求管理" in job["sheet_stats"]
+        assert job["duration_seconds"] is not None
+
+        with wb_path.open("rb") as fp:
+            upload = client.post(
+                "/api/v1/sync/excel/upload",
+                params={"background": True, "full_resync": True},
+                files={"file": ("sync_background_source.xlsx", fp, "application/octet-stream")},
+            )
+        assert upload.status_code == 202
+        assert _wait_for_sync_job(client, upload.json()["job_id"])["status"] == "succeeded"
+
+        assert client.get("/api/v1/sync/jobs/unknown").status_code == 404
+
+
+def test_sync_job_status_requires_api_key(monkeypatch: pytest.MonkeyPatch) -> None:
+    from app import security
+
+    monkeypatch.setattr(security, "API_KEY", "secret")
+    with TestClient(app) as client:
+        assert client.get("/api/v1/sync/jobs/unknown").status_code == 401
+        assert client.get("/api/v1/sync/jobs/unknown", headers={"X-API-Key": "secret"}).status_code == 404
+
+
+def test_excel_sync_dry_run_reports_diff_without_writing() -> None:
+    import json
+
+    from openpyxl import load_workbook
+
+    from app.database import SessionLocal
+    from app.services.excel_sync import diff_workbook
+
+    wb_path = TMP_DIR / "sync_dry_run_source.xlsx"
+    _create_sync_workbook(wb_path)
+
+    with TestClient(app) as client:
+        client.post("/api/v1/sync/excel", json={"workbook_path": str(wb_path), "full_resync": True})
+
+        wb = load_workbook(wb_path)
+        wb["請求管理"].cell(5, 7, 777777)
+        wb["顧客マスタ"].cell(6, 1, "C-299")
+        wb["顧客マスタ"].cell(6, 3, "プレビュー顧客")
+        wb.save(wb_path)
+
+        resp = client.post(
+            "/api/v1/sync/excel",
+            params={"dry_run": True},
+            json={"workbook_path": str(wb_path)},
+        )
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in resp.text.splitlines()]
+
+        rows = {(x["sheet"], x["key"]): x for x in lines if x["type"] == "row"}
+        assert rows[("請求管理", "INV-101")]["change"] == "changed"
+        assert rows[("請求管理", "INV-101")]["fields"] == ["invoice_amount"]
+        assert rows[("顧客マスタ", "C-299")]["change"] == "new"
+        sheets = {x["sheet"]: x for x in lines if x["type"] == "sheet"}
+        assert sheets["案件管理"]["changed"] == 0
+        assert lines[-1]["type"] == "summary"
+
+        invoices = client.get("/api/v1/invoices", params={"project_id": "P-101"}).json()
+        assert all(x["invoice_amount"] != 777777 for x in invoices)
+
+        uploaded = client.post(
+            "/api/v1/sync/excel/upload",
+            params={"dry_run": True},
+            files={"file": ("preview.xlsx", wb_path.read_bytes(), "application/octet-stream")},
+        )
+        assert [json.loads(line) for line in uploaded.text.splitlines()] == lines
+
+        missing = client.post(
+            "/api/v1/sync/excel", params={"dry_run": True}, json={"workbook_path": str(TMP_DIR / "missing.xlsx")}
+        )
+        assert missing.status_code == 404
+
+    db = SessionLocal()
+    try:
+        # Sheets are yielded as they are compared rather than collected first.
+        diffs = diff_workbook(db, str(wb_path))
+        assert next(diffs).sheet_name == "顧客マスタ"
+        diffs.close()
+    finally:
+        db.close()
+
+
+def test_excel_sync_chunked_commit_resumes_after_failure(monkeypatch: pytest.MonkeyPatch) -> None:
+    from dataclasses import replace
+
+    from openpyxl import load_workbook
+    from sqlalchemy import func, select
+
+    from app.database import SessionLocal
+    from app.models import SyncCheckpoint, WorkItemMaster
+    from app.services import excel_sync
+
+    wb_path = TMP_DIR / "sync_chunked_source.xlsx"
+    _create_sync_workbook(wb_path)
+    wb = load_workbook(wb_path)
+    ws_item = wb["工事項目DB"]
+    for offset in range(5):
+        ws_item.cell(6 + offset, 1, 601 + offset)
+        ws_item.cell(6 + offset, 2, "チャンク工事")
+        ws_item.cell(6 + offset, 3, f"チャンク明細{offset}")
+        ws_item.cell(6 + offset, 6, 1000 + offset)
+    wb.save(wb_path)
+
+    chunk_sizes: list[int] = []
+
+    def interrupted_apply(db, parsed, placeholder) -> None:
+        chunk_sizes.append(len(parsed.rows))
+        if len(chunk_sizes) == 2:
+            raise RuntimeError("connection lost")
+        excel_sync._apply_work_items(db, parsed, placeholder)
+
+    monkeypatch.setattr(
+        excel_sync,
+        "SHEET_SPECS",
+        tuple(
+            replace(spec, apply=interrupted_apply) if spec.sheet_name == "工事項目DB" else spec
+            for spec in excel_sync.SHEET_SPECS
+        ),
+    )
+
+    db = SessionLocal()
+    try:
+        with pytest.raises(RuntimeError):
+            excel_sync.sync_from_workbook(db, str(wb_path), full_resync=True, commit_chunk_rows=2)
+        db.rollback()
+
+        source_ids = [601, 602, 603, 604, 605]
+        committed = select(func.count()).select_from(WorkItemMaster).where(WorkItemMaster.source_item_id.in_(source_ids))
+        assert db.scalar(committed) == 1
+        checkpoint = db.execute(select(SyncCheckpoint).where(SyncCheckpoint.sheet_name == "工事項目DB")).scalar_one()
+        assert (checkpoint.rows_committed, checkpoint.completed) == (2, False)
+
+        result = excel_sync.sync_from_workbook(db, str(wb_path), full_resync=True, commit_chunk_rows=2)
+        assert db.scalar(committed) == 5
+        assert db.scalar(select(func.count()).select_from(SyncCheckpoint)) == 0
+    finally:
+        db.close()
+
+    assert chunk_sizes == [2, 2, 2, 2]
+    item_stats = result.sheet_stats["工事項目DB"]
+    assert item_stats.resumed == 2
+    assert item_stats.inserted == 4
+    customer_stats = result.sheet_stats["顧客マスタ"]
+    assert (customer_stats.skipped, customer_stats.resumed) == (False, customer_stats.rows)
+
+
+def test_excel_sync_resume_refreshes_sheets_applied_before_failure(monkeypatch: pytest.MonkeyPatch) -> None:
+    from openpyxl import load_workbook
+
+    from app.database import SessionLocal
+    from app.services import excel_sync
+    from app.services.work_item_search import search_work_items
+
+    wb_path = TMP_DIR / "sync_resume_refresh_source.xlsx"
+    _create_sync_workbook(wb_path)
+    wb = load_workbook(wb_path)
+    wb["工事項目DB"].cell(6, 1, 701)
+    wb["工事項目DB"].cell(6, 2, "再開工事")
+    wb["工事項目DB"].cell(6, 3, "再開索引明細")
+    wb.save(wb_path)
+
+    rebuild = excel_sync.rebuild_dashboard_aggregates
+    calls: list[int] = []
+
+    def fail_once(db) -> None:
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("connection lost")
+        rebuild(db)
+
+    monkeypatch.setattr(excel_sync, "rebuild_dashboard_aggregates", fail_once)
+
+    db = SessionLocal()
+    try:
+        # Every sheet commits its completed checkpoint before the final rebuild fails.
+        with pytest.raises(RuntimeError):
+            excel_sync.sync_from_workbook(db, str(wb_path), full_resync=True, commit_chunk_rows=2)
+        db.rollback()
+        assert search_work_items(db, "再開索引明細") == []
+
+        result = excel_sync.sync_from_workbook(db, str(wb_path), full_resync=True, commit_chunk_rows=2)
+        assert all(not stats.skipped for stats in result.sheet_stats.values())
+        assert result.sheet_stats["工事項目DB"].resumed == result.sheet_stats["工事項目DB"].rows
+        assert [item.item_name for item in search_work_items(db, "再開索引明細")] == ["再開索引明細"]
+    finally:
+        db.close()
+    assert len(calls) == 2
+
+
+
+def test_excel_sync_rebuilds_totals_after_interrupted_chunked_run(monkeypatch: pytest.MonkeyPatch) -> None:
+    from openpyxl import load_workbook
+    from sqlalchemy import func, select
+
+    from app.database import SessionLocal
+    from app.models import Invoice, SyncCheckpoint
+    from app.services import excel_sync
+    from app.services.dashboard_aggregates import INVOICE_AMOUNT, read_dashboard_aggregates
+
+    wb_path = TMP_DIR / "sync_interrupted_totals_source.xlsx"
+    _create_sync_workbook(wb_path)
+    wb = load_workbook(wb_path)
+    for offset in range(3):
+        wb["請求管理"].cell(6 + offset, 1, f"INV-71{offset}")
+        wb["請求管理"].cell(6 + offset, 2, "P-101")
+        wb["請求管理"].cell(6 + offset, 7, 1000)
+    wb.save(wb_path)
+
+    rebuild = excel_sync.rebuild_project_rollups
+    calls: list[int] = []
+
+    def fail_once(db) -> None:
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("connection lost")
+        rebuild(db)
+
+    monkeypatch.setattr(excel_sync, "rebuild_project_rollups", fail_once)
+
+    db = SessionLocal()
+    try:
+        with pytest.raises(RuntimeError):
+            excel_sync.sync_from_workbook(db, str(wb_path), full_resync=True, commit_chunk_rows=2)
+        db.rollback()
+        assert db.scalar(select(func.count()).select_from(SyncCheckpoint)) > 0
+
+        # Unchunked and unchanged: every sheet is skipped, but the leftover checkpoints force a rebuild.
+        result = excel_sync.sync_from_workbook(db, str(wb_path), commit_chunk_rows=0)
+        assert all(stats.skipped for stats in result.sheet_stats.values())
+        assert db.scalar(select(func.count()).select_from(SyncCheckpoint)) == 0
+        totals, _ = read_dashboard_aggregates(db)
+        assert totals[INVOICE_AMOUNT] == db.scalar(select(func.coalesce(func.sum(Invoice.invoice_amount), 0.0)))
+    finally:
+        db.close()
+    assert len(calls) == 2
+
+
+def test_project_rollups_survive_interrupted_chunked_sync(monkeypatch: pytest.MonkeyPatch) -> None:
+    from openpyxl import load_workbook
+    from sqlalchemy import func, select
+
+    from app.database import SessionLocal
+    from app.models import Invoice
+    from app.services import excel_sync
+    from app.services.project_rollups import read_project_rollups
+
+    wb_path = TMP_DIR / "sync_interrupted_rollup_source.xlsx"
+    _create_sync_workbook(wb_path)
+    wb = load_workbook(wb_path)
+    for offset in range(4):
+        wb["請求管理"].cell(6 + offset, 1, f"INV-72{offset}")
+        wb["請求管理"].cell(6 + offset, 2, "P-101")
+        wb["請求管理"].cell(6 + offset, 7, 2000)
+    wb.save(wb_path)
+
+    rebuild = excel_sync.rebuild_project_rollups
+    calls: list[int] = []
+
+    def fail_once(db) -> None:
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("connection lost")
+        rebuild(db)
+
+    monkeypatch.setattr(excel_sync, "rebuild_project_rollups", fail_once)
+
+    db = SessionLocal()
+    try:
+        # Every invoice chunk is committed before the final rollup rebuild fails.
+        with pytest.raises(RuntimeError):
+            excel_sync.sync_from_workbook(db, str(wb_path), full_resync=True, commit_chunk_rows=2)
+        db.rollback()
+
+        # Resume the same workbook, then sync it again once nothing is left to resume.
+        excel_sync.sync_from_workbook(db, str(wb_path), full_resync=True, commit_chunk_rows=2)
+        excel_sync.sync_from_workbook(db, str(wb_path), commit_chunk_rows=2)
+        invoiced = db.scalar(
+            select(func.coalesce(func.sum(Invoice.invoice_amount), 0.0)).where(Invoice.project_id == "P-101")
+        )
+        assert invoiced >= 8000
+        # Read before any app startup, which would rebuild the rollups anyway.
+        assert read_project_rollups(db, ["P-101"])["P-101"].invoice_total == invoiced
+    finally:
+        db.close()
+
+
+def test_coerce_converters_match_cell_semantics() -> None:
+    from datetime import date, datetime
+
+    from app.services.coerce import to_date, to_float, to_str
+
+    assert [to_str(v) for v in (" a ", "", None, 12, 1.5)] == ["a", None, None, "12", "1.5"]
+    assert [to_float(v, 7.0) for v in (3, 2.5, "4", "x", None, "")] == [3.0, 2.5, 4.0, 7.0, 7.0, 7.0]
+    assert to_float(None, None) is None
+    assert [
+        to_date(v) for v in (datetime(2026, 1, 2, 9, 30), date(2026, 1, 3), "2026/01/04", "2026-01-05T00:00", "bad", "", 5)
+    ] == [date(2026, 1, 2), date(2026, 1, 3), date(2026, 1, 4), date(2026, 1, 5), None, None, None]
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Benchmark Excel -> DB sync throughput on synthetic workbooks.
+
+Generates workbooks with the same sheet layouts `sync_from_workbook` reads
+(header row 4, data from row 5) and reports rows/sec, peak RSS and SQL
+statement counts for an initial sync and an unchanged re-sync.
+
+Each case runs in a fresh child process so peak RSS is per case. Postgres
+targets need a driver installed (e.g. `pip install psycopg[binary]`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from openpyxl import Workbook
+
+API_ROOT = Path(__file__).resolve().parents[1] / "app" / "api"
+
+DEFAULT_ROWS = [1_000, 10_000, 100_000]
+
+# Share of the requested rows generated per sheet (sheet, max column read by sync).
+SHEET_SHARES = {
+    "顧客マスタ": 0.1,
+    "案件管理": 0.2,
+    "請求管理": 0.3,
+    "工事項目DB": 0.2,
+    "支払管理": 0.2,
+}
+
+
+def _sheet(wb: Workbook, title: str, headers: dict[int, str], width: int):
+    ws = wb.create_sheet(title)
+    for _ in range(3):
+        ws.append([])
+    header = [None] * width
+    for col, label in headers.items():
+        header[col - 1] = label
+    ws.append(header)
+    return ws
+
+
+def _row(width: int, cells: dict[int, object]) -> list:
+    row = [None] * width
+    for col, value in cells.items():
+        row[col - 1] = value
+    return row
+
+
+def generate_workbook(path: Path, rows: int) -> dict[str, int]:
+    """Write a synthetic workbook with roughly ``rows`` data rows across the synced sheets."""
+    counts = {name: max(int(rows * share), 1) for name, share in SHEET_SHARES.items()}
+    n_customers = counts["顧客マスタ"]
+    n_projects = counts["案件管理"]
+    base_day = date(2025, 4, 1)
+
+    wb = Workbook(write_only=True)
+
+    ws = _sheet(wb, "顧客マスタ", {1: "顧客ID", 3: "会社名 / 氏名", 5: "担当者", 18: "ステータス"}, 18)
+    for i in range(1, n_customers + 1):
+        ws.append(_row(18, {1: f"C-{i:06d}", 3: f"ベンチ顧客{i}", 5: f"担当{i % 50}", 18: "アクティブ"}))
+
+    ws = _sheet(wb, "案件管理", {1: "案件ID", 2: "顧客ID", 4: "案件名", 9: "ステータス"}, 32)
+    for i in range(1, n_projects + 1):
+        customer = (i % n_customers) + 1
+        ws.append(
+            _row(
+                32,
+                {
+                    1: f"P-{i:06d}",
+                    2: f"C-{customer:06d}",
+                    3: f"ベンチ顧客{customer}",
+                    4: f"ベンチ案件{i}",
+                    8: 0.25,
+                    9: "③見積作成中",
+                    13: "吉野博",
+                    19: base_day + timedelta(days=i % 365),
+                    31: f"東京都江戸川区{i}",
+                },
+            )
+        )
+
+    ws = _sheet(wb, "請求管理", {1: "請求ID", 2: "案件ID", 5: "請求日", 7: "請求額"}, 12)
+    for i in range(1, counts["請求管理"] + 1):
+        project = (i % n_projects) + 1
+        ws.append(
+            _row(
+                12,
+                {
+                    1: f"INV-{i:06d}",
+                    2: f"P-{project:06d}",
+                    3: f"ベンチ案件{project}",
+                    5: (base_day + timedelta(days=i % 540)).isoformat(),
+                    7: 10_000 + i,
+                    12: "bench",
+                },
+            )
+        )
+
+    ws = _sheet(wb, "工事項目DB", {1: "ID", 2: "カテゴリ", 3: "項目名", 6: "単価"}, 9)
+    for i in range(1, counts["工事項目DB"] + 1):
+        ws.append(
+            _row(
+                9,
+                {
+                    1: i,
+                    2: f"カテゴリ{i % 20}",
+                    3: f"ベンチ項目{i}",
+                    4: "仕様",
+                    5: "式",
+                    6: 1_000 + i,
+                    7: f"業者{i % 30}",
+                    9: 0.2,
+                },
+            )
+        )
+
+    ws = _sheet(wb, "支払管理", {1: "支払ID", 2: "案件ID", 7: "発注額"}, 13)
+    for i in range(1, counts["支払管理"] + 1):
+        project = (i % n_projects) + 1
+        ws.append(
+            _row(
+                13,
+                {
+                    1: f"PAY-{i:06d}",
+                    2: f"P-{project:06d}",
+                    3: f"V-{i % 30:03d}",
+                    4: f"業者{i % 30}",
+                    5: f"ベンチ工事{i}",
+                    7: 50_000 + i,
+                    8: base_day + timedelta(days=i % 365),
+                    9: 20_000,
+                    11: "一部支払",
+                    13: "bench",
+                },
+            )
+        )
+
+    wb.save(path)
+    return counts
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_case(database_url: str, workbook_path: str, results) -> None:
+    """Child-process body: sync the workbook twice on a fresh schema and report metrics."""
+    sys.path.insert(0, API_ROOT.as_posix())
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import Session
+
+    from app.database import Base
+    from app.services.excel_sync import sync_from_workbook
+
+    engine = create_engine(database_url, future=True)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    statements = 0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany) -> None:
+        nonlocal statements
+        statements += 1
+
+    report = {}
+    for phase in ("initial", "resync"):
+        statements = 0
+        with Session(engine) as db:
+            started = time.perf_counter()
+            result = sync_from_workbook(db, workbook_path)
+            elapsed = time.perf_counter() - started
+        rows = sum(stats.rows for stats in result.sheet_stats.values())
+        report[phase] = {
+            "rows": rows,
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(rows / elapsed, 1) if elapsed else None,
+            "sql_statements": statements,
+        }
+    report["peak_rss_mb"] = round(_peak_rss_mb(), 1)
+    engine.dispose()
+    results.put(report)
+
+
+def run_case(database_url: str, workbook_path: Path) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=_run_case, args=(database_url, workbook_path.as_posix(), results))
+    proc.start()
+    proc.join()
+    if proc.exitcode != 0:
+        raise RuntimeError(f"benchmark case failed (exit={proc.exitcode}) for {database_url}")
+    return results.get()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Excel sync on synthetic workbooks.")
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=DEFAULT_ROWS,
+        help="Total data rows per generated workbook (default: 1000 10000 100000).",
+    )
+    parser.add_argument(
+        "--database-url",
+        action="append",
+        dest="database_urls",
+        help="SQLAlchemy URL to benchmark against; repeatable. Default: a temporary SQLite file. "
+        "The target schema is dropped and recreated.",
+    )
+    parser.add_argument("--json", dest="json_path", help="Also write results to this JSON file.")
+    args = parser.parse_args()
+
+    # Keep the app's import-time engine off the developer database.
+    work_dir = Path(tempfile.mkdtemp(prefix="link-estimate-bench-"))
+    os.environ.setdefault("APP_DATABASE_URL", f"sqlite:///{(work_dir / 'unused.db').as_posix()}")
+    database_urls = args.database_urls or [f"sqlite:///{(work_dir / 'bench.db').as_posix()}"]
+
+    results = []
+    for rows in args.rows:
+        workbook_path = work_dir / f"bench_{rows}.xlsx"
+        started = time.perf_counter()
+        counts = generate_workbook(workbook_path, rows)
+        print(f"generated {workbook_path.name}: {sum(counts.values())} rows in {time.perf_counter() - started:.1f}s")
+
+        for database_url in database_urls:
+            report = run_case(database_url, workbook_path)
+            dialect = database_url.split(":", 1)[0]
+            results.append({"rows": rows, "database": dialect, **report})
+            for phase in ("initial", "resync"):
+                metrics = report[phase]
+                print(
+                    f"  {dialect:<22} {phase:<8} {metrics['rows']:>8} rows  {metrics['seconds']:>8.2f}s  "
+                    f"{metrics['rows_per_sec']:>10} rows/s  {metrics['sql_statements']:>6} SQL"
+                )
+            print(f"  {dialect:<22} peak RSS {report['peak_rss_mb']} MB")
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())